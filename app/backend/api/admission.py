@@ -0,0 +1,294 @@
+"""Admission control and backpressure for generation endpoints.
+
+Each generation holds a slot on the model it uses ("image" for the portrait
+edit model, the video model key such as "grok" for videos). At most
+ADMISSION_MODEL_LIMITS (default ADMISSION_DEFAULT_LIMIT) generations per
+model run at once; the rest wait. A new job is only admitted if, given the
+jobs already waiting and the observed service time of the model, it can
+finish within its latency target (ADMISSION_LATENCY_TARGETS, default
+ADMISSION_LATENCY_TARGET_SEC) and the total backlog stays under
+ADMISSION_MAX_QUEUE. Otherwise the API answers 429 with a Retry-After
+computed from the observed throughput.
+
+Map-valued settings use "key=value,key=value", e.g. "image=8,grok=4".
+Routes reject video models without a service (`unknown_video_model`)
+before admission, so client input cannot add slot keys or metric labels.
+
+With JOB_QUEUE_DB set, work runs in separate worker processes, so only the
+durable queue depth is checked here and per-model slots are left to the
+worker pool size; Retry-After then comes from the workers' observed
+claim-to-ack time. In webhook mode a slot covers submission only.
+
+While the process drains for shutdown (`drain()`), every submission is
+rejected with Retry-After DRAIN_RETRY_AFTER_SEC.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from flask import jsonify
+
+from app.backend.api.scheduler import parse_env_map
+from src.core import metrics
+
+# Weight of the newest observation in the service-time moving average
+EWMA_ALPHA = 0.2
+
+DRAIN_RETRY_AFTER_SEC = int(os.getenv("DRAIN_RETRY_AFTER_SEC", "10"))
+
+_current_ticket: ContextVar = ContextVar("admission_ticket", default=None)
+
+ADMISSION_REJECTIONS = metrics.Counter(
+    "felix_admission_rejections_total", "Submissions rejected with 429", ("model",)
+)
+
+
+class Ticket:
+    """Admission for one job: a pending slot for each model the job will use."""
+
+    def __init__(self, controller, keys):
+        self._controller = controller
+        self._pending = list(keys)
+        # The worker thread takes slots while a cancel may close the ticket
+        self._lock = threading.Lock()
+
+    def take(self, key) -> bool:
+        with self._lock:
+            if key in self._pending:
+                self._pending.remove(key)
+                return True
+            return False
+
+    def close(self):
+        """Give back slots for stages that never ran (e.g. the job failed early)."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for key in pending:
+            self._controller._finish(key, None)
+
+    @contextmanager
+    def bound(self):
+        """Make this ticket current for the job running in this context; close it afterwards."""
+        token = _current_ticket.set(self)
+        try:
+            yield self
+        finally:
+            _current_ticket.reset(token)
+            self.close()
+
+
+class AdmissionController:
+
+    def __init__(
+        self,
+        max_queue_depth: int,
+        default_limit: int,
+        model_limits: dict,
+        latency_target_sec: float,
+        latency_targets: dict,
+        default_service_sec: float,
+        depth_fn=None,
+        workers: int = 1,
+        service_time_fn=None,
+    ):
+        self.max_queue_depth = max_queue_depth
+        self.default_limit = default_limit
+        self.model_limits = model_limits
+        self.latency_target_sec = latency_target_sec
+        self.latency_targets = latency_targets
+        self.default_service_sec = default_service_sec
+        self._depth_fn = depth_fn
+        self._service_time_fn = service_time_fn
+        self._workers = workers
+        self.draining = False
+
+        self._cond = threading.Condition()
+        self._outstanding = defaultdict(int)  # admitted and not finished, per model
+        self._running = defaultdict(int)
+        self._service_sec = {}
+
+    @classmethod
+    def from_env(cls):
+        depth_fn = service_time_fn = None
+        queue_db = os.getenv("JOB_QUEUE_DB", "")
+        if queue_db:
+            from app.backend.api.job_queue import SqliteJobQueue
+            queue = SqliteJobQueue(queue_db)
+            depth_fn, service_time_fn = queue.depth, queue.service_time
+        return cls(
+            max_queue_depth=int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+            default_limit=int(os.getenv("ADMISSION_DEFAULT_LIMIT", "4")),
+            model_limits=parse_env_map(os.getenv("ADMISSION_MODEL_LIMITS", "")),
+            latency_target_sec=float(os.getenv("ADMISSION_LATENCY_TARGET_SEC", "300")),
+            latency_targets=parse_env_map(os.getenv("ADMISSION_LATENCY_TARGETS", "")),
+            default_service_sec=float(os.getenv("ADMISSION_DEFAULT_SERVICE_SEC", "60")),
+            depth_fn=depth_fn,
+            workers=int(os.getenv("JOB_WORKER_PROCESSES", "2")) * int(os.getenv("JOB_WORKER_THREADS", "1")),
+            service_time_fn=service_time_fn,
+        )
+
+    def limit(self, key: str) -> int:
+        return max(1, int(self.model_limits.get(key, self.default_limit)))
+
+    def service_time(self, key: str) -> float:
+        return self._service_sec.get(key, self.default_service_sec)
+
+    def throughput(self, key: str) -> float:
+        """Completions per second the model sustains at its concurrency limit."""
+        return self.limit(key) / max(self.service_time(key), 1e-3)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                key: {
+                    "outstanding": self._outstanding[key],
+                    "running": self._running[key],
+                    "limit": self.limit(key),
+                    "service_time_sec": round(self.service_time(key), 2),
+                }
+                for key in set(self._outstanding) | set(self._service_sec)
+            }
+
+    def try_admit(self, keys) -> tuple:
+        """
+        Admit a job that will use the models in `keys`.
+
+        Returns (ticket, 0) on success, or (None, retry_after_sec) when saturated.
+        In worker-process mode the ticket is None on success as well.
+        """
+        if self.draining:
+            for key in keys:
+                ADMISSION_REJECTIONS.inc(model=key)
+            return None, DRAIN_RETRY_AFTER_SEC
+
+        if self._depth_fn is not None:
+            depth = self._depth_fn()
+            if depth >= self.max_queue_depth:
+                for key in keys:
+                    ADMISSION_REJECTIONS.inc(model=key)
+                service_sec = (self._service_time_fn and self._service_time_fn()) or self.default_service_sec
+                per_sec = self._workers / max(service_sec, 1e-3)
+                return None, max(1, math.ceil((depth - self.max_queue_depth + 1) / per_sec))
+            return None, 0
+
+        with self._cond:
+            retry_after = 0
+            total = sum(self._outstanding.values())
+            if total >= self.max_queue_depth:
+                per_sec = sum(self.throughput(k) for k in self._outstanding if self._outstanding[k]) or self.throughput(keys[0])
+                retry_after = math.ceil((total - self.max_queue_depth + 1) / per_sec)
+
+            for key in keys:
+                waiting = max(0, self._outstanding[key] - self.limit(key))
+                target = self.latency_targets.get(key, self.latency_target_sec)
+                allowed_waiting = math.floor(max(0.0, target - self.service_time(key)) * self.throughput(key))
+                if waiting >= allowed_waiting:
+                    retry_after = max(retry_after, math.ceil((waiting - allowed_waiting + 1) / self.throughput(key)))
+
+            if retry_after:
+                for key in keys:
+                    ADMISSION_REJECTIONS.inc(model=key)
+                return None, max(1, retry_after)
+
+            for key in keys:
+                self._outstanding[key] += 1
+            return Ticket(self, keys), 0
+
+    def drain(self):
+        """Stop admitting jobs (before shutdown); already admitted ones still run."""
+        self.draining = True
+
+    def _start(self, key: str):
+        with self._cond:
+            self._cond.wait_for(lambda: self._running[key] < self.limit(key))
+            self._running[key] += 1
+
+    def _finish(self, key: str, duration: float | None):
+        with self._cond:
+            self._outstanding[key] = max(0, self._outstanding[key] - 1)
+            if duration is not None:
+                self._running[key] -= 1
+                previous = self._service_sec.get(key)
+                self._service_sec[key] = duration if previous is None else (
+                    EWMA_ALPHA * duration + (1 - EWMA_ALPHA) * previous
+                )
+            self._cond.notify_all()
+
+
+ADMISSION = AdmissionController.from_env()
+
+
+def _admission_samples():
+    samples = {}
+    for model, entry in ADMISSION.snapshot().items():
+        samples[(model, "running")] = entry["running"]
+        samples[(model, "waiting")] = max(0, entry["outstanding"] - entry["running"])
+    return samples
+
+
+metrics.CallbackGauge(
+    "felix_admission_jobs",
+    "Admitted generations per model slot key, running or waiting for a slot",
+    ("model", "state"),
+    _admission_samples,
+)
+
+
+@contextmanager
+def admission_slot(key: str):
+    """
+    Hold a concurrency slot on model `key` for the current job's generation.
+
+    Blocks until the model is under its limit. A no-op for jobs that were not
+    admitted through a ticket (worker processes, scripts).
+    """
+    ticket = _current_ticket.get()
+    if ticket is None or not ticket.take(key):
+        yield
+        return
+
+    ADMISSION._start(key)
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        ADMISSION._finish(key, time.time() - start_time)
+
+
+@asynccontextmanager
+async def admission_slot_async(key: str):
+    """`admission_slot` for asyncio tasks; waits for the slot off the event loop."""
+    ticket = _current_ticket.get()
+    if ticket is None or not ticket.take(key):
+        yield
+        return
+
+    await asyncio.to_thread(ADMISSION._start, key)
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        ADMISSION._finish(key, time.time() - start_time)
+
+
+def unknown_video_model(data: dict) -> str | None:
+    """Error message if `data` names a video model with no service, else None."""
+    from src.services.pipelines.video_pipeline import VIDEO_SERVICES
+
+    model = data.get('model', 'grok')
+    if not isinstance(model, str) or model not in VIDEO_SERVICES:
+        return f"Unknown video model: {model}"
+    return None
+
+
+def too_busy(retry_after: int):
+    """429 response telling the client when to retry."""
+    response = jsonify({"error": "Server is at capacity, retry later", "retry_after_sec": retry_after})
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 429
@@ -0,0 +1,227 @@
+"""Batch submission and bulk job status.
+
+POST /api/batch creates many jobs in one call; GET /api/batch/<batch_id> and
+GET /api/jobs/status?ids=... report many jobs in one compact response. Status
+responses carry an ETag built from job versions, so pollers that send
+If-None-Match get a bodyless 304 until something actually changes.
+GET /api/jobs/<job_id>/timeline shows where a job's time went.
+"""
+
+import hashlib
+import os
+import uuid
+
+from flask import Blueprint, Response, request, jsonify
+
+from app.backend.api import generate, generate_video, video
+from app.backend.api.admission import ADMISSION, unknown_video_model
+from app.backend.api.idempotency import IDEMPOTENCY, IdempotencyConflict, find_or_register
+from app.backend.api.jobs import dispatch_job, make_job_store
+from app.backend.api.scheduler import request_scheduling
+from src.core import tracing
+from src.core.log import get_logger
+
+batch_bp = Blueprint('batch', __name__)
+log = get_logger("batch")
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
+
+BATCH_STORE = make_job_store("batch")
+
+# kind -> (job store, required field, models the job uses)
+KINDS = {
+    "image": (generate.JOB_STORE, "person_image", lambda item: ["image"]),
+    "video": (video.VIDEO_JOB_STORE, "image_file", lambda item: [item.get('model', 'grok')]),
+    "image_video": (
+        generate_video.PIPELINE_JOB_STORE,
+        "person_image",
+        lambda item: ["image", item.get('model', 'grok')],
+    ),
+}
+
+
+@batch_bp.route('/api/batch', methods=['POST'])
+def submit_batch():
+    """
+    POST /api/batch
+    Body: {
+        "kind": "image",                 # default for items: image | video | image_video
+        "priority": "batch",             # default batch
+        "defaults": {"person_image": "<base64>", "background": "Studio"},
+        "items": [
+            {"outfit_top": "Blue T-Shirt", "outfit_bottom": "Black Jeans"},
+            {"kind": "image_video", "outfit_top": "Formal Dress", "outfit_bottom": "", "model": "grok"}
+        ]
+    }
+
+    `defaults` are merged into every item, so a shared person image is sent
+    once. Each item is admitted on its own: the 202 response lists a job id
+    per accepted item and an error (with retry_after_sec when at capacity)
+    per rejected one. An Idempotency-Key header makes resubmitting the same
+    batch return the same jobs.
+    """
+    try:
+        body = request.json or {}
+        items = body.get('items')
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "items must be a non-empty list"}), 400
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"At most {MAX_BATCH_SIZE} items per batch"}), 400
+
+        try:
+            priority, tenant = request_scheduling(request, {"priority": body.get('priority', 'batch')})
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        defaults = body.get('defaults') or {}
+        batch_key = request.headers.get('Idempotency-Key')
+        results = []
+        for index, item in enumerate(items):
+            data = {**defaults, **item, "priority": priority}
+            item_key = f"{batch_key}:{index}" if batch_key else None
+            results.append(_submit_item(index, data, body.get('kind', 'image'), item_key, priority, tenant))
+
+        batch_id = str(uuid.uuid4())
+        BATCH_STORE.create(
+            batch_id,
+            jobs=[[r["kind"], r["job_id"]] for r in results if "job_id" in r],
+        )
+        accepted = sum(1 for r in results if "job_id" in r)
+        log.info("batch.submitted", batch_id=batch_id, accepted=accepted, items=len(items))
+
+        return jsonify({"batch_id": batch_id, "accepted": accepted, "jobs": results}), 202
+
+    except Exception:
+        log.exception("request.failed")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _submit_item(index, data, default_kind, item_key, priority, tenant):
+    """Create and dispatch one batch item; returns its entry for the batch response."""
+    kind = data.pop('kind', default_kind)
+    if kind not in KINDS:
+        return {"index": index, "error": f"Unknown kind: {kind}"}
+
+    store, required, models = KINDS[kind]
+    if not data.get(required):
+        return {"index": index, "kind": kind, "error": f"{required} required"}
+    model_error = unknown_video_model(data) if kind != "image" else None
+    if model_error:
+        return {"index": index, "kind": kind, "error": model_error}
+
+    job_id = str(uuid.uuid4())
+    try:
+        headers = {"Idempotency-Key": item_key} if item_key else {}
+        existing_id = find_or_register(kind, store, headers, data, job_id)
+    except IdempotencyConflict as e:
+        return {"index": index, "kind": kind, "error": str(e)}
+    if existing_id:
+        job = store.get(existing_id) or {"status": "queued"}
+        return {"index": index, "kind": kind, "job_id": existing_id, "status": job['status'], "reused": True}
+
+    ticket, retry_after = ADMISSION.try_admit(models(data))
+    if retry_after:
+        IDEMPOTENCY.discard(kind, job_id)
+        return {"index": index, "kind": kind, "error": "Server is at capacity", "retry_after_sec": retry_after}
+
+    store.create(job_id, data=data, priority=priority)
+    if dispatch_job(kind, job_id, data, ticket, priority=priority, tenant=tenant):
+        return {"index": index, "kind": kind, "job_id": job_id, **_compact(store.get(job_id))}
+    return {"index": index, "kind": kind, "job_id": job_id, "status": "queued"}
+
+
+def _compact(job):
+    """Minimal per-job status for bulk responses."""
+    entry = {"status": job['status']}
+    url = job.get('video_file') or job.get('image_file')
+    if url:
+        entry["url"] = url
+    if job.get('error'):
+        entry["error"] = job['error']
+    if job.get('stage') and job['status'] not in ("completed", "failed", "cancelled"):
+        entry["stage"] = job['stage']
+    return entry
+
+
+def _bulk_status(job_ids):
+    """Look jobs up across all kinds; returns ({job_id: job}, missing ids)."""
+    found = {}
+    remaining = list(dict.fromkeys(job_ids))
+    for store, _, _ in KINDS.values():
+        if not remaining:
+            break
+        found.update(store.get_many(remaining))
+        remaining = [job_id for job_id in remaining if job_id not in found]
+    return found, remaining
+
+
+def _status_response(job_ids):
+    """Compact status of `job_ids` with an ETag over their versions; 304 if unchanged."""
+    jobs, missing = _bulk_status(job_ids)
+
+    digest = hashlib.sha1()
+    for job_id in sorted(jobs):
+        digest.update(f"{job_id}:{jobs[job_id]['version']};".encode())
+    digest.update(",".join(sorted(missing)).encode())
+    # If-None-Match is parsed into unquoted tags (weak comparison, RFC 9110)
+    etag = f'"{digest.hexdigest()}"'
+
+    if request.if_none_match.contains_weak(digest.hexdigest()):
+        return "", 304, {"ETag": etag, "Cache-Control": "no-cache"}
+
+    counts = {}
+    for job in jobs.values():
+        counts[job['status']] = counts.get(job['status'], 0) + 1
+
+    response = jsonify({
+        "counts": counts,
+        "jobs": {job_id: _compact(job) for job_id, job in jobs.items()},
+        "missing": missing,
+    })
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@batch_bp.route('/api/batch/<batch_id>', methods=['GET'])
+def get_batch_status(batch_id):
+    """GET /api/batch/<batch_id> - compact status of every job in a batch"""
+    batch = BATCH_STORE.get(batch_id)
+    if batch is None:
+        return jsonify({"error": "Batch not found"}), 404
+
+    return _status_response([job_id for _, job_id in batch['jobs']])
+
+
+@batch_bp.route('/api/jobs/status', methods=['GET'])
+def get_jobs_status():
+    """GET /api/jobs/status?ids=<id>,<id>,... - compact status of many jobs of any kind"""
+    job_ids = [job_id for job_id in request.args.get('ids', '').split(',') if job_id]
+    if not job_ids:
+        return jsonify({"error": "ids required"}), 400
+    if len(job_ids) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} ids per request"}), 400
+
+    return _status_response(job_ids)
+
+
+@batch_bp.route('/api/jobs/<job_id>/timeline', methods=['GET'])
+def get_job_timeline(job_id):
+    """
+    GET /api/jobs/<job_id>/timeline[?format=text]
+
+    The spans of the job's trace (HTTP request, queue, pipeline, prompt
+    build, FAL queue/inference, downloads) with offsets and durations;
+    `format=text` renders them as a plain-text waterfall.
+    """
+    jobs, _ = _bulk_status([job_id])
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if not job.get('trace_id'):
+        return jsonify({"error": "Job was not traced"}), 404
+
+    view = tracing.timeline(job['trace_id'])
+    if request.args.get('format') == 'text':
+        return Response(tracing.format_timeline(view), mimetype="text/plain")
+    return jsonify({"job_id": job_id, "status": job['status'], **view})
@@ -0,0 +1,348 @@
+"""
+SQLite outfit catalog with full-text search.
+
+Garments and backgrounds live in one `outfits` table (sku, name, kind,
+category, color, gender, tags, image_url, description) with an FTS5 index
+over the text columns. Listing uses keyset paging on (name, sku), so a page
+costs the same at row 100,000 as at row 0. Every write bumps a catalog
+version that the API turns into ETags.
+
+The database (OUTFIT_CATALOG_DB) is created and seeded with the built-in
+garments on first use; `scripts/import_outfit_catalog.py` loads real SKU
+catalogs. FAL storage mirrors of garment images (scripts/sync_outfit_catalog.py)
+are kept on the same rows.
+"""
+
+import base64
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+from src.core.log import get_logger
+
+log = get_logger("catalog")
+
+OUTFIT_CATALOG_DB = os.getenv("OUTFIT_CATALOG_DB", "outputs/outfit_catalog.db")
+
+OUTFIT_MIRROR_MAX_AGE_DAYS = float(os.getenv("OUTFIT_MIRROR_MAX_AGE_DAYS", "30"))
+
+MAX_PAGE_SIZE = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outfits (
+    sku TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'garment',
+    category TEXT,
+    color TEXT,
+    gender TEXT NOT NULL DEFAULT 'unisex',
+    tags TEXT NOT NULL DEFAULT '',
+    image_url TEXT,
+    description TEXT,
+    mirror_url TEXT,
+    mirror_sha256 TEXT,
+    mirrored_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outfits_name ON outfits (name, sku);
+CREATE INDEX IF NOT EXISTS outfits_kind ON outfits (kind, name, sku);
+CREATE INDEX IF NOT EXISTS outfits_category ON outfits (category, name, sku);
+CREATE INDEX IF NOT EXISTS outfits_gender ON outfits (gender, name, sku);
+CREATE INDEX IF NOT EXISTS outfits_color ON outfits (color, name, sku);
+CREATE VIRTUAL TABLE IF NOT EXISTS outfits_fts USING fts5(
+    name, category, color, tags, description, content='outfits', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS outfits_ai AFTER INSERT ON outfits BEGIN
+    INSERT INTO outfits_fts (rowid, name, category, color, tags, description)
+    VALUES (new.rowid, new.name, new.category, new.color, new.tags, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS outfits_ad AFTER DELETE ON outfits BEGIN
+    INSERT INTO outfits_fts (outfits_fts, rowid, name, category, color, tags, description)
+    VALUES ('delete', old.rowid, old.name, old.category, old.color, old.tags, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS outfits_au AFTER UPDATE OF name, category, color, tags, description ON outfits BEGIN
+    INSERT INTO outfits_fts (outfits_fts, rowid, name, category, color, tags, description)
+    VALUES ('delete', old.rowid, old.name, old.category, old.color, old.tags, old.description);
+    INSERT INTO outfits_fts (rowid, name, category, color, tags, description)
+    VALUES (new.rowid, new.name, new.category, new.color, new.tags, new.description);
+END;
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('version', 0);
+"""
+
+# Built-in catalog: (sku, name, category, color, gender, tags, image_url)
+SEED_GARMENTS = (
+    ("top-blue-tshirt", "Blue T-Shirt", "top", "blue", "male", "casual tshirt cotton", "https://i.postimg.cc/Xqs7H0wD/blue_tshirt.png"),
+    ("top-white-polo", "White Polo", "top", "white", "male", "casual polo", "https://i.postimg.cc/wx2vTDSp/white_polo.png"),
+    ("top-black-hoodie", "Black Hoodie", "top", "black", "male", "casual hoodie streetwear", "https://i.postimg.cc/59g0N8ZW/black_hoodie.png"),
+    ("top-formal-shirt", "Formal Shirt", "top", "white", "male", "formal business shirt", "https://i.postimg.cc/Wz5bWPM7/formal_shirt.png"),
+    ("top-black-crop-top", "Black Crop Top", "top", "black", "female", "casual crop", "https://i.postimg.cc/G21bRt2d/black_crop_top.png"),
+    ("top-white-tank", "White Tank", "top", "white", "female", "casual tank summer", "https://i.postimg.cc/JnWR80n7/white_tank.png"),
+    ("top-pink-blouse", "Pink Blouse", "top", "pink", "female", "blouse office", "https://i.postimg.cc/B6GJ3b6b/pink_blouse.png"),
+    ("dress-formal", "Formal Dress", "dress", "black", "female", "formal dress evening", "https://i.postimg.cc/V6czwvNh/formal_dress.png"),
+    ("bottom-khaki-shorts", "Khaki Shorts", "bottom", "khaki", "male", "casual shorts summer", "https://i.postimg.cc/hjHHKZKB/khaki_shorts.png"),
+    ("bottom-black-jeans", "Black Jeans", "bottom", "black", "male", "casual jeans denim", "https://i.postimg.cc/wvSS949K/black_jeans.png"),
+    ("bottom-navy-chinos", "Navy Chinos", "bottom", "navy", "male", "chinos smart casual", "https://i.postimg.cc/4drrX2XT/navy_chinos.png"),
+    ("bottom-running-shorts", "Running Shorts", "bottom", "black", "male", "sport running shorts", "https://i.postimg.cc/bJG7cfcx/running_shorts.png"),
+    ("bottom-denim-shorts", "Denim Shorts", "bottom", "blue", "female", "casual denim shorts summer", "https://i.postimg.cc/LXMmS5sc/denim_shorts.png"),
+    ("bottom-black-skirt", "Black Skirt", "bottom", "black", "female", "skirt office", "https://i.postimg.cc/9Mjc20fS/black_skirt.png"),
+    ("bottom-casual-leggings", "Casual Leggings", "bottom", "black", "female", "casual leggings sport", "https://i.postimg.cc/V6czwvNH/casual_leggings.png"),
+    ("dress-summer", "Summer Dress", "dress", "white", "female", "dress summer casual", "https://i.postimg.cc/0NS9hD9J/summer_dress.png"),
+)
+
+# Backgrounds are descriptions, not images: (sku, name, description)
+SEED_BACKGROUNDS = (
+    ("bg-urban-cafe", "Urban Cafe", "Urban cafe outdoor with modern city background."),
+    ("bg-office", "Office", "Modern office interior with office chairs nearby"),
+    ("bg-gym", "Gym", "Gym or outdoor fitness setting"),
+    ("bg-studio", "Studio", "Clean professional studio with neutral background"),
+)
+
+_COLUMNS = (
+    "sku", "name", "kind", "category", "color", "gender", "tags", "image_url", "description",
+    "mirror_url", "mirror_sha256", "mirrored_at",
+)
+_WRITABLE = ("name", "kind", "category", "color", "gender", "tags", "image_url", "description")
+
+
+def _fts_query(text: str) -> str:
+    """Prefix match on every word of free text, e.g. 'blue sh' -> '"blue"* "sh"*'."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text.lower()))
+
+
+def encode_cursor(name: str, sku: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([name, sku]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(name, sku) after which the next page starts; raises ValueError if malformed."""
+    try:
+        name, sku = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("invalid cursor") from None
+    return str(name), str(sku)
+
+
+def _lower(value):
+    return value.strip().lower() if value else None
+
+
+def _row(row) -> dict:
+    item = dict(zip(_COLUMNS, row))
+    item["tags"] = item["tags"].split() if item["tags"] else []
+    return item
+
+
+def mirror_fresh(item: dict) -> bool:
+    """True if the item's FAL storage copy exists and is younger than OUTFIT_MIRROR_MAX_AGE_DAYS."""
+    return bool(
+        item.get("mirror_url")
+        and time.time() - (item.get("mirrored_at") or 0) < OUTFIT_MIRROR_MAX_AGE_DAYS * 86400
+    )
+
+
+def resolved_image(item: dict) -> str | None:
+    """URL the pipeline should use for a catalog item, or its description."""
+    if mirror_fresh(item):
+        return item["mirror_url"]
+    return item.get("image_url") or item.get("description")
+
+
+class OutfitCatalog:
+    """Outfit catalog on one SQLite file, one connection per thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self.connect()
+        conn.executescript(_SCHEMA)
+        if conn.execute("SELECT 1 FROM outfits LIMIT 1").fetchone() is None:
+            self._seed()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _seed(self):
+        rows = [
+            {"sku": sku, "name": name, "kind": "garment", "category": category, "color": color,
+             "gender": gender, "tags": tags, "image_url": url}
+            for sku, name, category, color, gender, tags, url in SEED_GARMENTS
+        ] + [
+            {"sku": sku, "name": name, "kind": "background", "category": "background", "description": description}
+            for sku, name, description in SEED_BACKGROUNDS
+        ]
+        self.upsert_many(rows)
+        log.info("catalog.seeded", path=self.path, items=len(rows))
+
+    def version(self) -> int:
+        return self.connect().execute("SELECT value FROM catalog_meta WHERE key = 'version'").fetchone()[0]
+
+    def upsert_many(self, items, chunk_size: int = 5000) -> int:
+        """Insert or update catalog items (dicts keyed by column) in one transaction per chunk."""
+        conn = self.connect()
+        placeholders = ", ".join("?" * (len(_WRITABLE) + 2))
+        updates = ", ".join(f"{col} = excluded.{col}" for col in _WRITABLE)
+        sql = (
+            f"INSERT INTO outfits (sku, {', '.join(_WRITABLE)}, updated_at) VALUES ({placeholders}) "
+            f"ON CONFLICT (sku) DO UPDATE SET {updates}, updated_at = excluded.updated_at"
+        )
+
+        def values(item):
+            tags = item.get("tags") or ""
+            if not isinstance(tags, str):
+                tags = " ".join(tags)
+            return (
+                item["sku"], item["name"], _lower(item.get("kind")) or "garment", _lower(item.get("category")),
+                _lower(item.get("color")), _lower(item.get("gender")) or "unisex", tags.lower(),
+                item.get("image_url") or None, item.get("description") or None, time.time(),
+            )
+
+        count = 0
+        chunk = []
+        for item in items:
+            chunk.append(values(item))
+            if len(chunk) >= chunk_size:
+                count += self._write(conn, sql, chunk)
+                chunk = []
+        if chunk:
+            count += self._write(conn, sql, chunk)
+        return count
+
+    def _write(self, conn, sql: str, rows: list) -> int:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(sql, rows)
+            conn.execute("UPDATE catalog_meta SET value = value + 1 WHERE key = 'version'")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def set_mirror(self, sku: str, url: str, sha256: str, mirrored_at: float):
+        """Record the FAL storage copy of a garment image."""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE outfits SET mirror_url = ?, mirror_sha256 = ?, mirrored_at = ? WHERE sku = ?",
+                (url, sha256, mirrored_at, sku),
+            )
+            conn.execute("UPDATE catalog_meta SET value = value + 1 WHERE key = 'version'")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, key: str) -> dict | None:
+        """Item by SKU, or by exact name."""
+        conn = self.connect()
+        row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM outfits WHERE sku = ?", (key,)).fetchone()
+        if row is None:
+            row = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM outfits WHERE name = ? ORDER BY sku LIMIT 1", (key,)
+            ).fetchone()
+        return _row(row) if row else None
+
+    def garments(self, skus=None):
+        """Yield every garment with an image (or just `skus`), in SKU order."""
+        conn = self.connect()
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM outfits WHERE kind = 'garment' AND image_url IS NOT NULL"
+        params = ()
+        if skus:
+            sql += f" AND sku IN ({', '.join('?' * len(skus))})"
+            params = tuple(skus)
+        for row in conn.execute(sql + " ORDER BY sku", params):
+            yield _row(row)
+
+    def query(
+        self,
+        q: str | None = None,
+        kind: str | None = None,
+        category: str | None = None,
+        color: str | None = None,
+        gender: str | None = None,
+        tag: str | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> tuple:
+        """
+        One page of items ordered by (name, sku) and the cursor of the next page.
+
+        `q` is matched as word prefixes across name, category, color, tags and
+        description; `gender` also matches unisex items. Raises ValueError for
+        a malformed cursor.
+        """
+        where, params = [], []
+        match = _fts_query(q or "")
+        if tag:
+            tag = re.sub(r"[^\w-]", "", tag.lower())
+            match = f'{match} tags:"{tag}"'.strip()
+        if match:
+            where.append("rowid IN (SELECT rowid FROM outfits_fts WHERE outfits_fts MATCH ?)")
+            params.append(match)
+        for column, value in (("kind", kind), ("category", category), ("color", color)):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value.lower())
+        if gender:
+            where.append("gender IN (?, 'unisex')")
+            params.append(gender.lower())
+        if cursor:
+            where.append("(name, sku) > (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM outfits"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY name, sku LIMIT ?"
+        rows = self.connect().execute(sql, (*params, limit + 1)).fetchall()
+
+        items = [_row(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(items[-1]["name"], items[-1]["sku"]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def facets(self) -> dict:
+        """Distinct categories, colors and genders with item counts."""
+        conn = self.connect()
+        return {
+            column: dict(conn.execute(
+                f"SELECT {column}, COUNT(*) FROM outfits WHERE {column} IS NOT NULL GROUP BY {column} ORDER BY {column}"
+            ).fetchall())
+            for column in ("kind", "category", "color", "gender")
+        }
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> OutfitCatalog:
+    """The process-wide catalog, opened (and seeded if new) on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                try:
+                    os.makedirs(os.path.dirname(OUTFIT_CATALOG_DB) or ".", exist_ok=True)
+                    _catalog = OutfitCatalog(OUTFIT_CATALOG_DB)
+                except (OSError, sqlite3.OperationalError) as e:
+                    # Read-only deploys (e.g. serverless) without a prebuilt catalog
+                    fallback = os.path.join(tempfile.gettempdir(), "outfit_catalog.db")
+                    log.warning("catalog.readonly", path=OUTFIT_CATALOG_DB, fallback=fallback, error=e)
+                    _catalog = OutfitCatalog(fallback)
+    return _catalog
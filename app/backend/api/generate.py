@@ -1,18 +1,25 @@
 from flask import Blueprint, request, jsonify
-import json
 import os
 import sys
+import time
 import uuid
-from datetime import datetime
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../'))
 
 from app.backend.api.outfits import get_outfit_image
+from app.backend.api.admission import admission_slot, too_busy, ADMISSION
+from app.backend.api.scheduler import request_scheduling
+from app.backend.api.idempotency import IDEMPOTENCY, IdempotencyConflict, find_or_register
+from app.backend.api.jobs import ACTIVE_STATUSES, make_job_store, register_runner, dispatch_job, cancel_job, fal_progress_listener, stream_job_events
+from app.backend.api.webhooks import register_completion, webhook_enabled, webhook_url
+from src.core import tracing
+from src.core.log import get_logger
 
 generate_bp = Blueprint('generate', __name__)
+log = get_logger("generate")
 
-JOB_STORE = {}
+JOB_STORE = make_job_store("image")
 
 @generate_bp.route('/api/generate', methods=['POST'])
 def generate_image():
@@ -25,136 +32,238 @@ def generate_image():
         "background": "Urban Cafe",
         "environment": "professional lighting, studio"
     }
+
+    Returns 202 immediately; progress is available from /api/status/<job_id>
+    and as a Server-Sent Events stream from /api/status/<job_id>/events.
+    With JOB_RUN_INLINE (serverless) the job runs in the request and the
+    finished job is returned with 200.
     """
     try:
         data = request.json
         job_id = str(uuid.uuid4())
-        
+
         if not data.get('person_image'):
             return jsonify({"error": "person_image required"}), 400
-        
-        # Import pipeline
-        from src.services.pipelines.image_pipeline import ImagePipeline
-        from src.schemas.person import PersonAttributes
-        from src.schemas.environment import EnvironmentAttributes
-        
+
+        try:
+            priority, tenant = request_scheduling(request, data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         try:
-            pipeline = ImagePipeline()
-            gender = data.get('gender', 'male')
-            
-            # Get outfit pieces
-            outfit_top_name = data.get('outfit_top', 'casual')
-            outfit_bottom_name = data.get('outfit_bottom', 'casual')
-            
-            # Handle full dresses - if one is empty, use only the other
-            if not outfit_top_name or outfit_top_name == '':
-                apparel_type = outfit_bottom_name
-                outfit_top_image = get_outfit_image(outfit_bottom_name)
-                outfit_bottom_image = ''
-            elif not outfit_bottom_name or outfit_bottom_name == '':
-                apparel_type = outfit_top_name
-                outfit_top_image = get_outfit_image(outfit_top_name)
-                outfit_bottom_image = ''
-            else:
-                apparel_type = f"{outfit_top_name} with {outfit_bottom_name}"
-                outfit_top_image = get_outfit_image(outfit_top_name)
-                outfit_bottom_image = get_outfit_image(outfit_bottom_name)
-            
-            print(f"[GENERATE] Top: {outfit_top_name} -> {outfit_top_image}")
-            print(f"[GENERATE] Bottom: {outfit_bottom_name} -> {outfit_bottom_image}")
-            print(f"[GENERATE] Apparel Type: {apparel_type}")
-            
-            JOB_STORE[job_id] = {
-                "status": "processing",
-                "created_at": datetime.now().isoformat(),
-                "data": data
-            }
-            
-            try:
+            existing_id = find_or_register("image", JOB_STORE, request.headers, data, job_id)
+        except IdempotencyConflict as e:
+            return jsonify({"error": str(e)}), 422
+        if existing_id:
+            log.info("job.reused", job_id=existing_id)
+            job = JOB_STORE.get(existing_id) or {"status": "queued"}
+            return jsonify({**_status_payload(existing_id, job), "reused": True}), 200
+
+        ticket, retry_after = ADMISSION.try_admit(["image"])
+        if retry_after:
+            log.warning("job.rejected", retry_after_sec=retry_after)
+            IDEMPOTENCY.discard("image", job_id)
+            return too_busy(retry_after)
+
+        JOB_STORE.create(job_id, data=data, priority=priority)
+        if dispatch_job("image", job_id, data, ticket, priority=priority, tenant=tenant):
+            # Ran inline (JOB_RUN_INLINE): answer with the finished job
+            return jsonify(_status_payload(job_id, JOB_STORE.get(job_id))), 200
+
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+    except Exception:
+        log.exception("request.failed")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _image_inputs(data):
+    """Resolve request fields into (gender, apparel_type, EnvironmentAttributes, outfit_refs)."""
+    from src.schemas.environment import EnvironmentAttributes
+
+    gender = data.get('gender', 'male')
+
+    # Get outfit pieces
+    outfit_top_name = data.get('outfit_top', 'casual')
+    outfit_bottom_name = data.get('outfit_bottom', 'casual')
+
+    # Handle full dresses - if one is empty, use only the other
+    if not outfit_top_name or outfit_top_name == '':
+        apparel_type = outfit_bottom_name
+        outfit_top_image = get_outfit_image(outfit_bottom_name)
+        outfit_bottom_image = ''
+    elif not outfit_bottom_name or outfit_bottom_name == '':
+        apparel_type = outfit_top_name
+        outfit_top_image = get_outfit_image(outfit_top_name)
+        outfit_bottom_image = ''
+    else:
+        apparel_type = f"{outfit_top_name} with {outfit_bottom_name}"
+        outfit_top_image = get_outfit_image(outfit_top_name)
+        outfit_bottom_image = get_outfit_image(outfit_bottom_name)
+
+    log.info(
+        "outfit.resolved",
+        top=outfit_top_name, top_image=outfit_top_image,
+        bottom=outfit_bottom_name, bottom_image=outfit_bottom_image,
+    )
+
+    # Build reference images list - only include non-empty ones
+    outfit_refs = []
+    if outfit_top_image:
+        outfit_refs.append(outfit_top_image)
+    if outfit_bottom_image:
+        outfit_refs.append(outfit_bottom_image)
+
+    env = EnvironmentAttributes(
+        apparel_type=apparel_type,
+        inferred_setting=data.get('background', 'studio'),
+        visual_cues=data.get('environment', 'professional lighting')
+    )
+    return gender, apparel_type, env, outfit_refs
+
+
+def _generate_image(data):
+    """Run ImagePipeline for request `data` and return its result; raises on failure."""
+    from src.services.pipelines.image_pipeline import ImagePipeline
+    from src.schemas.person import PersonAttributes
+
+    gender, apparel_type, env, outfit_refs = _image_inputs(data)
+    pipeline = ImagePipeline()
+
+    with admission_slot("image"):
+        result = pipeline.run(
+            person=PersonAttributes(
+                height_cm=175,
+                weight_kg=85,
+                gender=gender,
+                age=26
+            ),
+            env=env,
+            description=f"Full body portrait of a {gender} wearing {apparel_type}",
+            person_reference_image=data['person_image'],
+            outfit_reference_images=outfit_refs,
+            no_download=data.get('no_download', False),
+        )
+
+    if result.get('error'):
+        raise RuntimeError(result['error'])
+
+    return result
+
+
+def _run_generate_job(job_id, data):
+    """Run the image pipeline for a job and record the outcome in JOB_STORE."""
+    from src.clients.fal_client import queue_listener
+    from src.core.cancellation import JobCancelled, raise_if_cancelled
+    from src.services.pipelines.image_pipeline import ImagePipeline
+
+    # A job cancelled while queued stays cancelled
+    if JOB_STORE.update(job_id, if_status=ACTIVE_STATUSES, status="processing") is None:
+        return
+
+    try:
+        with queue_listener(fal_progress_listener(JOB_STORE, job_id)):
+            if webhook_enabled():
+                # Hand the wait to FAL; /api/fal/webhook completes the job
+                _, _, env, outfit_refs = _image_inputs(data)
                 pipeline = ImagePipeline()
-                
-                # Build reference images list - only include non-empty ones
-                outfit_refs = []
-                if outfit_top_image:
-                    outfit_refs.append(outfit_top_image)
-                if outfit_bottom_image:
-                    outfit_refs.append(outfit_bottom_image)
-                
-                result = pipeline.run(
-                    person=PersonAttributes(
-                        height_cm=175, 
-                        weight_kg=85, 
-                        gender=gender,
-                        age=26
-                    ),
-                    env=EnvironmentAttributes(
-                        apparel_type=apparel_type,
-                        inferred_setting=data.get('background', 'studio'),
-                        visual_cues=data.get('environment', 'professional lighting')
-                    ),
-                    description=f"Full body portrait of a {gender} wearing {apparel_type}",
-                    person_reference_image=data['person_image'],
-                    outfit_reference_images=outfit_refs,
-                    no_download=data.get('no_download', False),
-                )
-                
-                print(f"[GENERATE] Full result keys: {result.keys()}")
-                
-                # Extract image URL directly from FAL response
-                image_url = None
-                
-                if result.get('raw_response', {}).get('images', []):
-                    image_url = result['raw_response']['images'][0].get('url')
-                    print(f"[GENERATE] Extracted FAL URL: {image_url}")
-                
-                if not image_url:
-                    print(f"[GENERATE] ERROR: Could not extract image URL")
-                    print(f"[GENERATE] Result structure: {json.dumps(result, indent=2, default=str)}")
-                    raise ValueError("Could not extract image URL from FAL response")
-                
-                JOB_STORE[job_id].update({
-                    "status": "completed",
-                    "image_file": image_url,
-                    "latency_sec": result.get('latency_sec', 0)
-                })
-                
-                print(f"[GENERATE] Success: {image_url}")
-                return jsonify({"job_id": job_id, "status": "processing"}), 202
-                
-            except Exception as e:
-                JOB_STORE[job_id].update({
-                    "status": "failed",
-                    "error": str(e)
-                })
-                print(f"[GENERATE] Pipeline error: {e}")
-                import traceback
-                traceback.print_exc()
-                raise
-        
-        except Exception as e:
-            print(f"[GENERATE] Error: {e}")
-            import traceback
-            traceback.print_exc()
-            return jsonify({"error": str(e)}), 500
-    
+                req = pipeline.build_request(env, data['person_image'], outfit_refs)
+                service = pipeline.edit_service
+                JOB_STORE.update(job_id, submitted_at=time.time(), traceparent=tracing.current_traceparent())
+                with admission_slot("image"):
+                    service.client.submit(
+                        service.MODEL_NAME,
+                        service.build_arguments(req),
+                        webhook_url=webhook_url("image", job_id),
+                    )
+                log.info("job.submitted", job_id=job_id, webhook=True)
+                return
+
+            result = _generate_image(data)
+
+        raise_if_cancelled()
+        _complete_generate_job(job_id, result.get('raw_response') or {}, result.get('latency_sec', 0))
+
+    except JobCancelled:
+        JOB_STORE.update(job_id, if_status=ACTIVE_STATUSES, status="cancelled")
+        log.info("job.cancelled", job_id=job_id)
+
     except Exception as e:
-        print(f"[GENERATE] Outer error: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": "Internal server error"}), 500
+        JOB_STORE.update(job_id, if_status=ACTIVE_STATUSES, status="failed", error=str(e))
+        log.exception("job.failed", job_id=job_id)
 
 
-@generate_bp.route('/api/status/<job_id>', methods=['GET'])
-def get_status(job_id):
-    """GET /api/status/<job_id>"""
-    if job_id not in JOB_STORE:
-        return jsonify({"error": "Job not found"}), 404
-    
-    job = JOB_STORE[job_id]
-    return jsonify({
+def _extract_image_url(response):
+    """Extract the image URL directly from a FAL response; raises ValueError if missing."""
+    image_url = None
+
+    if response.get('images', []):
+        image_url = response['images'][0].get('url')
+
+    if not image_url:
+        log.error("fal.unexpected_response", response=response)
+        raise ValueError("Could not extract image URL from FAL response")
+
+    return image_url
+
+
+def _complete_generate_job(job_id, response, latency_sec):
+    """Mark a job completed from a FAL image response."""
+    image_url = _extract_image_url(response)
+
+    JOB_STORE.update(
+        job_id,
+        if_status=ACTIVE_STATUSES,
+        status="completed",
+        image_file=image_url,
+        latency_sec=latency_sec,
+    )
+
+    log.info("job.completed", job_id=job_id, image_url=image_url, latency_sec=latency_sec)
+
+
+register_runner("image", _run_generate_job)
+register_completion("image", JOB_STORE, _complete_generate_job)
+
+
+def _status_payload(job_id, job):
+    return {
         "job_id": job_id,
         "status": job['status'],
         "image_file": job.get('image_file'),
         "latency_sec": job.get('latency_sec'),
+        "queue_position": job.get('queue_position'),
+        "progress": job.get('progress'),
         "error": job.get('error')
-    }), 200
\ No newline at end of file
+    }
+
+
+@generate_bp.route('/api/status/<job_id>', methods=['GET'])
+def get_status(job_id):
+    """GET /api/status/<job_id>"""
+    job = JOB_STORE.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(_status_payload(job_id, job)), 200
+
+
+@generate_bp.route('/api/status/<job_id>', methods=['DELETE'])
+def cancel_generate_job(job_id):
+    """DELETE /api/status/<job_id> - cancel the job and its FAL request"""
+    job, status_code = cancel_job(JOB_STORE, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if status_code == 409:
+        return jsonify({**_status_payload(job_id, job), "error": "Job already finished"}), 409
+
+    return jsonify(_status_payload(job_id, job)), 200
+
+
+@generate_bp.route('/api/status/<job_id>/events', methods=['GET'])
+def stream_status(job_id):
+    """GET /api/status/<job_id>/events - Server-Sent Events stream of job updates"""
+    if job_id not in JOB_STORE:
+        return jsonify({"error": "Job not found"}), 404
+
+    return stream_job_events(JOB_STORE, job_id, _status_payload)
@@ -0,0 +1,201 @@
+from flask import Blueprint, request, jsonify
+import os
+import sys
+import uuid
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../'))
+
+from app.backend.api.generate import _generate_image, _extract_image_url
+from app.backend.api.video import _generate_video, _extract_video_url
+from app.backend.api.admission import too_busy, unknown_video_model, ADMISSION
+from app.backend.api.scheduler import request_scheduling
+from app.backend.api.idempotency import IDEMPOTENCY, IdempotencyConflict, find_or_register
+from app.backend.api.jobs import ACTIVE_STATUSES, make_job_store, register_runner, dispatch_job, cancel_job, fal_progress_listener, stream_job_events
+from src.core.log import get_logger
+
+generate_video_bp = Blueprint('generate_video', __name__)
+log = get_logger("generate_video")
+
+PIPELINE_JOB_STORE = make_job_store("image_video")
+
+@generate_video_bp.route('/api/generate-video', methods=['POST'])
+def generate_image_and_video():
+    """
+    POST /api/generate-video
+    Body: {
+        "person_image": "<base64>",
+        "gender": "male",
+        "outfit_top": "Blue T-Shirt",
+        "outfit_bottom": "Black Jeans",
+        "background": "Urban Cafe",
+        "environment": "professional lighting, studio",
+        "motion_description": "person turns around smiling",
+        "model": "grok",
+        "duration_sec": 4
+    }
+
+    Chains the image and video stages server-side: the video starts as soon
+    as the image URL exists. The image URL is published on the job while the
+    video renders, so clients can show it early. With JOB_RUN_INLINE
+    (serverless) both stages run in the request and the finished job is
+    returned with 200.
+    """
+    try:
+        data = request.json
+        job_id = str(uuid.uuid4())
+
+        if not data.get('person_image'):
+            return jsonify({"error": "person_image required"}), 400
+
+        model_error = unknown_video_model(data)
+        if model_error:
+            return jsonify({"error": model_error}), 400
+
+        try:
+            priority, tenant = request_scheduling(request, data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        try:
+            existing_id = find_or_register("image_video", PIPELINE_JOB_STORE, request.headers, data, job_id)
+        except IdempotencyConflict as e:
+            return jsonify({"error": str(e)}), 422
+        if existing_id:
+            log.info("job.reused", job_id=existing_id)
+            job = PIPELINE_JOB_STORE.get(existing_id) or {"status": "queued"}
+            return jsonify({**_status_payload(existing_id, job), "reused": True}), 200
+
+        ticket, retry_after = ADMISSION.try_admit(["image", data.get('model', 'grok')])
+        if retry_after:
+            log.warning("job.rejected", retry_after_sec=retry_after)
+            IDEMPOTENCY.discard("image_video", job_id)
+            return too_busy(retry_after)
+
+        PIPELINE_JOB_STORE.create(
+            job_id,
+            data=data,
+            priority=priority,
+            stage="image",
+            stages={"image": {"status": "queued"}, "video": {"status": "pending"}},
+        )
+        if dispatch_job("image_video", job_id, data, ticket, priority=priority, tenant=tenant):
+            # Ran inline (JOB_RUN_INLINE): answer with the finished job
+            return jsonify(_status_payload(job_id, PIPELINE_JOB_STORE.get(job_id))), 200
+
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+    except Exception:
+        log.exception("request.failed")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _run_generate_video_job(job_id, data):
+    """Run the image stage, then the video stage on its URL, recording each in PIPELINE_JOB_STORE."""
+    from src.clients.fal_client import queue_listener
+    from src.core.cancellation import JobCancelled, raise_if_cancelled
+
+    stages = {"image": {"status": "processing"}, "video": {"status": "pending"}}
+    # A job cancelled while queued stays cancelled
+    if PIPELINE_JOB_STORE.update(job_id, if_status=ACTIVE_STATUSES, status="processing", stage="image", stages=stages) is None:
+        return
+
+    try:
+        with queue_listener(fal_progress_listener(PIPELINE_JOB_STORE, job_id)):
+            image_result = _generate_image(data)
+            image_url = _extract_image_url(image_result.get('raw_response') or {})
+            image_latency = image_result.get('latency_sec', 0)
+
+            stages = {
+                "image": {"status": "completed", "latency_sec": image_latency},
+                "video": {"status": "processing"},
+            }
+            PIPELINE_JOB_STORE.update(
+                job_id,
+                stage="video",
+                stages=stages,
+                image_file=image_url,
+                queue_position=None,
+                progress=None,
+            )
+
+            video_result = _generate_video({**data, 'image_file': image_url})
+            video_url = _extract_video_url(video_result.get('raw_response') or {})
+            video_latency = video_result.get('latency_sec', 0)
+
+        raise_if_cancelled()
+        stages["video"] = {"status": "completed", "latency_sec": video_latency}
+        PIPELINE_JOB_STORE.update(
+            job_id,
+            if_status=ACTIVE_STATUSES,
+            status="completed",
+            stages=stages,
+            video_file=video_url,
+            latency_sec=image_latency + video_latency,
+        )
+        log.info("job.completed", job_id=job_id, image_url=image_url, video_url=video_url)
+
+    except JobCancelled:
+        job = PIPELINE_JOB_STORE.get(job_id) or {}
+        stage = job.get('stage', 'image')
+        stages = job.get('stages', {})
+        stages[stage] = {"status": "cancelled"}
+        PIPELINE_JOB_STORE.update(job_id, if_status=ACTIVE_STATUSES, status="cancelled", stages=stages)
+        log.info("job.cancelled", job_id=job_id, stage=stage)
+
+    except Exception as e:
+        job = PIPELINE_JOB_STORE.get(job_id) or {}
+        stage = job.get('stage', 'image')
+        stages = job.get('stages', {})
+        stages[stage] = {"status": "failed"}
+        PIPELINE_JOB_STORE.update(job_id, if_status=ACTIVE_STATUSES, status="failed", stages=stages, error=str(e))
+        log.exception("job.failed", job_id=job_id, stage=stage)
+
+
+register_runner("image_video", _run_generate_video_job)
+
+
+def _status_payload(job_id, job):
+    return {
+        "job_id": job_id,
+        "status": job['status'],
+        "stage": job.get('stage'),
+        "stages": job.get('stages'),
+        "image_file": job.get('image_file'),
+        "video_file": job.get('video_file'),
+        "latency_sec": job.get('latency_sec'),
+        "queue_position": job.get('queue_position'),
+        "progress": job.get('progress'),
+        "error": job.get('error')
+    }
+
+
+@generate_video_bp.route('/api/generate-video/status/<job_id>', methods=['GET'])
+def get_generate_video_status(job_id):
+    """GET /api/generate-video/status/<job_id>"""
+    job = PIPELINE_JOB_STORE.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(_status_payload(job_id, job)), 200
+
+
+@generate_video_bp.route('/api/generate-video/status/<job_id>', methods=['DELETE'])
+def cancel_generate_video_job(job_id):
+    """DELETE /api/generate-video/status/<job_id> - cancel whichever stage is running"""
+    job, status_code = cancel_job(PIPELINE_JOB_STORE, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if status_code == 409:
+        return jsonify({**_status_payload(job_id, job), "error": "Job already finished"}), 409
+
+    return jsonify(_status_payload(job_id, job)), 200
+
+
+@generate_video_bp.route('/api/generate-video/status/<job_id>/events', methods=['GET'])
+def stream_generate_video_status(job_id):
+    """GET /api/generate-video/status/<job_id>/events - Server-Sent Events stream of job updates"""
+    if job_id not in PIPELINE_JOB_STORE:
+        return jsonify({"error": "Job not found"}), 404
+
+    return stream_job_events(PIPELINE_JOB_STORE, job_id, _status_payload)
@@ -0,0 +1,157 @@
+"""Reuse of jobs for repeated submissions.
+
+A submission is mapped to an existing job of the same kind when, within
+IDEMPOTENCY_WINDOW_SEC of that job's creation,
+- it carries the same `Idempotency-Key` header (the key must always be sent
+  with the same request body; reusing it for a different one is a conflict), or
+- it has the same request fingerprint (hash of the person image plus the
+  generation parameters) and that job has not failed or been cancelled.
+
+Repeat clicks and frontend retries therefore attach to the running job or
+return its finished result instead of starting another paid FAL call.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from src.core import metrics
+
+IDEMPOTENCY_WINDOW_SEC = float(os.getenv("IDEMPOTENCY_WINDOW_SEC", "600"))
+
+# Request fields that identify an identical generation, per job kind
+FINGERPRINT_FIELDS = {
+    "image": ("gender", "outfit_top", "outfit_bottom", "background", "environment", "model"),
+    "video": ("image_file", "gender", "outfit_top", "outfit_bottom", "motion_description", "duration_sec", "model"),
+    "image_video": (
+        "gender", "outfit_top", "outfit_bottom", "background", "environment",
+        "motion_description", "duration_sec", "model",
+    ),
+}
+
+JOB_REUSE = metrics.Counter(
+    "felix_job_reuse_total", "Submissions answered with an existing job (idempotency cache hits)", ("kind",)
+)
+
+# Entries older than the window are pruned every this many registrations
+_PRUNE_EVERY = 256
+
+
+class IdempotencyConflict(ValueError):
+    """An Idempotency-Key was reused with a different request."""
+
+
+def request_fingerprint(kind: str, data: dict) -> str:
+    """Stable hash of the inputs that determine a generation's output."""
+    fields = {name: data.get(name) for name in FINGERPRINT_FIELDS[kind]}
+    if data.get("person_image"):
+        fields["person_image"] = hashlib.sha256(data["person_image"].encode()).hexdigest()
+    blob = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(f"{kind}:{blob}".encode()).hexdigest()
+
+
+class IdempotencyIndex:
+    """In-process map of idempotency keys and fingerprints to job ids."""
+
+    def __init__(self, window_sec: float = IDEMPOTENCY_WINDOW_SEC):
+        self.window_sec = window_sec
+        self._entries = {}  # (kind, key) -> (job_id, fingerprint, created_at)
+        self._lock = threading.Lock()
+        self._registrations = 0
+
+    def resolve(self, kind, idempotency_key, fingerprint, new_job_id, reusable) -> tuple:
+        """
+        Return (job_id, reused) for a submission.
+
+        `reusable(job_id)` decides whether a fingerprint match may be
+        reused (e.g. not for failed jobs). Raises IdempotencyConflict when
+        `idempotency_key` was used for a different fingerprint.
+        """
+        now = time.time()
+        with self._lock:
+            job_id, reused = resolve_submission(
+                self._get, self._put, kind, idempotency_key, fingerprint, new_job_id, reusable, now
+            )
+            if not reused:
+                self._registrations += 1
+                if self._registrations % _PRUNE_EVERY == 0:
+                    cutoff = now - self.window_sec
+                    self._entries = {k: v for k, v in self._entries.items() if v[2] >= cutoff}
+            return job_id, reused
+
+    def discard(self, kind: str, job_id: str):
+        """Forget mappings to a job that was never started."""
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if not (k[0] == kind and v[0] == job_id)}
+
+    def _get(self, kind, key, now):
+        entry = self._entries.get((kind, key))
+        if entry is None or entry[2] < now - self.window_sec:
+            return None
+        return entry
+
+    def _put(self, kind, key, job_id, fingerprint, now):
+        self._entries[(kind, key)] = (job_id, fingerprint, now)
+
+
+def resolve_submission(get, put, kind, idempotency_key, fingerprint, new_job_id, reusable, now):
+    """Lookup/registration logic shared by the index backends; `get`/`put` access the backing map."""
+    if idempotency_key:
+        entry = get(kind, f"key:{idempotency_key}", now)
+        if entry is not None:
+            if entry[1] != fingerprint:
+                raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+            return entry[0], True
+
+    entry = get(kind, f"fp:{fingerprint}", now)
+    if entry is not None and reusable(entry[0]):
+        job_id, reused = entry[0], True
+    else:
+        job_id, reused = new_job_id, False
+        put(kind, f"fp:{fingerprint}", job_id, fingerprint, now)
+
+    if idempotency_key:
+        put(kind, f"key:{idempotency_key}", job_id, fingerprint, now)
+    return job_id, reused
+
+
+def make_idempotency_index():
+    """SQLite-backed when JOB_QUEUE_DB is set (shared by all API processes), else in-memory."""
+    queue_db = os.getenv("JOB_QUEUE_DB", "")
+    if queue_db:
+        from app.backend.api.job_queue import SqliteIdempotencyIndex
+        return SqliteIdempotencyIndex(queue_db, IDEMPOTENCY_WINDOW_SEC)
+    return IdempotencyIndex()
+
+
+IDEMPOTENCY = make_idempotency_index()
+
+
+def find_or_register(kind: str, store, headers, data: dict, job_id: str) -> str | None:
+    """
+    Look up a submission in IDEMPOTENCY.
+
+    Returns the id of an existing job to reuse, or None after registering
+    `job_id` for this request (the caller then creates and starts it).
+    Raises IdempotencyConflict for a mismatched Idempotency-Key.
+    """
+    if IDEMPOTENCY.window_sec <= 0:
+        return None
+
+    def reusable(existing_id):
+        job = store.get(existing_id)
+        return job is not None and job["status"] not in {"failed", "cancelled"}
+
+    existing_id, reused = IDEMPOTENCY.resolve(
+        kind,
+        headers.get("Idempotency-Key"),
+        request_fingerprint(kind, data),
+        job_id,
+        reusable,
+    )
+    if reused:
+        JOB_REUSE.inc(kind=kind)
+        return existing_id
+    return None
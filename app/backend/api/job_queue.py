@@ -0,0 +1,415 @@
+"""SQLite-backed job state and durable job queue shared by API and worker processes.
+
+Enabled by pointing JOB_QUEUE_DB at a database file. The HTTP tier then only
+enqueues work; `app/backend/worker.py` processes claim jobs with a visibility
+timeout, keep the lease alive with heartbeats and acknowledge when done. A
+job whose worker dies becomes visible again once its lease expires, so every
+job is delivered at least once (up to JOB_MAX_ATTEMPTS times).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.backend.api.jobs import record_status
+from app.backend.api.scheduler import DEFAULT_PRIORITY, PRIORITY_CLASSES, parse_env_map
+from src.core import tracing
+
+VISIBILITY_TIMEOUT_SEC = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "120"))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# How often cross-process waiters re-read a job
+POLL_INTERVAL_SEC = 0.25
+
+# Oldest ready jobs of the top priority considered for fair-share selection
+CLAIM_CANDIDATES = 50
+
+TENANT_WEIGHTS = parse_env_map(os.getenv("SCHEDULER_TENANT_WEIGHTS", ""))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    state TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_queue (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    visible_at REAL NOT NULL,
+    lease_owner TEXT,
+    heartbeat_at REAL,
+    enqueued_at REAL NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    tenant TEXT NOT NULL DEFAULT 'anonymous',
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS job_queue_ready ON job_queue (status, visible_at);
+CREATE TABLE IF NOT EXISTS idempotency (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS idempotency_created ON idempotency (created_at);
+"""
+
+# Columns added after the first release, for databases created before them
+_MIGRATIONS = (
+    "ALTER TABLE job_queue ADD COLUMN priority INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE job_queue ADD COLUMN tenant TEXT NOT NULL DEFAULT 'anonymous'",
+    "ALTER TABLE job_queue ADD COLUMN started_at REAL",
+    "ALTER TABLE job_queue ADD COLUMN finished_at REAL",
+    "CREATE INDEX IF NOT EXISTS job_queue_finished ON job_queue (finished_at)",
+)
+
+
+class _Database:
+    """One SQLite connection per thread on a WAL-mode database file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self.connect() as conn:
+            conn.executescript(_SCHEMA)
+            for statement in _MIGRATIONS:
+                try:
+                    conn.execute(statement)
+                except sqlite3.OperationalError:
+                    pass  # column already exists
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+_DATABASES = {}
+_DATABASES_LOCK = threading.Lock()
+
+# Connections inherited across fork; kept referenced so the child never closes them
+_INHERITED = []
+
+
+def _database(path: str) -> _Database:
+    with _DATABASES_LOCK:
+        if path not in _DATABASES:
+            _DATABASES[path] = _Database(path)
+        return _DATABASES[path]
+
+
+def reset_connections():
+    """Open fresh connections from here on; call first thing in a forked child process."""
+    with _DATABASES_LOCK:
+        for db in _DATABASES.values():
+            _INHERITED.append(db._local)
+            db._local = threading.local()
+
+
+class SqliteJobStore:
+    """
+    JobStore with the same interface as `jobs.JobStore`, persisted in SQLite.
+
+    State written by any process is visible to all of them; `wait_for_change`
+    polls because other processes cannot signal this one directly.
+    """
+
+    def __init__(self, path: str, kind: str):
+        self._db = _database(path)
+        self.kind = kind
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Call `callback(job_id, job)` after every create/update made by this process."""
+        self._listeners.append(callback)
+
+    def _changed(self, job_id: str, job: dict):
+        for callback in self._listeners:
+            callback(job_id, job)
+
+    def __contains__(self, job_id):
+        return self.get(job_id) is not None
+
+    def create(self, job_id: str, **fields) -> dict:
+        job = {
+            "status": "queued",
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "trace_id": tracing.current_trace_id(),
+            **fields,
+            "version": 1,
+        }
+        self._db.connect().execute(
+            "INSERT INTO jobs (job_id, kind, state, version, updated_at) VALUES (?, ?, ?, 1, ?)",
+            (job_id, self.kind, json.dumps(job, default=str), time.time()),
+        )
+        record_status(self.kind, job, job)
+        self._changed(job_id, job)
+        return dict(job)
+
+    def get(self, job_id: str) -> dict | None:
+        row = self._db.connect().execute(
+            "SELECT state FROM jobs WHERE job_id = ? AND kind = ?", (job_id, self.kind)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, job_ids) -> dict:
+        job_ids = list(job_ids)
+        jobs = {}
+        conn = self._db.connect()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(job_ids), 500):
+            chunk = job_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT job_id, state FROM jobs WHERE kind = ? AND job_id IN ({placeholders})",
+                (self.kind, *chunk),
+            ).fetchall()
+            jobs.update((job_id, json.loads(state)) for job_id, state in rows)
+        return jobs
+
+    def update(self, job_id: str, if_status=None, **fields) -> dict | None:
+        conn = self._db.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT state FROM jobs WHERE job_id = ? AND kind = ?", (job_id, self.kind)
+            ).fetchone()
+            job = json.loads(row[0]) if row else None
+            if job is None or (if_status is not None and job["status"] not in if_status):
+                conn.execute("ROLLBACK")
+                return None
+            job.update(fields)
+            job["version"] += 1
+            conn.execute(
+                "UPDATE jobs SET state = ?, version = ?, updated_at = ? WHERE job_id = ?",
+                (json.dumps(job, default=str), job["version"], time.time(), job_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        record_status(self.kind, job, fields)
+        self._changed(job_id, job)
+        return job
+
+    def wait_for_change(self, job_id: str, version: int, timeout: float) -> dict | None:
+        """Poll until the job's version differs from `version` or `timeout` elapses."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["version"] != version or time.monotonic() >= deadline:
+                return job
+            time.sleep(min(POLL_INTERVAL_SEC, max(0.0, deadline - time.monotonic())))
+
+
+class SqliteIdempotencyIndex:
+    """`idempotency.IdempotencyIndex` shared across processes through SQLite."""
+
+    def __init__(self, path: str, window_sec: float):
+        self._db = _database(path)
+        self.window_sec = window_sec
+
+    def resolve(self, kind, idempotency_key, fingerprint, new_job_id, reusable) -> tuple:
+        from app.backend.api.idempotency import resolve_submission
+
+        conn = self._db.connect()
+        now = time.time()
+
+        def get(kind, key, now):
+            return conn.execute(
+                "SELECT job_id, fingerprint, created_at FROM idempotency "
+                "WHERE kind = ? AND key = ? AND created_at >= ?",
+                (kind, key, now - self.window_sec),
+            ).fetchone()
+
+        def put(kind, key, job_id, fingerprint, now):
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency (kind, key, job_id, fingerprint, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, key, job_id, fingerprint, now),
+            )
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = resolve_submission(get, put, kind, idempotency_key, fingerprint, new_job_id, reusable, now)
+            conn.execute("DELETE FROM idempotency WHERE created_at < ?", (now - self.window_sec,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def discard(self, kind: str, job_id: str):
+        self._db.connect().execute("DELETE FROM idempotency WHERE kind = ? AND job_id = ?", (kind, job_id))
+
+
+class SqliteJobQueue:
+    """Durable at-least-once job queue with visibility timeouts."""
+
+    def __init__(self, path: str):
+        self._db = _database(path)
+
+    def enqueue(
+        self,
+        kind: str,
+        job_id: str,
+        payload: dict,
+        priority: str = DEFAULT_PRIORITY,
+        tenant: str = "anonymous",
+    ):
+        now = time.time()
+        self._db.connect().execute(
+            "INSERT INTO job_queue (job_id, kind, payload, visible_at, enqueued_at, priority, tenant) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(payload, default=str), now, now, PRIORITY_CLASSES.index(priority), tenant),
+        )
+
+    def claim(self, worker_id: str, visibility_timeout: float = VISIBILITY_TIMEOUT_SEC) -> dict | None:
+        """
+        Lease the next visible job for `worker_id`.
+
+        Jobs of the highest priority class go first. Among them, the tenant
+        with the fewest running jobs relative to its weight wins, oldest job
+        first. Returns {"job_id", "kind", "payload", "attempts", "priority",
+        "queue_wait_sec"} or None when idle. Leased jobs whose lease expired
+        are visible again.
+        """
+        conn = self._db.connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT job_id, kind, payload, attempts, priority, tenant, enqueued_at FROM job_queue "
+                "WHERE status IN ('pending', 'leased') AND visible_at <= ? AND priority = ("
+                "  SELECT MIN(priority) FROM job_queue WHERE status IN ('pending', 'leased') AND visible_at <= ?"
+                ") ORDER BY enqueued_at LIMIT ?",
+                (now, now, CLAIM_CANDIDATES),
+            ).fetchall()
+            if not rows:
+                conn.execute("COMMIT")
+                return None
+
+            running = dict(conn.execute(
+                "SELECT tenant, COUNT(*) FROM job_queue "
+                "WHERE status = 'leased' AND visible_at > ? GROUP BY tenant",
+                (now,),
+            ).fetchall())
+            job_id, kind, payload, attempts, priority, tenant, enqueued_at = min(
+                rows,
+                key=lambda row: ((running.get(row[5], 0) + 1) / TENANT_WEIGHTS.get(row[5], 1.0), row[6]),
+            )
+            conn.execute(
+                "UPDATE job_queue SET status = 'leased', attempts = attempts + 1, "
+                "visible_at = ?, lease_owner = ?, heartbeat_at = ?, started_at = COALESCE(started_at, ?) "
+                "WHERE job_id = ?",
+                (now + visibility_timeout, worker_id, now, now, job_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {
+            "job_id": job_id,
+            "kind": kind,
+            "payload": json.loads(payload),
+            "attempts": attempts + 1,
+            "priority": PRIORITY_CLASSES[priority],
+            "queue_wait_sec": now - enqueued_at,
+        }
+
+    def heartbeat(self, job_id: str, worker_id: str, visibility_timeout: float = VISIBILITY_TIMEOUT_SEC) -> bool:
+        """Extend the lease; False means the lease was lost to another worker."""
+        now = time.time()
+        cur = self._db.connect().execute(
+            "UPDATE job_queue SET visible_at = ?, heartbeat_at = ? "
+            "WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+            (now + visibility_timeout, now, job_id, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def ack(self, job_id: str, worker_id: str):
+        self._db.connect().execute(
+            "UPDATE job_queue SET status = 'done', finished_at = ? WHERE job_id = ? AND lease_owner = ?",
+            (time.time(), job_id, worker_id),
+        )
+
+    def release(self, job_id: str, worker_id: str, delay: float = 0.0):
+        """Give a leased job back to the queue (e.g. on shutdown)."""
+        self._db.connect().execute(
+            "UPDATE job_queue SET status = 'pending', visible_at = ?, lease_owner = NULL "
+            "WHERE job_id = ? AND lease_owner = ?",
+            (time.time() + delay, job_id, worker_id),
+        )
+
+    def hand_back(self, job_id: str, worker_id: str):
+        """Release a job interrupted by shutdown without counting the attempt."""
+        self._db.connect().execute(
+            "UPDATE job_queue SET status = 'pending', visible_at = ?, lease_owner = NULL, "
+            "attempts = MAX(attempts - 1, 0) WHERE job_id = ? AND lease_owner = ? AND status = 'leased'",
+            (time.time(), job_id, worker_id),
+        )
+
+    def leases(self) -> list:
+        """(job_id, lease_owner) of every leased job, expired leases included."""
+        return self._db.connect().execute(
+            "SELECT job_id, lease_owner FROM job_queue WHERE status = 'leased'"
+        ).fetchall()
+
+    def bury(self, job_id: str):
+        """Stop delivering a job that keeps failing."""
+        self._db.connect().execute("UPDATE job_queue SET status = 'dead' WHERE job_id = ?", (job_id,))
+
+    def depth(self) -> int:
+        """Number of jobs waiting or in progress."""
+        row = self._db.connect().execute(
+            "SELECT COUNT(*) FROM job_queue WHERE status IN ('pending', 'leased')"
+        ).fetchone()
+        return row[0]
+
+    def service_time(self, recent: int = 50) -> float | None:
+        """Mean first-claim-to-ack seconds of the last `recent` finished jobs; None before any."""
+        row = self._db.connect().execute(
+            "SELECT AVG(finished_at - started_at) FROM ("
+            "  SELECT finished_at, started_at FROM job_queue WHERE finished_at IS NOT NULL "
+            "  ORDER BY finished_at DESC LIMIT ?"
+            ")",
+            (recent,),
+        ).fetchone()
+        return row[0]
+
+    def wait_stats(self) -> dict:
+        """Queued count and queue wait (enqueue to first claim) per priority class."""
+        conn = self._db.connect()
+        queued = dict(conn.execute(
+            "SELECT priority, COUNT(*) FROM job_queue WHERE status = 'pending' GROUP BY priority"
+        ).fetchall())
+        waits = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                "SELECT priority, COUNT(*), AVG(started_at - enqueued_at), MAX(started_at - enqueued_at) "
+                "FROM job_queue WHERE started_at IS NOT NULL GROUP BY priority"
+            ).fetchall()
+        }
+        result = {}
+        for rank, cls in enumerate(PRIORITY_CLASSES):
+            started, mean, longest = waits.get(rank, (0, None, None))
+            result[cls] = {
+                "queued": queued.get(rank, 0),
+                "started": started,
+                "wait_mean_sec": round(mean, 3) if mean is not None else None,
+                "wait_max_sec": round(longest, 3) if longest is not None else None,
+            }
+        return result
@@ -0,0 +1,333 @@
+"""Job tracking and dispatch shared by the API blueprints
+
+Jobs run on an in-process worker pool (scheduler.JOB_SCHEDULER) by default.
+With JOB_QUEUE_DB set, job state lives in SQLite and jobs are handed to
+standalone worker processes (app/backend/worker.py) through a durable queue
+instead. With JOB_RUN_INLINE (on by default on Vercel) they run inside the
+submitting request, because serverless functions freeze background threads
+once the response is sent and do not share memory between invocations.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from flask import Response, request, stream_with_context
+
+from app.backend.api.scheduler import DEFAULT_PRIORITY, JOB_SCHEDULER
+from src.core import metrics, tracing
+from src.core.log import get_logger
+
+log = get_logger("jobs")
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+ACTIVE_STATUSES = {"queued", "processing"}
+
+# Seconds between SSE keep-alive comments and the max lifetime of one stream
+STREAM_HEARTBEAT_SEC = 15
+STREAM_MAX_SEC = 15 * 60
+
+JOB_QUEUE_DB = os.getenv("JOB_QUEUE_DB", "")
+JOB_RUN_INLINE = (os.getenv("JOB_RUN_INLINE") or ("1" if os.getenv("VERCEL") else "0")) not in ("0", "false")
+
+# kind -> runner(job_id, data), registered by the job blueprints
+JOB_RUNNERS = {}
+
+JOB_TRANSITIONS = metrics.Counter("felix_job_transitions_total", "Job status changes", ("kind", "status"))
+JOB_DURATION = metrics.Histogram(
+    "felix_job_duration_seconds",
+    "Job creation to terminal status, by the FAL endpoint it last called",
+    ("kind", "model", "status"),
+)
+
+# job_id -> CancelToken for jobs dispatched or running in this process
+_CANCEL_TOKENS = {}
+_CANCEL_TOKENS_LOCK = threading.Lock()
+
+
+class JobStore:
+    """
+    Thread-safe job table.
+
+    Every update bumps the job's `version`, wakes threads blocked in
+    `wait_for_change` and calls listeners registered with `add_listener`,
+    so progress can be pushed instead of polled. `update(..., if_status=...)`
+    is a compare-and-set, so a runner cannot overwrite a concurrent cancel.
+    """
+
+    def __init__(self, kind: str = ""):
+        self.kind = kind
+        self._jobs = {}
+        self._cond = threading.Condition()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Call `callback(job_id, job)` after every create/update."""
+        self._listeners.append(callback)
+
+    def _changed(self, job_id: str, job: dict):
+        for callback in self._listeners:
+            callback(job_id, job)
+
+    def __contains__(self, job_id):
+        with self._cond:
+            return job_id in self._jobs
+
+    def create(self, job_id: str, **fields) -> dict:
+        with self._cond:
+            job = {
+                "status": "queued",
+                "created_at": datetime.now().isoformat(),
+                "trace_id": tracing.current_trace_id(),
+                **fields,
+                "version": 1,
+            }
+            self._jobs[job_id] = job
+            self._cond.notify_all()
+            snapshot = dict(job)
+        record_status(self.kind, snapshot, snapshot)
+        self._changed(job_id, snapshot)
+        return snapshot
+
+    def get(self, job_id: str) -> dict | None:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def get_many(self, job_ids) -> dict:
+        """Snapshots of the known jobs among `job_ids`, keyed by id."""
+        with self._cond:
+            return {job_id: dict(self._jobs[job_id]) for job_id in job_ids if job_id in self._jobs}
+
+    def update(self, job_id: str, if_status=None, **fields) -> dict | None:
+        """Apply `fields`; with `if_status`, only while the job's status is one of those (else None)."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or (if_status is not None and job["status"] not in if_status):
+                return None
+            job.update(fields)
+            job["version"] += 1
+            self._cond.notify_all()
+            snapshot = dict(job)
+        record_status(self.kind, snapshot, fields)
+        self._changed(job_id, snapshot)
+        return snapshot
+
+    def wait_for_change(self, job_id: str, version: int, timeout: float) -> dict | None:
+        """Block until the job's version differs from `version` or `timeout` elapses."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._jobs.get(job_id, {}).get("version") != version,
+                timeout=timeout,
+            )
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+
+def make_job_store(kind: str):
+    """Job store for `kind` jobs: SQLite-backed when JOB_QUEUE_DB is set, else in-memory."""
+    if JOB_QUEUE_DB:
+        from app.backend.api.job_queue import SqliteJobStore
+        return SqliteJobStore(JOB_QUEUE_DB, kind)
+    return JobStore(kind)
+
+
+def record_status(kind: str, job: dict, fields: dict):
+    """Count a status change made by `fields`, and the job's duration once it is terminal."""
+    status = fields.get("status")
+    if status is None:
+        return
+    JOB_TRANSITIONS.inc(kind=kind, status=status)
+    if status in TERMINAL_STATUSES and job.get("created_at"):
+        elapsed = (datetime.now() - datetime.fromisoformat(job["created_at"])).total_seconds()
+        JOB_DURATION.observe(elapsed, kind=kind, model=job.get("fal_model", ""), status=status)
+
+
+def register_runner(kind: str, runner):
+    """Make `runner(job_id, data)` the executor for `kind` jobs, in-process or in workers."""
+    JOB_RUNNERS[kind] = runner
+
+
+def dispatch_job(
+    kind: str,
+    job_id: str,
+    data: dict,
+    ticket=None,
+    priority: str = DEFAULT_PRIORITY,
+    tenant: str = "anonymous",
+) -> bool:
+    """
+    Start a job: enqueue it for worker processes, schedule it on the local
+    pool, or with JOB_RUN_INLINE run it to the end in the calling thread.
+
+    `ticket` is the job's admission ticket (see admission.py); it is bound
+    while the runner executes and closed when it returns. `priority` and
+    `tenant` decide its place in the queue (see scheduler.py). The job's
+    spans continue the current trace. Returns True if the job already ran,
+    so the caller can answer with its result.
+    """
+    traceparent = tracing.current_traceparent()
+    if traceparent:
+        data = {**data, "traceparent": traceparent}
+
+    if JOB_QUEUE_DB:
+        from app.backend.api.job_queue import SqliteJobQueue
+        SqliteJobQueue(JOB_QUEUE_DB).enqueue(kind, job_id, data, priority=priority, tenant=tenant)
+        return False
+
+    token = job_cancel_token(job_id)
+    if ticket is not None:
+        # A cancelled job gives its admission slots back right away
+        token.on_cancel(ticket.close)
+    if JOB_RUN_INLINE:
+        _run_admitted(JOB_RUNNERS[kind], ticket, job_id, data)
+        return True
+    JOB_SCHEDULER.submit(
+        _run_admitted, JOB_RUNNERS[kind], ticket, job_id, data,
+        priority=priority, tenant=tenant,
+    )
+    return False
+
+
+def _run_admitted(runner, ticket, job_id, data):
+    if ticket is None:
+        run_cancellable(runner, job_id, data)
+        return
+    with ticket.bound():
+        run_cancellable(runner, job_id, data)
+
+
+def job_cancel_token(job_id: str):
+    """The CancelToken for a job in this process, created on first use."""
+    from src.core.cancellation import CancelToken
+
+    with _CANCEL_TOKENS_LOCK:
+        token = _CANCEL_TOKENS.get(job_id)
+        if token is None:
+            token = _CANCEL_TOKENS[job_id] = CancelToken()
+        return token
+
+
+def run_cancellable(runner, job_id: str, data: dict):
+    """Run `runner(job_id, data)` under the job's cancel token; skip it if already cancelled."""
+    from src.core.cancellation import cancellation
+
+    token = job_cancel_token(job_id)
+    try:
+        if not token.cancelled:
+            with cancellation(token), tracing.resume(data.get("traceparent")), tracing.span("job", job_id=job_id):
+                runner(job_id, data)
+    finally:
+        release_cancel_token(job_id)
+
+
+def local_job_ids() -> list:
+    """Ids of jobs dispatched to or running in this process."""
+    with _CANCEL_TOKENS_LOCK:
+        return list(_CANCEL_TOKENS)
+
+
+def release_cancel_token(job_id: str):
+    """Forget a finished job's cancel token."""
+    with _CANCEL_TOKENS_LOCK:
+        _CANCEL_TOKENS.pop(job_id, None)
+
+
+def cancel_job(store: JobStore, job_id: str) -> tuple:
+    """
+    Cancel a job and return (job, http_status).
+
+    Marks the job cancelled unless it already finished, fires its local cancel token (which aborts the
+    wait, skips downloads, cancels its FAL request and frees its slots) and,
+    for jobs running elsewhere or waiting on a webhook, cancels the FAL
+    request recorded on the job. Finished jobs are left alone (409).
+    """
+    job = store.update(job_id, if_status=ACTIVE_STATUSES, status="cancelled", cancelled_at=datetime.now().isoformat())
+    if job is None:
+        job = store.get(job_id)
+        return job, (404 if job is None else 409)
+
+    with _CANCEL_TOKENS_LOCK:
+        token = _CANCEL_TOKENS.get(job_id)
+    if token is not None:
+        token.cancel()
+    elif job.get("fal_request_id"):
+        from src.clients.fal_client import FalClient
+        FalClient().cancel(job["fal_model"], job["fal_request_id"])
+
+    log.info("job.cancelled", job_id=job_id)
+    return job, 200
+
+
+def fal_progress_listener(store: JobStore, job_id: str):
+    """Build a `queue_listener` callback that mirrors FAL queue events into the job."""
+
+    def on_update(update: dict):
+        event = update.get("event")
+        if event == "enqueued":
+            # Every request the job submitted, so a restarted worker can resume them
+            job = store.get(job_id) or {}
+            fal_requests = {**(job.get("fal_requests") or {}), update.get("model"): update.get("request_id")}
+            store.update(
+                job_id,
+                fal_request_id=update.get("request_id"),
+                fal_model=update.get("model"),
+                fal_requests=fal_requests,
+            )
+        elif event == "queued":
+            store.update(job_id, queue_position=update.get("position"))
+        elif event == "in_progress":
+            logs = update.get("logs") or []
+            fields = {"queue_position": None}
+            if logs:
+                fields["progress"] = logs[-1]
+            store.update(job_id, **fields)
+
+    return on_update
+
+
+def last_event_version(headers) -> int:
+    """Job version a reconnecting EventSource already saw (from `Last-Event-ID`)."""
+    try:
+        return int(headers.get("Last-Event-ID", 0))
+    except ValueError:
+        return 0
+
+
+def sse_event(job_id: str, job: dict, view) -> str:
+    """Format one job snapshot as an SSE message (event name = job status)."""
+    payload = json.dumps(view(job_id, job), default=str)
+    return f"id: {job['version']}\nevent: {job['status']}\ndata: {payload}\n\n"
+
+
+def stream_job_events(store: JobStore, job_id: str, view):
+    """
+    Server-Sent Events response that pushes `view(job_id, job)` on every change.
+
+    The stream ends once the job reaches a terminal status. Event ids are job
+    versions, so a reconnecting EventSource resumes via `Last-Event-ID`.
+    """
+    last_version = last_event_version(request.headers)
+
+    def generate():
+        version = last_version
+        deadline = time.monotonic() + STREAM_MAX_SEC
+        while time.monotonic() < deadline:
+            job = store.wait_for_change(job_id, version, timeout=STREAM_HEARTBEAT_SEC)
+            if job is None:
+                return
+            if job["version"] == version:
+                yield ": keep-alive\n\n"
+                continue
+            version = job["version"]
+            yield sse_event(job_id, job, view)
+            if job["status"] in TERMINAL_STATUSES:
+                return
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,79 @@
+"""Graceful shutdown of an API process.
+
+On SIGTERM the process stops admitting jobs (submissions get 429 with
+Retry-After and /api/health reports "draining", so load balancers stop
+routing here) and waits up to DRAIN_TIMEOUT_SEC for the jobs on its local
+pool before the server's own shutdown runs. With JOB_QUEUE_DB set the API
+runs no jobs; worker processes drain and hand back their own (worker.py).
+
+Only JOB_QUEUE_DB mode survives a restart. In-process jobs still running at
+the drain timeout are lost with the process; their ids are logged
+(`drain.timeout`) so they can be resubmitted.
+"""
+
+import _thread
+import os
+import signal
+import threading
+
+from app.backend.api.admission import ADMISSION
+from app.backend.api.jobs import JOB_QUEUE_DB, local_job_ids
+from app.backend.api.scheduler import JOB_SCHEDULER
+from src.core.log import get_logger
+
+DRAIN_TIMEOUT_SEC = float(os.getenv("DRAIN_TIMEOUT_SEC", "25"))
+
+log = get_logger("lifecycle")
+
+
+def draining() -> bool:
+    return ADMISSION.draining
+
+
+def drain(timeout: float = DRAIN_TIMEOUT_SEC) -> bool:
+    """Stop admitting jobs and wait for in-flight local jobs; False if some were still running."""
+    ADMISSION.drain()
+    if JOB_QUEUE_DB:
+        return True
+
+    log.info("drain.started", timeout_sec=timeout)
+    finished = JOB_SCHEDULER.wait_idle(timeout)
+    if finished:
+        log.info("drain.complete")
+    else:
+        log.warning("drain.timeout", queued=JOB_SCHEDULER.depth(), lost_jobs=local_job_ids())
+    return finished
+
+
+def install_drain_handler(signum=signal.SIGTERM):
+    """
+    Drain on `signum`, then pass the signal on to the previous handler.
+
+    The previous handler is the WSGI server's (e.g. gunicorn's graceful
+    exit); without one the main thread is interrupted as on Ctrl-C. A
+    second signal skips the wait.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signum)
+    if previous == signal.SIG_IGN:
+        return
+
+    def shutdown(sig, frame):
+        if callable(previous):
+            previous(sig, frame)
+        else:
+            _thread.interrupt_main()
+
+    def on_signal(sig, frame):
+        if ADMISSION.draining:
+            shutdown(sig, frame)
+            return
+
+        def drain_then_shutdown():
+            drain()
+            shutdown(sig, frame)
+
+        threading.Thread(target=drain_then_shutdown, name="drain", daemon=True).start()
+
+    signal.signal(signum, on_signal)
@@ -1,33 +1,112 @@
-"""Outfit database with static asset URLs"""
-
-OUTFIT_DATABASE = {
-    # Tops
-    'Blue T-Shirt': 'https://i.postimg.cc/Xqs7H0wD/blue_tshirt.png',
-    'White Polo': 'https://i.postimg.cc/wx2vTDSp/white_polo.png',
-    'Black Hoodie': 'https://i.postimg.cc/59g0N8ZW/black_hoodie.png',
-    'Formal Shirt': 'https://i.postimg.cc/Wz5bWPM7/formal_shirt.png',
-    'Black Crop Top': 'https://i.postimg.cc/G21bRt2d/black_crop_top.png',
-    'White Tank': 'https://i.postimg.cc/JnWR80n7/white_tank.png',
-    'Pink Blouse': 'https://i.postimg.cc/B6GJ3b6b/pink_blouse.png',
-    'Formal Dress': 'https://i.postimg.cc/V6czwvNh/formal_dress.png',
-    
-    # Bottoms
-    'Khaki Shorts': 'https://i.postimg.cc/hjHHKZKB/khaki_shorts.png',
-    'Black Jeans': 'https://i.postimg.cc/wvSS949K/black_jeans.png',
-    'Navy Chinos': 'https://i.postimg.cc/4drrX2XT/navy_chinos.png',
-    'Running Shorts': 'https://i.postimg.cc/bJG7cfcx/running_shorts.png',
-    'Denim Shorts': 'https://i.postimg.cc/LXMmS5sc/denim_shorts.png',
-    'Black Skirt': 'https://i.postimg.cc/9Mjc20fS/black_skirt.png',
-    'Casual Leggings': 'https://i.postimg.cc/V6czwvNH/casual_leggings.png',
-    'Summer Dress': 'https://i.postimg.cc/0NS9hD9J/summer_dress.png',
-    
-    # Backgrounds (descriptions, not images)
-    'Urban Cafe': 'Urban cafe outdoor with modern city background.',
-    'Office': 'Modern office interior with office chairs nearby',
-    'Gym': 'Gym or outdoor fitness setting',
-    'Studio': 'Clean professional studio with neutral background',
-}
+"""
+Outfit catalog endpoints and outfit name resolution.
+
+GET /api/outfits lists catalog items a page at a time (keyset `cursor`),
+filtered by kind, category, color, gender and tag, with free-text search in
+`q`. GET /api/outfits/<sku> returns one item and GET /api/outfits/facets the
+filter values. Responses carry an ETag derived from the catalog version plus
+Cache-Control, so clients and CDNs revalidate with a bodyless 304.
+
+`get_outfit_image` resolves an outfit name or SKU to what the generation
+pipeline needs: the FAL storage mirror of the garment image when one is
+fresh (see scripts/sync_outfit_catalog.py), else the source image URL, or
+the description for backgrounds.
+"""
+
+import hashlib
+import os
+
+from flask import Blueprint, request, jsonify
+
+from app.backend.api.catalog import get_catalog, mirror_fresh, resolved_image
+
+outfits_bp = Blueprint('outfits', __name__)
+
+OUTFIT_CACHE_MAX_AGE_SEC = int(os.getenv("OUTFIT_CACHE_MAX_AGE_SEC", "300"))
+
+DEFAULT_PAGE_SIZE = 50
+
 
 def get_outfit_image(outfit_name: str) -> str:
     """Get image URL or description for outfit name"""
-    return OUTFIT_DATABASE.get(outfit_name, outfit_name)
\ No newline at end of file
+    item = get_catalog().get(outfit_name) if outfit_name else None
+    if item is None:
+        return outfit_name
+    return resolved_image(item) or outfit_name
+
+
+def _public(item: dict) -> dict:
+    return {
+        "sku": item["sku"],
+        "name": item["name"],
+        "kind": item["kind"],
+        "category": item["category"],
+        "color": item["color"],
+        "gender": item["gender"],
+        "tags": item["tags"],
+        "image_url": item["image_url"] if item["kind"] == "garment" else None,
+        "description": item["description"],
+        "fal_url": item["mirror_url"] if mirror_fresh(item) else None,
+    }
+
+
+def _cached(build):
+    """Serve `build()` with an ETag over the catalog version and the query; 304 if unchanged."""
+    digest = hashlib.sha1(f"{get_catalog().version()}|{request.full_path}".encode())
+    etag = f'"{digest.hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={OUTFIT_CACHE_MAX_AGE_SEC}"}
+    if request.if_none_match.contains_weak(digest.hexdigest()):
+        return "", 304, headers
+
+    body, status = build()
+    response = jsonify(body)
+    response.status_code = status
+    if status == 200:
+        response.headers.update(headers)
+    return response
+
+
+@outfits_bp.route('/api/outfits', methods=['GET'])
+def list_outfits():
+    """
+    GET /api/outfits?q=&kind=&category=&color=&gender=&tag=&limit=&cursor=
+
+    Returns {"items": [...], "next_cursor": "<cursor>" | null}; pass
+    next_cursor back to get the following page.
+    """
+    def build():
+        try:
+            limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+            items, next_cursor = get_catalog().query(
+                q=request.args.get('q'),
+                kind=request.args.get('kind'),
+                category=request.args.get('category'),
+                color=request.args.get('color'),
+                gender=request.args.get('gender'),
+                tag=request.args.get('tag'),
+                limit=limit,
+                cursor=request.args.get('cursor'),
+            )
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return {"items": [_public(item) for item in items], "next_cursor": next_cursor}, 200
+
+    return _cached(build)
+
+
+@outfits_bp.route('/api/outfits/facets', methods=['GET'])
+def outfit_facets():
+    """GET /api/outfits/facets - filter values with item counts"""
+    return _cached(lambda: (get_catalog().facets(), 200))
+
+
+@outfits_bp.route('/api/outfits/<sku>', methods=['GET'])
+def get_outfit(sku):
+    """GET /api/outfits/<sku>"""
+    def build():
+        item = get_catalog().get(sku)
+        if item is None:
+            return {"error": "Outfit not found"}, 404
+        return _public(item), 200
+
+    return _cached(build)
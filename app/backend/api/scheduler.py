@@ -0,0 +1,205 @@
+"""Priority and fair-share scheduling of generation jobs.
+
+Jobs are queued in three priority classes. A worker always takes the next
+job from the highest non-empty class (interactive > batch > warmup), so a
+large batch never delays live wizard users. Within a class, tenants (API
+keys, or client addresses for anonymous users) share workers by weighted
+fair queuing: each job gets a virtual finish tag of
+max(class virtual time, tenant's last tag) + 1 / weight, and the smallest
+tag runs first. Tenant weights come from SCHEDULER_TENANT_WEIGHTS
+("tenant=weight,..."); unlisted tenants weigh 1.
+
+Queue wait (submit to start) is recorded per class.
+"""
+
+import hashlib
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+from src.core import metrics
+from src.core.log import get_logger
+
+log = get_logger("scheduler")
+
+PRIORITY_CLASSES = ("interactive", "batch", "warmup")
+DEFAULT_PRIORITY = "interactive"
+
+# Recent waits kept per class for percentiles
+WAIT_SAMPLES = 1000
+
+QUEUE_WAIT = metrics.Histogram(
+    "felix_scheduler_queue_wait_seconds", "Time jobs waited for a worker, by priority class", ("priority",)
+)
+
+
+def parse_env_map(value: str) -> dict:
+    """Parse "key=number,key=number" settings into {key: float}."""
+    result = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, _, number = item.partition("=")
+            result[key.strip()] = float(number)
+    return result
+
+
+def request_scheduling(request, data: dict) -> tuple:
+    """
+    Resolve (priority, tenant) for an API request.
+
+    Priority comes from the body's "priority" field (default interactive);
+    raises ValueError for an unknown class. The tenant is the X-Tenant-ID
+    header, else a hash of X-API-Key, else the client address.
+    """
+    priority = data.get('priority') or DEFAULT_PRIORITY
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITY_CLASSES)}")
+
+    tenant = request.headers.get('X-Tenant-ID')
+    if not tenant and request.headers.get('X-API-Key'):
+        tenant = "key:" + hashlib.sha256(request.headers['X-API-Key'].encode()).hexdigest()[:12]
+    return priority, tenant or request.remote_addr or "anonymous"
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 3)
+
+
+class QueueWaitStats:
+    """Per-class queue wait counters and recent samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self._total = dict.fromkeys(PRIORITY_CLASSES, 0.0)
+        self._max = dict.fromkeys(PRIORITY_CLASSES, 0.0)
+        self._recent = {cls: deque(maxlen=WAIT_SAMPLES) for cls in PRIORITY_CLASSES}
+
+    def record(self, priority: str, wait_sec: float):
+        QUEUE_WAIT.observe(wait_sec, priority=priority)
+        with self._lock:
+            self._count[priority] += 1
+            self._total[priority] += wait_sec
+            self._max[priority] = max(self._max[priority], wait_sec)
+            self._recent[priority].append(wait_sec)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            result = {}
+            for cls in PRIORITY_CLASSES:
+                recent = sorted(self._recent[cls])
+                count = self._count[cls]
+                result[cls] = {
+                    "started": count,
+                    "wait_mean_sec": round(self._total[cls] / count, 3) if count else None,
+                    "wait_p50_sec": _percentile(recent, 0.5),
+                    "wait_p95_sec": _percentile(recent, 0.95),
+                    "wait_max_sec": round(self._max[cls], 3),
+                }
+            return result
+
+
+class FairScheduler:
+    """Worker pool that runs submitted calls in priority / weighted-fair order."""
+
+    def __init__(self, workers: int, weights: dict, thread_name_prefix: str = "job"):
+        self.workers = workers
+        self.weights = weights
+        self.waits = QueueWaitStats()
+        self._thread_name_prefix = thread_name_prefix
+        lock = threading.Lock()
+        self._cond = threading.Condition(lock)
+        # Signalled when a call finishes (for wait_idle), without waking workers
+        self._idle = threading.Condition(lock)
+        self._heaps = {cls: [] for cls in PRIORITY_CLASSES}
+        self._virtual_time = dict.fromkeys(PRIORITY_CLASSES, 0.0)
+        self._last_tag = {cls: {} for cls in PRIORITY_CLASSES}
+        self._seq = itertools.count()
+        self._threads = []
+        self._active = 0
+
+    def submit(self, fn, *args, priority: str = DEFAULT_PRIORITY, tenant: str = "anonymous"):
+        """Queue `fn(*args)`; workers are started on first use."""
+        weight = max(self.weights.get(tenant, 1.0), 1e-6)
+        with self._cond:
+            self._ensure_workers()
+            tag = max(self._virtual_time[priority], self._last_tag[priority].get(tenant, 0.0)) + 1.0 / weight
+            self._last_tag[priority][tenant] = tag
+            heapq.heappush(self._heaps[priority], (tag, next(self._seq), time.monotonic(), fn, args))
+            self._cond.notify()
+
+    def depth(self) -> dict:
+        with self._cond:
+            return {cls: len(heap) for cls, heap in self._heaps.items()}
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Wait until no call is queued or running; False if `timeout` elapsed first."""
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: self._active == 0 and not any(self._heaps.values()),
+                timeout=timeout,
+            )
+
+    def stats(self) -> dict:
+        depth = self.depth()
+        return {cls: {"queued": depth[cls], **waits} for cls, waits in self.waits.snapshot().items()}
+
+    def _ensure_workers(self):
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work,
+                name=f"{self._thread_name_prefix}-{len(self._threads)}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _next(self):
+        with self._cond:
+            while True:
+                for cls in PRIORITY_CLASSES:
+                    heap = self._heaps[cls]
+                    if heap:
+                        tag, _, enqueued_at, fn, args = heapq.heappop(heap)
+                        self._active += 1
+                        self._virtual_time[cls] = tag
+                        if not heap:
+                            # Idle class: restart virtual time so tags stay small
+                            self._virtual_time[cls] = 0.0
+                            self._last_tag[cls].clear()
+                        return cls, enqueued_at, fn, args
+                self._cond.wait()
+
+    def _work(self):
+        while True:
+            priority, enqueued_at, fn, args = self._next()
+            self.waits.record(priority, time.monotonic() - enqueued_at)
+            try:
+                fn(*args)
+            except BaseException:
+                # Includes JobCancelled and SystemExit: the worker must outlive any task
+                log.exception("job.crashed")
+            finally:
+                with self._idle:
+                    self._active -= 1
+                    self._idle.notify_all()
+
+
+JOB_SCHEDULER = FairScheduler(
+    workers=int(os.getenv("JOB_WORKERS", "8")),
+    weights=parse_env_map(os.getenv("SCHEDULER_TENANT_WEIGHTS", "")),
+)
+
+metrics.CallbackGauge(
+    "felix_scheduler_queued_jobs",
+    "Jobs waiting for a worker, by priority class",
+    ("priority",),
+    lambda: {(cls,): depth for cls, depth in JOB_SCHEDULER.depth().items()},
+)
@@ -1,18 +1,25 @@
 from flask import Blueprint, request, jsonify
 import uuid
-from datetime import datetime
 import os
 import sys
-import json
+import time
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../../'))
 
 from app.backend.api.outfits import get_outfit_image
+from app.backend.api.admission import admission_slot, too_busy, unknown_video_model, ADMISSION
+from app.backend.api.scheduler import request_scheduling
+from app.backend.api.idempotency import IDEMPOTENCY, IdempotencyConflict, find_or_register
+from app.backend.api.jobs import ACTIVE_STATUSES, make_job_store, register_runner, dispatch_job, cancel_job, fal_progress_listener, stream_job_events
+from app.backend.api.webhooks import register_completion, webhook_enabled, webhook_url
+from src.core import tracing
+from src.core.log import get_logger
 
 video_bp = Blueprint('video', __name__)
+log = get_logger("video")
 
-VIDEO_JOB_STORE = {}
+VIDEO_JOB_STORE = make_job_store("video")
 
 @video_bp.route('/api/video', methods=['POST'])
 def generate_video():
@@ -24,111 +31,209 @@ def generate_video():
         "outfit_bottom": "Black Jeans",
         "motion_description": "person turns around smiling"
     }
+
+    Returns 202 immediately; progress is available from /api/video/status/<job_id>
+    and as a Server-Sent Events stream from /api/video/status/<job_id>/events.
+    With JOB_RUN_INLINE (serverless) the job runs in the request and the
+    finished job is returned with 200.
     """
     try:
         data = request.json
         job_id = str(uuid.uuid4())
-        
+
         if not data.get('image_file'):
             return jsonify({"error": "image_file required"}), 400
-        
-        from src.services.pipelines.video_pipeline import VideoPipeline
-        
+
+        model_error = unknown_video_model(data)
+        if model_error:
+            return jsonify({"error": model_error}), 400
+
         try:
-            # Build apparel description from outfit names
-            outfit_top = data.get('outfit_top', '')
-            outfit_bottom = data.get('outfit_bottom', '')
-            
-            # Handle full dresses
-            if outfit_top and not outfit_bottom:
-                apparel_desc = outfit_top
-            elif outfit_bottom and not outfit_top:
-                apparel_desc = outfit_bottom
-            elif outfit_top and outfit_bottom:
-                apparel_desc = f"{outfit_top} with {outfit_bottom}"
-            else:
-                apparel_desc = 'casual outfit'
-            
-            print(f"[VIDEO] Image URL: {data.get('image_file')}")
-            print(f"[VIDEO] Apparel: {apparel_desc}")
-            print(f"[VIDEO] Motion: {data.get('motion_description', '')}")
-            
-            VIDEO_JOB_STORE[job_id] = {
-                "status": "processing",
-                "created_at": datetime.now().isoformat(),
-                "data": data
-            }
-            
-            try:
+            priority, tenant = request_scheduling(request, data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        try:
+            existing_id = find_or_register("video", VIDEO_JOB_STORE, request.headers, data, job_id)
+        except IdempotencyConflict as e:
+            return jsonify({"error": str(e)}), 422
+        if existing_id:
+            log.info("job.reused", job_id=existing_id)
+            job = VIDEO_JOB_STORE.get(existing_id) or {"status": "queued"}
+            return jsonify({**_status_payload(existing_id, job), "reused": True}), 200
+
+        ticket, retry_after = ADMISSION.try_admit([data.get('model', 'grok')])
+        if retry_after:
+            log.warning("job.rejected", retry_after_sec=retry_after)
+            IDEMPOTENCY.discard("video", job_id)
+            return too_busy(retry_after)
+
+        VIDEO_JOB_STORE.create(job_id, data=data, priority=priority)
+        if dispatch_job("video", job_id, data, ticket, priority=priority, tenant=tenant):
+            # Ran inline (JOB_RUN_INLINE): answer with the finished job
+            return jsonify(_status_payload(job_id, VIDEO_JOB_STORE.get(job_id))), 200
+
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+    except Exception:
+        log.exception("request.failed")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _video_request_kwargs(data):
+    """Resolve request fields into keyword arguments for VideoPipeline.build_request/run."""
+    # Build apparel description from outfit names
+    outfit_top = data.get('outfit_top', '')
+    outfit_bottom = data.get('outfit_bottom', '')
+
+    # Handle full dresses
+    if outfit_top and not outfit_bottom:
+        apparel_desc = outfit_top
+    elif outfit_bottom and not outfit_top:
+        apparel_desc = outfit_bottom
+    elif outfit_top and outfit_bottom:
+        apparel_desc = f"{outfit_top} with {outfit_bottom}"
+    else:
+        apparel_desc = 'casual outfit'
+
+    return {
+        "reference_image": data['image_file'],
+        "apparel_description": apparel_desc,
+        "motion_description": data.get('motion_description', ''),
+        "duration_sec": int(data.get('duration_sec', 4)),
+        "gender": data.get('gender', 'male'),
+    }
+
+
+def _generate_video(data):
+    """Run VideoPipeline for request `data` and return its result."""
+    from src.services.pipelines.video_pipeline import VideoPipeline
+
+    request_kwargs = _video_request_kwargs(data)
+    model = data.get('model', 'grok')
+    pipeline = VideoPipeline(video_model=model)
+
+    with admission_slot(model):
+        result = pipeline.run(
+            **request_kwargs,
+            no_download=data.get('no_download', False),
+        )
+
+    return result
+
+
+def _run_video_job(job_id, data):
+    """Run the video pipeline for a job and record the outcome in VIDEO_JOB_STORE."""
+    from src.clients.fal_client import queue_listener
+    from src.core.cancellation import JobCancelled, raise_if_cancelled
+    from src.services.pipelines.video_pipeline import VideoPipeline
+
+    # A job cancelled while queued stays cancelled
+    if VIDEO_JOB_STORE.update(job_id, if_status=ACTIVE_STATUSES, status="processing") is None:
+        return
+
+    try:
+        with queue_listener(fal_progress_listener(VIDEO_JOB_STORE, job_id)):
+            if webhook_enabled():
+                # Hand the wait to FAL; /api/fal/webhook completes the job
                 pipeline = VideoPipeline(video_model=data.get('model', 'grok'))
-                gender = data.get('gender', 'male')
-                
-                result = pipeline.run(
-                    reference_image=data['image_file'],
-                    apparel_description=apparel_desc,
-                    motion_description=data.get('motion_description', ''),
-                    duration_sec=int(data.get('duration_sec', 4)),
-                    gender=gender,
-                    no_download=data.get('no_download', False),
-                )
-                
-                print(f"[VIDEO] Full result keys: {result.keys()}")
-                
-                # Extract video URL directly from FAL response
-                video_url = None
-                
-                if result.get('raw_response', {}).get('video', {}).get('url'):
-                    video_url = result['raw_response']['video']['url']
-                    print(f"[VIDEO] Extracted FAL URL: {video_url}")
-                
-                if not video_url:
-                    print(f"[VIDEO] ERROR: Could not extract video URL")
-                    print(f"[VIDEO] Result structure: {json.dumps(result, indent=2, default=str)}")
-                    raise ValueError("Could not extract video URL from FAL response")
-                
-                VIDEO_JOB_STORE[job_id].update({
-                    "status": "completed",
-                    "video_file": video_url,
-                    "latency_sec": result.get('latency_sec', 0)
-                })
-                
-                print(f"[VIDEO] Success: {video_url}")
-                return jsonify({"job_id": job_id, "status": "processing"}), 202
-                
-            except Exception as e:
-                VIDEO_JOB_STORE[job_id].update({
-                    "status": "failed",
-                    "error": str(e)
-                })
-                print(f"[VIDEO] Pipeline error: {e}")
-                import traceback
-                traceback.print_exc()
-                raise
-        
-        except Exception as e:
-            print(f"[VIDEO] Error: {e}")
-            import traceback
-            traceback.print_exc()
-            return jsonify({"error": str(e)}), 500
-    
+                req = pipeline.build_request(**_video_request_kwargs(data))
+                service = pipeline.video_service
+                VIDEO_JOB_STORE.update(job_id, submitted_at=time.time(), traceparent=tracing.current_traceparent())
+                with admission_slot(data.get('model', 'grok')):
+                    service.client.submit(
+                        service.MODEL_NAME,
+                        service.build_arguments(req),
+                        webhook_url=webhook_url("video", job_id),
+                    )
+                log.info("job.submitted", job_id=job_id, webhook=True)
+                return
+
+            result = _generate_video(data)
+
+        raise_if_cancelled()
+        _complete_video_job(job_id, result.get('raw_response') or {}, result.get('latency_sec', 0))
+
+    except JobCancelled:
+        VIDEO_JOB_STORE.update(job_id, if_status=ACTIVE_STATUSES, status="cancelled")
+        log.info("job.cancelled", job_id=job_id)
+
     except Exception as e:
-        print(f"[VIDEO] Outer error: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": "Internal server error"}), 500
+        VIDEO_JOB_STORE.update(job_id, if_status=ACTIVE_STATUSES, status="failed", error=str(e))
+        log.exception("job.failed", job_id=job_id)
 
 
-@video_bp.route('/api/video/status/<job_id>', methods=['GET'])
-def get_video_status(job_id):
-    """GET /api/video/status/<job_id>"""
-    if job_id not in VIDEO_JOB_STORE:
-        return jsonify({"error": "Job not found"}), 404
-    
-    job = VIDEO_JOB_STORE[job_id]
-    return jsonify({
+def _extract_video_url(response):
+    """Extract the video URL directly from a FAL response; raises ValueError if missing."""
+    video_url = None
+
+    if response.get('video', {}).get('url'):
+        video_url = response['video']['url']
+
+    if not video_url:
+        log.error("fal.unexpected_response", response=response)
+        raise ValueError("Could not extract video URL from FAL response")
+
+    return video_url
+
+
+def _complete_video_job(job_id, response, latency_sec):
+    """Mark a job completed from a FAL video response."""
+    video_url = _extract_video_url(response)
+
+    VIDEO_JOB_STORE.update(
+        job_id,
+        if_status=ACTIVE_STATUSES,
+        status="completed",
+        video_file=video_url,
+        latency_sec=latency_sec,
+    )
+
+    log.info("job.completed", job_id=job_id, video_url=video_url, latency_sec=latency_sec)
+
+
+register_runner("video", _run_video_job)
+register_completion("video", VIDEO_JOB_STORE, _complete_video_job)
+
+
+def _status_payload(job_id, job):
+    return {
         "job_id": job_id,
         "status": job['status'],
         "video_file": job.get('video_file'),
         "latency_sec": job.get('latency_sec'),
+        "queue_position": job.get('queue_position'),
+        "progress": job.get('progress'),
         "error": job.get('error')
-    }), 200
\ No newline at end of file
+    }
+
+
+@video_bp.route('/api/video/status/<job_id>', methods=['GET'])
+def get_video_status(job_id):
+    """GET /api/video/status/<job_id>"""
+    job = VIDEO_JOB_STORE.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(_status_payload(job_id, job)), 200
+
+
+@video_bp.route('/api/video/status/<job_id>', methods=['DELETE'])
+def cancel_video_job(job_id):
+    """DELETE /api/video/status/<job_id> - cancel the job and its FAL request"""
+    job, status_code = cancel_job(VIDEO_JOB_STORE, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if status_code == 409:
+        return jsonify({**_status_payload(job_id, job), "error": "Job already finished"}), 409
+
+    return jsonify(_status_payload(job_id, job)), 200
+
+
+@video_bp.route('/api/video/status/<job_id>/events', methods=['GET'])
+def stream_video_status(job_id):
+    """GET /api/video/status/<job_id>/events - Server-Sent Events stream of job updates"""
+    if job_id not in VIDEO_JOB_STORE:
+        return jsonify({"error": "Job not found"}), 404
+
+    return stream_job_events(VIDEO_JOB_STORE, job_id, _status_payload)
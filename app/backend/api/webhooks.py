@@ -0,0 +1,111 @@
+"""FAL webhook completion mode.
+
+When FAL_WEBHOOK_BASE_URL is set (the public URL of this backend), jobs are
+submitted to FAL with a webhook pointing at /api/fal/webhook instead of
+blocking a worker thread on `subscribe`. The callback URL carries the job
+reference and an HMAC token, so only FAL requests we created can complete a
+job. FAL_WEBHOOK_SECRET sets the signing key; without it a per-process key
+is used, which only works while a single backend process handles callbacks.
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from urllib.parse import urlencode
+
+from flask import Blueprint, request, jsonify
+
+from app.backend.api.jobs import ACTIVE_STATUSES, TERMINAL_STATUSES
+from src.core import tracing
+from src.core.log import get_logger
+
+webhooks_bp = Blueprint('webhooks', __name__)
+log = get_logger("webhook")
+
+WEBHOOK_BASE_URL = os.getenv("FAL_WEBHOOK_BASE_URL", "").rstrip("/")
+_SECRET = os.getenv("FAL_WEBHOOK_SECRET") or secrets.token_hex(32)
+
+# kind -> (store, complete_fn) registered by the job blueprints
+COMPLETION_HANDLERS = {}
+
+
+def register_completion(kind: str, store, complete_fn):
+    """
+    Route webhook completions for `kind` jobs to `complete_fn(job_id, response, latency_sec)`.
+
+    `complete_fn` raises ValueError when the FAL response has no usable output.
+    """
+    COMPLETION_HANDLERS[kind] = (store, complete_fn)
+
+
+def webhook_enabled() -> bool:
+    return bool(WEBHOOK_BASE_URL)
+
+
+def _sign(kind: str, job_id: str) -> str:
+    return hmac.new(_SECRET.encode(), f"{kind}:{job_id}".encode(), hashlib.sha256).hexdigest()
+
+
+def webhook_url(kind: str, job_id: str) -> str:
+    query = urlencode({"kind": kind, "job_id": job_id, "token": _sign(kind, job_id)})
+    return f"{WEBHOOK_BASE_URL}/api/fal/webhook?{query}"
+
+
+@webhooks_bp.route('/api/fal/webhook', methods=['POST'])
+def fal_webhook():
+    """
+    POST /api/fal/webhook?kind=<image|video>&job_id=<id>&token=<hmac>
+    Body: {
+        "request_id": "<FAL request id>",
+        "status": "OK" | "ERROR",
+        "payload": {...},
+        "error": null
+    }
+    """
+    kind = request.args.get('kind', '')
+    job_id = request.args.get('job_id', '')
+    token = request.args.get('token', '')
+
+    if kind not in COMPLETION_HANDLERS or not hmac.compare_digest(token, _sign(kind, job_id)):
+        return jsonify({"error": "Invalid webhook token"}), 403
+
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or body.get('status') not in ('OK', 'ERROR'):
+        return jsonify({"error": "Malformed webhook payload"}), 400
+
+    store, complete_fn = COMPLETION_HANDLERS[kind]
+    job = store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    expected_request_id = job.get('fal_request_id')
+    if expected_request_id and body.get('request_id') != expected_request_id:
+        return jsonify({"error": "request_id does not match job"}), 409
+
+    # FAL retries deliveries; completing twice must be a no-op
+    if job['status'] in TERMINAL_STATUSES:
+        return jsonify({"job_id": job_id, "status": job['status']}), 200
+
+    latency = time.time() - job.get('submitted_at', time.time())
+
+    from src.clients.fal_client import FAL_DURATION, FAL_REQUESTS
+    model = job.get('fal_model', '')
+    FAL_REQUESTS.inc(model=model, outcome="ok" if body['status'] == 'OK' else "error")
+    FAL_DURATION.observe(latency, model=model)
+
+    # Continue the job's trace: the FAL wait, then the completion work
+    with tracing.resume(job.get('traceparent')):
+        tracing.record_span("fal.webhook_wait", time.time() - latency, time.time(), model=model)
+        with tracing.span("webhook.complete", job_id=job_id, fal_status=body['status']):
+            if body['status'] == 'OK':
+                try:
+                    complete_fn(job_id, body.get('payload') or {}, latency)
+                except ValueError as e:
+                    store.update(job_id, if_status=ACTIVE_STATUSES, status="failed", error=str(e))
+            else:
+                store.update(job_id, if_status=ACTIVE_STATUSES, status="failed", error=body.get('error') or "FAL request failed")
+
+    log.info("webhook.received", kind=kind, job_id=job_id, fal_status=body['status'])
+    return jsonify({"job_id": job_id, "status": store.get(job_id)['status']}), 200
@@ -0,0 +1,367 @@
+"""
+ASGI variant of the backend API.
+
+Serves the same routes and request/response contracts as wsgi.py
+(generate, video, status, SSE events, health) but runs generations as
+asyncio tasks on the async FAL client, so a single worker process can hold
+thousands of in-flight jobs and open event streams without a thread each.
+
+Run with:
+    uvicorn app.backend.asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.backend.api import generate, video
+from app.backend.api.admission import ADMISSION, admission_slot_async, unknown_video_model
+from app.backend.api.idempotency import IDEMPOTENCY, IdempotencyConflict, find_or_register
+from app.backend.api.jobs import (
+    ACTIVE_STATUSES,
+    STREAM_HEARTBEAT_SEC,
+    STREAM_MAX_SEC,
+    TERMINAL_STATUSES,
+    cancel_job,
+    fal_progress_listener,
+    job_cancel_token,
+    last_event_version,
+    local_job_ids,
+    release_cancel_token,
+    sse_event,
+)
+from app.backend.api.lifecycle import DRAIN_TIMEOUT_SEC
+from src.core.log import get_logger
+
+log = get_logger("asgi")
+
+# Strong references to running job tasks so they are not garbage collected
+_TASKS = set()
+
+
+class JobWatcher:
+    """Wakes asyncio waiters when a JobStore changes, from any thread."""
+
+    def __init__(self):
+        self._loop = None
+        self._waiters = defaultdict(set)
+
+    def attach(self, loop, *stores):
+        self._loop = loop
+        for store in stores:
+            store.add_listener(self._on_change)
+
+    def _on_change(self, job_id, job):
+        if self._loop is not None and job_id in self._waiters:
+            self._loop.call_soon_threadsafe(self._wake, job_id)
+
+    def _wake(self, job_id):
+        for event in self._waiters.get(job_id, ()):
+            event.set()
+
+    def register(self, job_id) -> asyncio.Event:
+        event = asyncio.Event()
+        self._waiters[job_id].add(event)
+        return event
+
+    def unregister(self, job_id, event):
+        waiters = self._waiters.get(job_id)
+        if waiters is not None:
+            waiters.discard(event)
+            if not waiters:
+                del self._waiters[job_id]
+
+
+WATCHER = JobWatcher()
+
+
+def _spawn(job_id, coro, ticket=None):
+    task = asyncio.create_task(_admitted(job_id, coro, ticket))
+    _TASKS.add(task)
+    task.add_done_callback(_TASKS.discard)
+
+
+async def _admitted(job_id, coro, ticket):
+    """Run a job coroutine with its admission ticket and cancel token."""
+    from src.core.cancellation import JobCancelled, cancellation
+
+    token = job_cancel_token(job_id)
+    if token.cancelled:
+        coro.close()
+        if ticket is not None:
+            ticket.close()
+        return
+
+    # Cancelling the job cancels the task, which aborts the FAL wait
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    token.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+    try:
+        with cancellation(token):
+            if ticket is None:
+                await coro
+            else:
+                with ticket.bound():
+                    await coro
+    except (asyncio.CancelledError, JobCancelled):
+        if not token.cancelled:
+            raise
+    finally:
+        release_cancel_token(job_id)
+
+
+def _too_busy(retry_after):
+    return JSONResponse(
+        {"error": "Server is at capacity, retry later", "retry_after_sec": retry_after},
+        status_code=429,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+async def _read_json(request: Request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def _run_generate_job(job_id, data):
+    from src.clients.fal_client import queue_listener
+    from src.services.pipelines.image_pipeline import ImagePipeline
+
+    store = generate.JOB_STORE
+
+    try:
+        # A job cancelled while queued stays cancelled
+        if store.update(job_id, if_status=ACTIVE_STATUSES, status="processing") is None:
+            return
+        _, _, env, outfit_refs = generate._image_inputs(data)
+        pipeline = ImagePipeline()
+        service = pipeline.edit_service
+        req = pipeline.build_request(env, data['person_image'], outfit_refs)
+        # Reads local references into data URIs; keep file I/O off the event loop
+        arguments = await asyncio.to_thread(service.build_arguments, req)
+
+        async with admission_slot_async("image"):
+            start_time = time.time()
+            with queue_listener(fal_progress_listener(store, job_id)):
+                response = await service.client.subscribe_async(service.MODEL_NAME, arguments)
+
+        generate._complete_generate_job(job_id, response or {}, time.time() - start_time)
+
+    except Exception as e:
+        store.update(job_id, if_status=ACTIVE_STATUSES, status="failed", error=str(e))
+        log.exception("job.failed", job_id=job_id, kind="image")
+
+
+async def _run_video_job(job_id, data):
+    from src.clients.fal_client import queue_listener
+    from src.services.pipelines.video_pipeline import VideoPipeline
+
+    store = video.VIDEO_JOB_STORE
+
+    try:
+        if store.update(job_id, if_status=ACTIVE_STATUSES, status="processing") is None:
+            return
+        request_kwargs = video._video_request_kwargs(data)
+        pipeline = VideoPipeline(video_model=data.get('model', 'grok'))
+        service = pipeline.video_service
+        req = pipeline.build_request(**request_kwargs)
+        arguments = await asyncio.to_thread(service.build_arguments, req)
+
+        async with admission_slot_async(data.get('model', 'grok')):
+            start_time = time.time()
+            with queue_listener(fal_progress_listener(store, job_id)):
+                response = await service.client.subscribe_async(service.MODEL_NAME, arguments)
+
+        video._complete_video_job(job_id, response or {}, time.time() - start_time)
+
+    except Exception as e:
+        store.update(job_id, if_status=ACTIVE_STATUSES, status="failed", error=str(e))
+        log.exception("job.failed", job_id=job_id, kind="video")
+
+
+async def generate_image(request: Request):
+    """POST /api/generate - same body and 202 response as the Flask route"""
+    data = await _read_json(request)
+    if data is None:
+        return JSONResponse({"error": "Invalid JSON body"}, status_code=400)
+    if not data.get('person_image'):
+        return JSONResponse({"error": "person_image required"}, status_code=400)
+
+    job_id = str(uuid.uuid4())
+    try:
+        existing_id = find_or_register("image", generate.JOB_STORE, request.headers, data, job_id)
+    except IdempotencyConflict as e:
+        return JSONResponse({"error": str(e)}, status_code=422)
+    if existing_id:
+        job = generate.JOB_STORE.get(existing_id) or {"status": "queued"}
+        return JSONResponse({**generate._status_payload(existing_id, job), "reused": True})
+
+    ticket, retry_after = ADMISSION.try_admit(["image"])
+    if retry_after:
+        IDEMPOTENCY.discard("image", job_id)
+        return _too_busy(retry_after)
+
+    generate.JOB_STORE.create(job_id, data=data)
+    _spawn(job_id, _run_generate_job(job_id, data), ticket)
+    return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202)
+
+
+async def generate_video(request: Request):
+    """POST /api/video - same body and 202 response as the Flask route"""
+    data = await _read_json(request)
+    if data is None:
+        return JSONResponse({"error": "Invalid JSON body"}, status_code=400)
+    if not data.get('image_file'):
+        return JSONResponse({"error": "image_file required"}, status_code=400)
+    model_error = unknown_video_model(data)
+    if model_error:
+        return JSONResponse({"error": model_error}, status_code=400)
+
+    job_id = str(uuid.uuid4())
+    try:
+        existing_id = find_or_register("video", video.VIDEO_JOB_STORE, request.headers, data, job_id)
+    except IdempotencyConflict as e:
+        return JSONResponse({"error": str(e)}, status_code=422)
+    if existing_id:
+        job = video.VIDEO_JOB_STORE.get(existing_id) or {"status": "queued"}
+        return JSONResponse({**video._status_payload(existing_id, job), "reused": True})
+
+    ticket, retry_after = ADMISSION.try_admit([data.get('model', 'grok')])
+    if retry_after:
+        IDEMPOTENCY.discard("video", job_id)
+        return _too_busy(retry_after)
+
+    video.VIDEO_JOB_STORE.create(job_id, data=data)
+    _spawn(job_id, _run_video_job(job_id, data), ticket)
+    return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202)
+
+
+def _status_route(store, view):
+    async def get_status(request: Request):
+        job_id = request.path_params['job_id']
+        job = store.get(job_id)
+        if job is None:
+            return JSONResponse({"error": "Job not found"}, status_code=404)
+        return JSONResponse(view(job_id, job))
+
+    return get_status
+
+
+def _events_route(store, view):
+    async def stream_status(request: Request):
+        job_id = request.path_params['job_id']
+        if job_id not in store:
+            return JSONResponse({"error": "Job not found"}, status_code=404)
+
+        async def events():
+            version = last_event_version(request.headers)
+            deadline = time.monotonic() + STREAM_MAX_SEC
+            while time.monotonic() < deadline:
+                # Register before reading so a change in between still wakes us
+                waiter = WATCHER.register(job_id)
+                try:
+                    job = store.get(job_id)
+                    if job is None:
+                        return
+                    if job["version"] == version:
+                        try:
+                            await asyncio.wait_for(waiter.wait(), timeout=STREAM_HEARTBEAT_SEC)
+                        except asyncio.TimeoutError:
+                            yield ": keep-alive\n\n"
+                        continue
+                finally:
+                    WATCHER.unregister(job_id, waiter)
+
+                version = job["version"]
+                yield sse_event(job_id, job, view)
+                if job["status"] in TERMINAL_STATUSES:
+                    return
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return stream_status
+
+
+def _cancel_route(store, view):
+    async def cancel(request: Request):
+        job_id = request.path_params['job_id']
+        job, status_code = cancel_job(store, job_id)
+        if job is None:
+            return JSONResponse({"error": "Job not found"}, status_code=404)
+        if status_code == 409:
+            return JSONResponse({**view(job_id, job), "error": "Job already finished"}, status_code=409)
+        return JSONResponse(view(job_id, job))
+
+    return cancel
+
+
+async def health(request: Request):
+    if ADMISSION.draining:
+        return JSONResponse({"status": "draining"}, status_code=503)
+    return JSONResponse({"status": "ok"})
+
+
+async def root(request: Request):
+    return JSONResponse({"message": "Apparel Pipeline API"})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    WATCHER.attach(asyncio.get_running_loop(), generate.JOB_STORE, video.VIDEO_JOB_STORE)
+    yield
+    # Shutdown: stop admitting and give running jobs time to finish
+    ADMISSION.drain()
+    if _TASKS:
+        log.info("drain.started", jobs=len(_TASKS), timeout_sec=DRAIN_TIMEOUT_SEC)
+        _, pending = await asyncio.wait(set(_TASKS), timeout=DRAIN_TIMEOUT_SEC)
+        if pending:
+            log.warning("drain.timeout", jobs=len(pending), lost_jobs=local_job_ids())
+
+
+routes = [
+    Route('/api/generate', generate_image, methods=['POST']),
+    Route('/api/status/{job_id}', _status_route(generate.JOB_STORE, generate._status_payload), methods=['GET']),
+    Route('/api/status/{job_id}', _cancel_route(generate.JOB_STORE, generate._status_payload), methods=['DELETE']),
+    Route('/api/status/{job_id}/events', _events_route(generate.JOB_STORE, generate._status_payload), methods=['GET']),
+    Route('/api/video', generate_video, methods=['POST']),
+    Route('/api/video/status/{job_id}', _status_route(video.VIDEO_JOB_STORE, video._status_payload), methods=['GET']),
+    Route('/api/video/status/{job_id}', _cancel_route(video.VIDEO_JOB_STORE, video._status_payload), methods=['DELETE']),
+    Route('/api/video/status/{job_id}/events', _events_route(video.VIDEO_JOB_STORE, video._status_payload), methods=['GET']),
+    Route('/api/health', health, methods=['GET']),
+    Route('/', root, methods=['GET']),
+]
+
+app = Starlette(
+    routes=routes,
+    lifespan=lifespan,
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+            allow_headers=["Content-Type", "X-Tenant-ID", "X-API-Key", "Idempotency-Key"],
+            expose_headers=["Retry-After"],
+        )
+    ],
+)
@@ -0,0 +1,225 @@
+"""
+Standalone job worker processes.
+
+Consume the durable SQLite job queue so generation capacity scales
+independently of the HTTP tier. API and workers must share JOB_QUEUE_DB:
+
+    JOB_QUEUE_DB=outputs/jobs.db python app/backend/wsgi.py
+    JOB_QUEUE_DB=outputs/jobs.db python app/backend/worker.py --processes 4 --threads 2
+
+On SIGTERM a worker stops claiming, lets running jobs finish for up to
+DRAIN_TIMEOUT_SEC and hands the rest back to the queue without counting
+the attempt. Their FAL request ids are already on the job (`fal_requests`),
+so whichever worker claims them next polls those requests instead of
+submitting new ones. Jobs leased by worker processes on this host that died
+without draining are released at startup; others come back when their
+lease expires.
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
+
+from app.backend.api import generate, generate_video, video  # registers the job runners
+from app.backend.api.jobs import ACTIVE_STATUSES, JOB_QUEUE_DB, JOB_RUNNERS, TERMINAL_STATUSES, job_cancel_token, run_cancellable
+from app.backend.api.job_queue import SqliteJobQueue, VISIBILITY_TIMEOUT_SEC, MAX_ATTEMPTS, reset_connections
+from app.backend.api.lifecycle import DRAIN_TIMEOUT_SEC
+from src.clients.fal_client import resume_requests
+from src.core import log as event_log
+from src.core.log import get_logger
+
+log = get_logger("worker")
+
+IDLE_SLEEP_SEC = 0.5
+RETRY_DELAY_SEC = 5.0
+
+# How often a running job is checked for cancellation through the API
+CANCEL_POLL_SEC = 1.0
+
+# job_id -> worker_id of jobs running in this process
+_IN_FLIGHT = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+STORES = {
+    "image": generate.JOB_STORE,
+    "video": video.VIDEO_JOB_STORE,
+    "image_video": generate_video.PIPELINE_JOB_STORE,
+}
+
+
+def _heartbeat(queue, store, job_id, worker_id, done: threading.Event):
+    """Keep the lease on `job_id` alive and watch for cancellation until `done` is set."""
+    next_beat = time.monotonic() + VISIBILITY_TIMEOUT_SEC / 3
+    while not done.wait(CANCEL_POLL_SEC):
+        job = store.get(job_id)
+        if job is not None and job["status"] == "cancelled":
+            job_cancel_token(job_id).cancel()
+
+        if time.monotonic() >= next_beat:
+            next_beat = time.monotonic() + VISIBILITY_TIMEOUT_SEC / 3
+            if not queue.heartbeat(job_id, worker_id):
+                log.warning("worker.lease_lost", worker_id=worker_id, job_id=job_id)
+                return
+
+
+def _process(queue, claim, worker_id):
+    job_id, kind = claim["job_id"], claim["kind"]
+    store = STORES[kind]
+
+    job = store.get(job_id)
+    if job is None or job["status"] in TERMINAL_STATUSES:
+        # Redelivery of a job that already finished
+        queue.ack(job_id, worker_id)
+        return
+
+    if claim["attempts"] > MAX_ATTEMPTS:
+        store.update(job_id, if_status=ACTIVE_STATUSES, status="failed", error=f"Gave up after {MAX_ATTEMPTS} attempts")
+        queue.bury(job_id)
+        return
+
+    # FAL requests submitted by an earlier, interrupted run of this job
+    handles = job.get("fal_requests") or {}
+    log.info(
+        "job.resumed" if handles else "job.started",
+        worker_id=worker_id, job_id=job_id, kind=kind, priority=claim['priority'],
+        attempt=claim['attempts'], queue_wait_sec=round(claim['queue_wait_sec'], 1),
+        fal_requests=handles or None,
+    )
+    done = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(queue, store, job_id, worker_id, done), daemon=True)
+    beat.start()
+    with _IN_FLIGHT_LOCK:
+        _IN_FLIGHT[job_id] = worker_id
+    try:
+        with resume_requests(handles):
+            run_cancellable(JOB_RUNNERS[kind], job_id, claim["payload"])
+    finally:
+        done.set()
+        beat.join()
+
+    queue.ack(job_id, worker_id)
+    with _IN_FLIGHT_LOCK:
+        _IN_FLIGHT.pop(job_id, None)
+
+
+def _worker_thread(worker_id: str, stopping: threading.Event):
+    queue = SqliteJobQueue(JOB_QUEUE_DB)
+    while not stopping.is_set():
+        claim = queue.claim(worker_id)
+        if claim is None:
+            stopping.wait(IDLE_SLEEP_SEC)
+            continue
+        try:
+            _process(queue, claim, worker_id)
+        except Exception:
+            log.exception("job.crashed", worker_id=worker_id, job_id=claim['job_id'])
+            queue.release(claim["job_id"], worker_id, delay=RETRY_DELAY_SEC)
+
+
+def run_worker_process(threads: int):
+    """Run `threads` queue consumers in this process until SIGTERM/SIGINT."""
+    # The SQLite connection opened at import belongs to the parent process
+    reset_connections()
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    workers = [
+        threading.Thread(target=_worker_thread, args=(f"{prefix}:{i}", stopping), name=f"worker-{i}")
+        for i in range(threads)
+    ]
+    for t in workers:
+        t.start()
+    log.info("worker.started", worker=prefix, threads=threads)
+    while not stopping.wait(1.0):
+        pass
+
+    # Drain: no new claims; running jobs get DRAIN_TIMEOUT_SEC to finish
+    deadline = time.monotonic() + DRAIN_TIMEOUT_SEC
+    for t in workers:
+        t.join(max(0.0, deadline - time.monotonic()))
+
+    with _IN_FLIGHT_LOCK:
+        interrupted = dict(_IN_FLIGHT)
+    if interrupted:
+        queue = SqliteJobQueue(JOB_QUEUE_DB)
+        for job_id, worker_id in interrupted.items():
+            queue.hand_back(job_id, worker_id)
+        log.warning("worker.handed_back", worker=prefix, jobs=list(interrupted))
+        event_log.flush()
+        # Leave the FAL requests running; the next worker resumes them
+        os._exit(0)
+    log.info("worker.stopped", worker=prefix)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _recover_orphans(queue):
+    """Release jobs leased by worker processes on this host that are no longer running."""
+    host = socket.gethostname()
+    for job_id, owner in queue.leases():
+        try:
+            owner_host, pid, _ = (owner or "").rsplit(":", 2)
+        except ValueError:
+            continue
+        if owner_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+            queue.release(job_id, owner)
+            log.info("job.recovered", job_id=job_id, owner=owner)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run generation worker processes.")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("JOB_WORKER_PROCESSES", "2")))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("JOB_WORKER_THREADS", "1")))
+    args = parser.parse_args()
+
+    if not JOB_QUEUE_DB:
+        sys.exit("JOB_QUEUE_DB must be set to the queue database shared with the API")
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    def spawn():
+        proc = multiprocessing.Process(target=run_worker_process, args=(args.threads,))
+        proc.start()
+        return proc
+
+    _recover_orphans(SqliteJobQueue(JOB_QUEUE_DB))
+    procs = [spawn() for _ in range(args.processes)]
+
+    # Supervise: replace workers that die unexpectedly
+    while not stopping.is_set():
+        for i, proc in enumerate(procs):
+            if not proc.is_alive():
+                log.warning("worker.restarted", pid=proc.pid, exit_code=proc.exitcode)
+                _recover_orphans(SqliteJobQueue(JOB_QUEUE_DB))
+                procs[i] = spawn()
+        stopping.wait(1.0)
+
+    for proc in procs:
+        if proc.is_alive():
+            os.kill(proc.pid, signal.SIGTERM)
+    for proc in procs:
+        proc.join()
+
+
+if __name__ == "__main__":
+    main()
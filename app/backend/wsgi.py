@@ -4,32 +4,121 @@ import sys
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
 
-from flask import Flask, jsonify
+import time
+
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 
+from src.core import metrics, tracing
+
 app = Flask(__name__)
 
+HTTP_REQUESTS = metrics.Counter("felix_http_requests_total", "API requests", ("method", "route", "status"))
+HTTP_DURATION = metrics.Histogram(
+    "felix_http_request_duration_seconds", "Time to produce an API response", ("method", "route")
+)
+
 # CORS configuration
 CORS(app, 
      resources={
          r"/api/*": {
              "origins": "*",
-             "methods": ["GET", "POST", "OPTIONS"],
-             "allow_headers": ["Content-Type"]
+             "methods": ["GET", "POST", "DELETE", "OPTIONS"],
+             "allow_headers": ["Content-Type", "X-Tenant-ID", "X-API-Key", "Idempotency-Key", "If-None-Match", "traceparent"],
+             "expose_headers": ["Retry-After", "ETag", "X-Trace-Id"]
          }
      })
 
 # Import blueprints
 from app.backend.api.generate import generate_bp
 from app.backend.api.video import video_bp
+from app.backend.api.generate_video import generate_video_bp
+from app.backend.api.webhooks import webhooks_bp
+from app.backend.api.batch import batch_bp
+from app.backend.api.outfits import outfits_bp
+from app.backend.api.lifecycle import draining, install_drain_handler
 
 app.register_blueprint(generate_bp)
 app.register_blueprint(video_bp)
+app.register_blueprint(generate_video_bp)
+app.register_blueprint(webhooks_bp)
+app.register_blueprint(batch_bp)
+app.register_blueprint(outfits_bp)
+
+# SIGTERM: stop admitting, let running jobs finish, then shut down
+install_drain_handler()
+
+# Status polls, event streams and scrapes get no trace of their own: they are
+# frequent enough to push running job traces out of the in-memory buffer
+_UNTRACED_ROUTES = {
+    "/api/health", "/api/metrics", "/api/scheduler/stats",
+    "/api/jobs/status", "/api/batch/<batch_id>", "/api/jobs/<job_id>/timeline",
+}
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+def _traced(route):
+    return not (request.method == "GET" and (route in _UNTRACED_ROUTES or "/status/" in route))
+
+
+@app.before_request
+def _start_request():
+    g.request_start = time.perf_counter()
+    if not _traced(_route()):
+        return
+    # Continue the caller's trace when it sends a traceparent header
+    g.trace_span, g.trace_token = tracing.start_span(
+        f"{request.method} {_route()}",
+        request.headers.get('traceparent'),
+        method=request.method,
+        route=_route(),
+    )
+
+
+@app.after_request
+def _record_request(response):
+    route = _route()
+    HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    HTTP_DURATION.observe(time.perf_counter() - g.get('request_start', time.perf_counter()), method=request.method, route=route)
+    if 'trace_span' in g:
+        g.trace_span.set(status_code=response.status_code)
+        response.headers['X-Trace-Id'] = g.trace_span.trace_id
+    return response
+
+
+@app.teardown_request
+def _end_request(error=None):
+    if 'trace_span' in g:
+        if error is not None:
+            g.trace_span.fail("error", f"{type(error).__name__}: {error}")
+        tracing.finish_span(g.pop('trace_span'), g.pop('trace_token'))
+
 
 @app.route('/api/health', methods=['GET'])
 def health():
+    if draining():
+        return jsonify({"status": "draining"}), 503
     return jsonify({"status": "ok"}), 200
 
+@app.route('/api/scheduler/stats', methods=['GET'])
+def scheduler_stats():
+    """Queue depth and queue wait per priority class"""
+    from app.backend.api.jobs import JOB_QUEUE_DB
+    if JOB_QUEUE_DB:
+        from app.backend.api.job_queue import SqliteJobQueue
+        return jsonify(SqliteJobQueue(JOB_QUEUE_DB).wait_stats()), 200
+
+    from app.backend.api.scheduler import JOB_SCHEDULER
+    return jsonify(JOB_SCHEDULER.stats()), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition of this process's metrics"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route('/', methods=['GET'])
 def root():
     return jsonify({"message": "Apparel Pipeline API"}), 200
@@ -1,6 +1,6 @@
 'use client';
 
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import CaptureScreen from '@/components/CaptureScreen';
 import GenderScreen from '@/components/GenderScreen';
 import SelectScreen from '@/components/SelectScreen';
@@ -10,6 +10,7 @@ import ResultScreen from '@/components/ResultScreen';
 type Step = 'capture' | 'gender' | 'select' | 'loading' | 'result';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || '';
+const MAX_BUSY_RETRIES = 5;
 
 export default function Home() {
   const [step, setStep] = useState<Step>('capture');
@@ -22,6 +23,19 @@ export default function Home() {
   });
   const [generatedVideo, setGeneratedVideo] = useState<string>('');
   const [loadingMessage, setLoadingMessage] = useState<string>('Generating your content...');
+  const [previewImage, setPreviewImage] = useState<string>('');
+  // Status URL of the job in flight, cancelled if the user leaves the page
+  const activeJobUrl = useRef<string | null>(null);
+
+  useEffect(() => {
+    const cancelActiveJob = () => {
+      if (activeJobUrl.current) {
+        fetch(activeJobUrl.current, { method: 'DELETE', keepalive: true });
+      }
+    };
+    window.addEventListener('pagehide', cancelActiveJob);
+    return () => window.removeEventListener('pagehide', cancelActiveJob);
+  }, []);
 
   const handleCapture = (image: string) => {
     setPersonImage(image);
@@ -36,6 +50,7 @@ export default function Home() {
   const handleSelect = (selected: typeof selections) => {
     setSelections(selected);
     setStep('loading');
+    setPreviewImage('');
     generateContent(selected);
   };
 
@@ -68,82 +83,137 @@ export default function Home() {
         background: selected.background
       });
 
-      // Generate image
-      const generateUrl = '/api/generate';
+      // Generate image and video in one server-side job
+      const generateUrl = '/api/generate-video';
       console.log('POST to:', generateUrl);
-      
-      const imgRes = await fetch(generateUrl, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          person_image: personImage,
-          gender: gender,
-          outfit_top: outfit_top,
-          outfit_bottom: outfit_bottom,
-          background: selected.background,
-          environment: 'professional lighting, studio'
-        })
-      });
 
-      console.log('Image generation response status:', imgRes.status);
-      
-      if (!imgRes.ok) {
-        const errorData = await imgRes.json();
-        console.error('Image generation error:', errorData);
-        throw new Error(`Image generation failed: ${imgRes.status} - ${errorData.error || 'Unknown error'}`);
-      }
+      const idempotencyKey = crypto.randomUUID();
+      const submitJob = () =>
+        fetch(generateUrl, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+            // Retries of this submission attach to the same job
+            'Idempotency-Key': idempotencyKey
+          },
+          body: JSON.stringify({
+            person_image: personImage,
+            gender: gender,
+            outfit_top: outfit_top,
+            outfit_bottom: outfit_bottom,
+            background: selected.background,
+            environment: 'professional lighting, studio',
+            motion_description: gender === 'male' 
+              ? 'man stands still, turns around slowly 360 degrees to show full outfit, stands facing forward, confident posture, no adjusting clothes' 
+              : 'woman stands still, turns around slowly 360 degrees to show full outfit, stands facing forward, elegant posture, keeps hands at sides, no touching or adjusting clothes, no lifting or moving fabric',
+            model: 'grok',
+            duration_sec: 4
+          })
+        });
 
-      const imgJob = await imgRes.json();
-      console.log('Image job ID:', imgJob.job_id);
-      
-      const imageFile = await pollJobStatus(imgJob.job_id, `${API_BASE_URL}/api/status`, 'Creating...');
-      
-      console.log('Generated image file:', imageFile);
-      setLoadingMessage('Generating video animation...');
+      // The API answers 429 with Retry-After while it is at capacity
+      let jobRes = await submitJob();
+      for (let attempt = 0; jobRes.status === 429 && attempt < MAX_BUSY_RETRIES; attempt++) {
+        const retryAfter = Number(jobRes.headers.get('Retry-After')) || 5;
+        setLoadingMessage(`Server is busy, retrying in ${retryAfter}s...`);
+        await new Promise((r) => setTimeout(r, retryAfter * 1000));
+        setLoadingMessage('Creating photorealistic portrait...');
+        jobRes = await submitJob();
+      }
 
-      // Generate video with gender parameter
-      const videoUrl = '/api/video';
-      console.log('POST to:', videoUrl);
-      
-      const vidRes = await fetch(videoUrl, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          image_file: imageFile,
-          gender: gender,
-          outfit_top: selected.top,
-          outfit_bottom: selected.bottom,
-          motion_description: gender === 'male' 
-            ? 'man stands still, turns around slowly 360 degrees to show full outfit, stands facing forward, confident posture, no adjusting clothes' 
-            : 'woman stands still, turns around slowly 360 degrees to show full outfit, stands facing forward, elegant posture, keeps hands at sides, no touching or adjusting clothes, no lifting or moving fabric',
-          model: 'grok',
-          duration_sec: 4
-        })
-      });
+      console.log('Generation response status:', jobRes.status);
 
-      console.log('Video generation response status:', vidRes.status);
-      
-      if (!vidRes.ok) {
-        const errorData = await vidRes.json();
-        console.error('Video generation error:', errorData);
-        throw new Error(`Video generation failed: ${vidRes.status} - ${errorData.error || 'Unknown error'}`);
+      if (!jobRes.ok) {
+        const errorData = await jobRes.json();
+        console.error('Generation error:', errorData);
+        throw new Error(`Generation failed: ${jobRes.status} - ${errorData.error || 'Unknown error'}`);
       }
 
-      const vidJob = await vidRes.json();
-      console.log('Video job ID:', vidJob.job_id);
-      
-      const videoFile = await pollJobStatus(vidJob.job_id, `${API_BASE_URL}/api/video/status`, 'Rendering video...');
+      const job = await jobRes.json();
+      console.log('Job ID:', job.job_id);
+
+      let videoFile: string;
+      if (job.status === 'completed') {
+        // Serverless deploys run the job inside the request and return its result
+        videoFile = job.video_file || job.image_file;
+      } else if (job.status === 'failed' || job.status === 'cancelled') {
+        throw new Error(job.error || `Job ${job.status}`);
+      } else {
+        activeJobUrl.current = `${API_BASE_URL}/api/generate-video/status/${job.job_id}`;
+        videoFile = await waitForJob(job.job_id, `${API_BASE_URL}/api/generate-video/status`, 'Creating...');
+        activeJobUrl.current = null;
+      }
 
       console.log('Generated video file:', videoFile);
       setGeneratedVideo(videoFile);
       setStep('result');
     } catch (error) {
+      activeJobUrl.current = null;
       console.error('Generation failed:', error);
       alert(`Error: ${error instanceof Error ? error.message : 'Unknown error'}`);
       setStep('select');
     }
   };
 
+  const describeProgress = (message: string, data: any) => {
+    if (data.stage === 'video') {
+      message = 'Generating video animation...';
+    }
+    if (data.queue_position !== null && data.queue_position !== undefined) {
+      return `${message} (queue position ${data.queue_position + 1})`;
+    }
+    return data.progress ? `${message} (${data.progress})` : message;
+  };
+
+  // Follow a job over Server-Sent Events; fall back to polling if streaming is unavailable.
+  const waitForJob = (
+    jobId: string,
+    statusUrl: string,
+    message: string
+  ): Promise<string> => {
+    if (typeof EventSource === 'undefined') {
+      return pollJobStatus(jobId, statusUrl, message);
+    }
+
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${statusUrl}/${jobId}/events`);
+      let settled = false;
+
+      const handleUpdate = (event: MessageEvent) => {
+        const data = JSON.parse(event.data);
+        console.log(`Job ${jobId} status:`, data.status);
+
+        if (data.status === 'completed') {
+          settled = true;
+          source.close();
+          resolve(data.video_file || data.image_file);
+        } else if (data.status === 'failed' || data.status === 'cancelled') {
+          settled = true;
+          source.close();
+          reject(new Error(data.error || `Job ${data.status}`));
+        } else {
+          if (data.image_file) {
+            // Combined jobs publish the portrait before the video is ready
+            setPreviewImage(data.image_file);
+          }
+          setLoadingMessage(describeProgress(message, data));
+        }
+      };
+
+      ['queued', 'processing', 'completed', 'failed', 'cancelled'].forEach((name) =>
+        source.addEventListener(name, handleUpdate as EventListener)
+      );
+
+      source.onerror = () => {
+        if (settled) return;
+        settled = true;
+        source.close();
+        console.warn(`Event stream for job ${jobId} dropped, falling back to polling`);
+        pollJobStatus(jobId, statusUrl, message).then(resolve, reject);
+      };
+    });
+  };
+
   const pollJobStatus = async (
     jobId: string,
     statusUrl: string,
@@ -163,14 +233,17 @@ export default function Home() {
         console.log(`Job ${jobId} status:`, data.status);
 
         if (data.status === 'completed') {
-          const fileUrl = data.image_file || data.video_file;
+          const fileUrl = data.video_file || data.image_file;
           console.log('Job completed, file:', fileUrl);
           return fileUrl;
-        } else if (data.status === 'failed') {
+        } else if (data.status === 'failed' || data.status === 'cancelled') {
           throw new Error(data.error || 'Job failed');
         }
 
-        setLoadingMessage(`${message} (${attempts + 1}s)`);
+        if (data.image_file) {
+          setPreviewImage(data.image_file);
+        }
+        setLoadingMessage(`${describeProgress(message, data)} (${attempts + 1}s)`);
         await new Promise(r => setTimeout(r, 1000));
         attempts++;
       } catch (error) {
@@ -190,6 +263,7 @@ export default function Home() {
     setStep('capture');
     setPersonImage('');
     setGeneratedVideo('');
+    setPreviewImage('');
   };
 
   return (
@@ -197,7 +271,7 @@ export default function Home() {
       {step === 'capture' && <CaptureScreen onCapture={handleCapture} />}
       {step === 'gender' && <GenderScreen onSelect={handleGenderSelect} />}
       {step === 'select' && <SelectScreen gender={gender} onSelect={handleSelect} />}
-      {step === 'loading' && <LoadingScreen message={loadingMessage} />}
+      {step === 'loading' && <LoadingScreen message={loadingMessage} previewImage={previewImage} />}
       {step === 'result' && (
         <ResultScreen 
           video={generatedVideo} 
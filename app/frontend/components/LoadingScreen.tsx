@@ -1,11 +1,19 @@
 interface LoadingScreenProps {
   message?: string;
+  previewImage?: string;
 }
 
-export default function LoadingScreen({ message = 'Generating your content...' }: LoadingScreenProps) {
+export default function LoadingScreen({ message = 'Generating your content...', previewImage }: LoadingScreenProps) {
   return (
     <div className="flex flex-col items-center justify-center min-h-screen bg-gradient-to-br from-slate-900 to-slate-800">
       <div className="text-center px-4">
+        {previewImage && (
+          <img
+            src={previewImage}
+            alt="Generated portrait"
+            className="w-48 mx-auto mb-6 rounded-lg shadow-lg"
+          />
+        )}
         <div className="mb-6">
           <div className="w-16 h-16 border-4 border-blue-300 border-t-blue-600 rounded-full animate-spin mx-auto" />
         </div>
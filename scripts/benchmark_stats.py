@@ -0,0 +1,109 @@
+"""
+Small, dependency-free statistics for benchmark comparisons.
+
+Benchmark samples are few (a handful of runs per model) and latency is
+skewed, so everything here is distribution-free: a permutation test for
+latency shifts, Fisher's exact test for success rates and percentile
+bootstrap confidence intervals.
+"""
+
+import itertools
+import math
+import random
+import statistics
+
+
+def permutation_pvalue(baseline: list, candidate: list, resamples: int = 10000, seed: int = 0) -> float | None:
+    """
+    One-sided p-value that `candidate` is slower than `baseline` (difference in means).
+
+    Enumerates every relabelling when there are few enough, otherwise samples
+    `resamples` of them. None when either side is empty.
+    """
+    if not baseline or not candidate:
+        return None
+    pooled = list(baseline) + list(candidate)
+    n = len(candidate)
+    observed = statistics.fmean(candidate) - statistics.fmean(baseline)
+    total = sum(pooled)
+
+    def diff(chosen_sum):
+        return chosen_sum / n - (total - chosen_sum) / (len(pooled) - n)
+
+    if math.comb(len(pooled), n) <= resamples:
+        sums = [sum(combo) for combo in itertools.combinations(pooled, n)]
+        return sum(1 for s in sums if diff(s) >= observed - 1e-12) / len(sums)
+    rng = random.Random(seed)
+    sums = [sum(rng.sample(pooled, n)) for _ in range(resamples)]
+    # Count the observed labelling too, so a sampled p-value is never 0
+    return (sum(1 for s in sums if diff(s) >= observed - 1e-12) + 1) / (len(sums) + 1)
+
+
+def fisher_pvalue(base_failed: int, base_total: int, cand_failed: int, cand_total: int) -> float | None:
+    """One-sided Fisher's exact p-value that the candidate fails more often than the baseline."""
+    if not base_total or not cand_total:
+        return None
+    failed = base_failed + cand_failed
+    total = base_total + cand_total
+    denominator = math.comb(total, cand_total)
+    return sum(
+        math.comb(failed, k) * math.comb(total - failed, cand_total - k)
+        for k in range(cand_failed, min(failed, cand_total) + 1)
+    ) / denominator
+
+
+def quantile(values: list, q: float) -> float | None:
+    """Linearly interpolated quantile (q in [0, 1]); None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def bootstrap_ci(values: list, stat=statistics.median, confidence: float = 0.95, resamples: int = 2000,
+                 seed: int = 0) -> list | None:
+    """Percentile bootstrap confidence interval [low, high] of `stat`; None for no values."""
+    if not values:
+        return None
+    rng = random.Random(seed)
+    estimates = [stat(rng.choices(values, k=len(values))) for _ in range(resamples)]
+    tail = (1 - confidence) / 2
+    return [quantile(estimates, tail), quantile(estimates, 1 - tail)]
+
+
+def describe(values: list) -> dict:
+    """Count, mean, percentiles and a 95% bootstrap CI of the median."""
+    if not values:
+        return {"n": 0}
+    return {
+        "n": len(values),
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "median_ci95": bootstrap_ci(values),
+        "p90": quantile(values, 0.90),
+        "p95": quantile(values, 0.95),
+        "min": min(values),
+        "max": max(values),
+    }
+
+
+def fastest(samples: dict, alpha: float) -> dict:
+    """
+    Rank {name: latencies} by median and declare a winner only if it is
+    significantly faster than the runner-up (one-sided permutation test).
+    `candidates` lists the names not significantly slower than the best.
+    """
+    ranked = sorted((name for name, values in samples.items() if values), key=lambda name: statistics.median(samples[name]))
+    if len(ranked) < 2:
+        return {"fastest": None, "candidates": ranked, "p_value": None}
+    best = ranked[0]
+    p_values = {name: permutation_pvalue(samples[best], samples[name]) for name in ranked[1:]}
+    p_runner_up = p_values[ranked[1]]
+    return {
+        "fastest": best if p_runner_up < alpha else None,
+        "candidates": [best] + [name for name in ranked[1:] if p_values[name] >= alpha],
+        "p_value": p_runner_up,
+    }
@@ -0,0 +1,269 @@
+"""
+Append-only store of benchmark runs, and regression comparison between runs.
+
+Every quick_benchmark run is recorded in SQLite (BENCHMARK_DB, default
+outputs/benchmarks.db) with its run id, git commit, configuration and
+environment, plus one row per image and video result. Nothing is updated
+or deleted, so latency drift can be followed across weeks.
+
+    python -m scripts.benchmark_store list
+    python -m scripts.benchmark_store compare                      # latest run vs the one before
+    python -m scripts.benchmark_store compare --baseline <run_id> --candidate <run_id>
+
+`compare` flags, per model, latency regressions (permutation test on
+successful runs) and success-rate regressions (Fisher's exact test) that are
+significant at --alpha, and exits 1 if there are any.
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+from scripts.benchmark_stats import fisher_pvalue, permutation_pvalue
+
+BENCHMARK_DB = os.getenv("BENCHMARK_DB", "outputs/benchmarks.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    git_commit TEXT,
+    git_dirty INTEGER,
+    config TEXT NOT NULL,
+    environment TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    kind TEXT NOT NULL,
+    test_case TEXT NOT NULL,
+    model TEXT NOT NULL,
+    status TEXT NOT NULL,
+    latency_sec REAL,
+    error TEXT,
+    data TEXT NOT NULL,
+    trial INTEGER NOT NULL DEFAULT 0,
+    warmup INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id, kind, model);
+"""
+
+# Columns added after the first release, for stores created before them
+_ADDED_COLUMNS = {
+    "trial": "INTEGER NOT NULL DEFAULT 0",
+    "warmup": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+def git_revision() -> tuple:
+    """(commit, dirty) of the working tree, or (None, None) outside git."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, timeout=10,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, timeout=30,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None, None
+    return commit, bool(dirty)
+
+
+def environment() -> dict:
+    from importlib import metadata
+
+    def version(package):
+        try:
+            return metadata.version(package)
+        except metadata.PackageNotFoundError:
+            return None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "host": socket.gethostname(),
+        "cpus": os.cpu_count(),
+        "fal_client": version("fal-client"),
+        "fal_standin": bool(os.getenv("FAL_STANDIN")),
+    }
+
+
+class BenchmarkStore:
+
+    def __init__(self, path=BENCHMARK_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(results)")}
+        for name, declaration in _ADDED_COLUMNS.items():
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE results ADD COLUMN {name} {declaration}")
+
+    def record(self, config: dict, image_results: list, video_results: list, started_at: float) -> str:
+        """Store one benchmark run (warmup trials included, flagged); returns its run id."""
+        run_id = f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        commit, dirty = git_revision()
+        rows = [
+            ("image", r["test_case"], "image", r["status"],
+             r["latency_sec"] if r["status"] == "success" else None, r.get("error"), r)
+            for r in image_results
+        ] + [
+            ("video", r["test_case"], r["model"], r["status"],
+             r["video_latency_sec"] if r["status"] == "success" else None, r.get("error"), r)
+            for r in video_results
+        ]
+        self._conn.execute("BEGIN")
+        self._conn.execute(
+            "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (run_id, started_at, time.time(), commit, None if dirty is None else int(dirty),
+             json.dumps(config, default=str), json.dumps(environment())),
+        )
+        self._conn.executemany(
+            "INSERT INTO results (run_id, kind, test_case, model, status, latency_sec, error, data, trial, warmup) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(run_id, kind, tc, model, status, latency, error, json.dumps(data, default=str),
+              data.get("trial", 0), int(data.get("warmup", False)))
+             for kind, tc, model, status, latency, error, data in rows],
+        )
+        self._conn.execute("COMMIT")
+        return run_id
+
+    def runs(self, limit: int = 20) -> list:
+        rows = self._conn.execute(
+            "SELECT r.run_id, r.started_at, r.git_commit, r.git_dirty, r.config, "
+            "COUNT(x.run_id), SUM(x.status = 'success') "
+            "FROM runs r LEFT JOIN results x ON x.run_id = r.run_id AND NOT x.warmup "
+            "GROUP BY r.run_id ORDER BY r.started_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [
+            {"run_id": run_id, "started_at": started, "git_commit": commit, "git_dirty": bool(dirty),
+             "config": json.loads(config), "results": count, "successful": ok or 0}
+            for run_id, started, commit, dirty, config, count, ok in rows
+        ]
+
+    def samples(self, run_id: str) -> dict:
+        """{(kind, model): {"latencies": [...], "failed": n, "total": n}} for one run, warmup trials excluded."""
+        out = {}
+        for kind, model, status, latency in self._conn.execute(
+            "SELECT kind, model, status, latency_sec FROM results WHERE run_id = ? AND NOT warmup", (run_id,),
+        ):
+            entry = out.setdefault((kind, model), {"latencies": [], "failed": 0, "total": 0})
+            entry["total"] += 1
+            if status == "success" and latency is not None:
+                entry["latencies"].append(latency)
+            else:
+                entry["failed"] += 1
+        return out
+
+    def resolve(self, run_id: str | None) -> str:
+        """`run_id` if it exists, else the newest run."""
+        if run_id:
+            row = self._conn.execute("SELECT run_id FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        else:
+            row = self._conn.execute("SELECT run_id FROM runs ORDER BY started_at DESC LIMIT 1").fetchone()
+        if row is None:
+            raise ValueError(f"Unknown run: {run_id}" if run_id else "No runs stored")
+        return row[0]
+
+    def previous(self, run_id: str) -> str:
+        """The run started just before `run_id`."""
+        row = self._conn.execute(
+            "SELECT run_id FROM runs WHERE started_at < (SELECT started_at FROM runs WHERE run_id = ?) "
+            "ORDER BY started_at DESC LIMIT 1",
+            (run_id,),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"No run before {run_id} to compare against")
+        return row[0]
+
+
+def compare(store: BenchmarkStore, baseline: str, candidate: str, alpha: float, min_change: float) -> list:
+    """Per-model comparison rows; `regression` is set when a slowdown or failure increase is significant."""
+    base, cand = store.samples(baseline), store.samples(candidate)
+    rows = []
+    for key in sorted(set(base) & set(cand)):
+        b, c = base[key], cand[key]
+        b_median = statistics.median(b["latencies"]) if b["latencies"] else None
+        c_median = statistics.median(c["latencies"]) if c["latencies"] else None
+        change = (c_median / b_median - 1) if b_median and c_median else None
+        latency_p = permutation_pvalue(b["latencies"], c["latencies"])
+        success_p = fisher_pvalue(b["failed"], b["total"], c["failed"], c["total"])
+        latency_regressed = latency_p is not None and latency_p < alpha and change is not None and change > min_change
+        success_regressed = success_p is not None and success_p < alpha and c["failed"] / c["total"] > b["failed"] / b["total"]
+        rows.append({
+            "kind": key[0], "model": key[1],
+            "baseline_median_sec": b_median, "candidate_median_sec": c_median, "change": change,
+            "latency_p": latency_p,
+            "baseline_success": 1 - b["failed"] / b["total"], "candidate_success": 1 - c["failed"] / c["total"],
+            "success_p": success_p,
+            "n": (len(b["latencies"]), len(c["latencies"])),
+            "regression": [name for name, hit in (("latency", latency_regressed), ("success_rate", success_regressed)) if hit],
+        })
+    return rows
+
+
+def _fmt(value, pattern="{:.2f}"):
+    return "-" if value is None else pattern.format(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stored benchmark runs and regression comparison.")
+    parser.add_argument("--db", default=BENCHMARK_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+    list_cmd = sub.add_parser("list", help="Recent runs")
+    list_cmd.add_argument("--limit", type=int, default=20)
+    compare_cmd = sub.add_parser("compare", help="Flag regressions of a run against a baseline run")
+    compare_cmd.add_argument("--baseline", help="Baseline run id (default: the run before the candidate)")
+    compare_cmd.add_argument("--candidate", help="Candidate run id (default: the latest run)")
+    compare_cmd.add_argument("--alpha", type=float, default=0.05, help="Significance level")
+    compare_cmd.add_argument("--min-change", type=float, default=0.10, help="Smallest median slowdown to flag (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    store = BenchmarkStore(args.db)
+    if args.command == "list":
+        for run in store.runs(args.limit):
+            commit = (run["git_commit"] or "-")[:10] + ("*" if run["git_dirty"] else "")
+            models = ",".join(run["config"].get("models", []))
+            print(f"{run['run_id']:24} {datetime.fromtimestamp(run['started_at']):%Y-%m-%d %H:%M}  {commit:12} "
+                  f"{run['successful']}/{run['results']} ok  models={models}")
+        return
+
+    try:
+        candidate = store.resolve(args.candidate)
+        baseline = store.resolve(args.baseline) if args.baseline else store.previous(candidate)
+    except ValueError as e:
+        sys.exit(str(e))
+    rows = compare(store, baseline, candidate, args.alpha, args.min_change)
+
+    print(f"\nBaseline {baseline}  →  candidate {candidate}  (alpha {args.alpha}, min change {args.min_change:.0%})\n")
+    print(f"{'kind':6} {'model':10} {'median base':>12} {'median cand':>12} {'change':>8} {'p':>6} "
+          f"{'success base':>13} {'success cand':>13} {'p':>6}  verdict")
+    for r in rows:
+        verdict = "REGRESSION: " + ", ".join(r["regression"]) if r["regression"] else "ok"
+        print(
+            f"{r['kind']:6} {r['model']:10} {_fmt(r['baseline_median_sec'], '{:.2f}s'):>12} "
+            f"{_fmt(r['candidate_median_sec'], '{:.2f}s'):>12} {_fmt(r['change'], '{:+.0%}'):>8} "
+            f"{_fmt(r['latency_p'], '{:.3f}'):>6} {r['baseline_success']:>13.0%} {r['candidate_success']:>13.0%} "
+            f"{_fmt(r['success_p'], '{:.3f}'):>6}  {verdict}"
+        )
+    if any(r["regression"] for r in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
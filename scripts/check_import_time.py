@@ -0,0 +1,109 @@
+"""
+Cold-start budget check for the serverless backend.
+
+Imports app/backend/wsgi.py in a fresh interpreter (as a cold Vercel
+invocation does), answers one /api/health request, and fails when
+
+- the wsgi import takes longer than --budget-ms (IMPORT_BUDGET_MS), or
+- a module that should load on first use (FAL SDK, pydantic, service
+  classes, ...) is imported at startup.
+
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-ms 300 --top 15
+
+Run it in CI or before deploying; it exits 1 on a regression.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Modules that must stay out of the startup path
+DEFERRED_MODULES = (
+    "fal_client",
+    "dotenv",
+    "pydantic",
+    "httpx",
+    "tenacity",
+    "PIL",
+    "pandas",
+    "src.clients.fal_client",
+    "src.services",
+)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.backend.wsgi as wsgi
+imported = time.perf_counter()
+wsgi.app.test_client().get("/api/health")
+responded = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (responded - start) * 1000,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def _parse_importtime(stderr: str) -> list:
+    """(self_us, cumulative_us, module) for every line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        rows.append((int(self_us), int(cumulative_us), module.strip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when backend startup imports regress.")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "400")))
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-4000:])
+        sys.exit("Importing app/backend/wsgi.py failed")
+
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    rows = _parse_importtime(proc.stderr)
+
+    print(f"wsgi import:    {probe['import_ms']:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"first response: {probe['first_response_ms']:.0f} ms")
+    print("\nSlowest modules (self time):")
+    for self_us, cumulative_us, module in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  (cumulative {cumulative_us / 1000:8.1f} ms)  {module}")
+
+    eager = [
+        name for name in probe["modules"]
+        if any(name == m or name.startswith(m + ".") for m in DEFERRED_MODULES)
+    ]
+
+    failed = False
+    if eager:
+        failed = True
+        print(f"\nFAIL: imported at startup but should load on first use: {', '.join(eager)}")
+    if probe["import_ms"] > args.budget_ms:
+        failed = True
+        print(f"\nFAIL: wsgi import took {probe['import_ms']:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    if failed:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Load SKUs into the outfit catalog from CSV or JSONL.
+
+Each row needs `sku` and `name`; optional fields are kind (garment |
+background), category, color, gender (male | female | unisex), tags
+(comma/space separated, or a JSON list), image_url and description. Rows
+are upserted by SKU, so re-running an updated export is safe.
+
+    python scripts/import_outfit_catalog.py products.csv
+    OUTFIT_CATALOG_DB=outputs/catalog.db python scripts/import_outfit_catalog.py products.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+from app.backend.api.catalog import get_catalog
+
+
+def read_rows(path: str):
+    """Yield catalog items from a .csv or .jsonl file."""
+    with open(path, newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for line_no, row in enumerate(rows, start=1):
+            if not row.get("sku") or not row.get("name"):
+                print(f"  ! row {line_no}: sku and name are required; skipped")
+                continue
+            tags = row.get("tags") or []
+            if isinstance(tags, str):
+                tags = [t for t in re.split(r"[,;|\s]+", tags) if t]
+            yield {**row, "tags": tags}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import SKUs into the outfit catalog.")
+    parser.add_argument("path", help="CSV or JSONL file")
+    args = parser.parse_args()
+
+    catalog = get_catalog()
+    start = time.time()
+    count = catalog.upsert_many(read_rows(args.path))
+    print(f"Imported {count} items in {time.time() - start:.1f}s -> {catalog.path} (version {catalog.version()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Load test the API with open-loop arrivals.
+
+Simulated wizard users arrive on a schedule that does not wait for the
+server (Poisson, step or ramp), each one submitting POST /api/generate,
+polling /api/status/<id> until the image is done and then, with
+probability --video-fraction, doing the same with POST /api/video. Latency
+is measured from the scheduled arrival time, so a server that falls behind
+shows it in the tail instead of silently lowering the offered load.
+
+By default each scenario starts its own backend on --port with the FAL
+stand-in (FAL_STANDIN=1) using the scenario's latency distributions (see
+src/clients/fal_standin.py for the spec format), and samples the server's
+RSS and thread count from /proc. Use --url to target a running server
+instead (no resource sampling then).
+
+    python scripts/load_test.py --pattern poisson --rate 2 --duration 60
+    python scripts/load_test.py --pattern step --rates 1,2,4,8 --step-sec 30 --inference-latency lognormal:3,0.5
+    python scripts/load_test.py --scenarios loadtest.json
+
+A scenarios file is a JSON list of objects with the same keys as the
+options (pattern, rate, rates, step_sec, duration, video_fraction,
+queue_latency, inference_latency, failure_rate, env) plus a name. `env`
+holds extra server environment, e.g. {"ADMISSION_MODEL_LIMITS": "image=4"}.
+"""
+
+import argparse
+import base64
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+
+TERMINAL = ("completed", "failed", "cancelled")
+# 1x1 transparent PNG; the stand-in never looks at it
+PERSON_IMAGE = "data:image/png;base64," + base64.b64encode(bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)).decode()
+
+DEFAULTS = {
+    "name": "default",
+    "pattern": "poisson",
+    "rate": 1.0,
+    "rates": "1,2,4",
+    "step_sec": 30.0,
+    "duration": 60.0,
+    "video_fraction": 0.5,
+    "queue_latency": "fixed:0.5",
+    "inference_latency": "lognormal:2,0.4",
+    "failure_rate": 0.0,
+    "env": {},
+}
+
+
+def arrivals(scenario: dict) -> list:
+    """Arrival offsets in seconds for the scenario's pattern."""
+    duration = float(scenario["duration"])
+    pattern = scenario["pattern"]
+    if pattern == "poisson":
+        rate_at = lambda t: float(scenario["rate"])
+    elif pattern == "step":
+        rates = [float(r) for r in str(scenario["rates"]).split(",")]
+        step_sec = float(scenario["step_sec"])
+        duration = step_sec * len(rates)
+        rate_at = lambda t: rates[min(int(t // step_sec), len(rates) - 1)]
+    elif pattern == "ramp":
+        rates = [float(r) for r in str(scenario["rates"]).split(",")]
+        low, high = rates[0], rates[-1]
+        rate_at = lambda t: low + (high - low) * t / duration
+    else:
+        raise ValueError(f"Unknown arrival pattern: {pattern}")
+
+    # Non-homogeneous Poisson process by thinning against the peak rate
+    peak = max(rate_at(0.0), rate_at(duration), *(rate_at(duration * i / 100) for i in range(100)))
+    times, t = [], 0.0
+    while peak > 0:
+        t += random.expovariate(peak)
+        if t >= duration:
+            break
+        if random.random() < rate_at(t) / peak:
+            times.append(t)
+    return times
+
+
+def percentile(values: list, q: float):
+    """Nearest-rank percentile; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _proc_stats(pid: int) -> dict | None:
+    """RSS (MB) and thread count of `pid` from /proc, or None off Linux."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+    return {"rss_mb": int(fields["VmRSS"].split()[0]) / 1024, "threads": int(fields["Threads"])}
+
+
+class Server:
+    """The backend in a subprocess, with the FAL stand-in configured for one scenario."""
+
+    def __init__(self, scenario: dict, port: int):
+        self.url = f"http://127.0.0.1:{port}"
+        env = {
+            **os.environ,
+            "FAL_STANDIN": "1",
+            "FAL_STANDIN_QUEUE_LATENCY": scenario["queue_latency"],
+            "FAL_STANDIN_INFERENCE_LATENCY": scenario["inference_latency"],
+            "FAL_STANDIN_FAILURE_RATE": str(scenario["failure_rate"]),
+            # Every simulated user is a new submission
+            "IDEMPOTENCY_WINDOW_SEC": "0",
+            "LOG_LEVEL": os.getenv("LOG_LEVEL", "warning"),
+            **{k: str(v) for k, v in scenario["env"].items()},
+        }
+        code = f"from app.backend.wsgi import app; app.run(host='127.0.0.1', port={port}, threaded=True)"
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", code], cwd=ROOT, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"{self.url}/api/health", timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if self.process.poll() is not None:
+                break
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError("Backend did not become healthy")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class Recorder:
+    """Thread-safe collection of per-session and per-request samples."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = []
+        self.requests = []
+
+    def request(self, endpoint: str, latency: float, status: int):
+        with self.lock:
+            self.requests.append({"endpoint": endpoint, "latency_sec": latency, "status": status})
+
+    def session(self, **fields):
+        with self.lock:
+            self.sessions.append(fields)
+
+
+def _call(client: httpx.Client, recorder: Recorder, method: str, endpoint: str, url: str, **kwargs):
+    start = time.monotonic()
+    try:
+        response = client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        recorder.request(endpoint, time.monotonic() - start, 0)
+        raise
+    recorder.request(endpoint, time.monotonic() - start, response.status_code)
+    return response
+
+
+def _run_job(client, recorder, base: str, submit_path: str, status_path: str, body: dict, poll_sec: float,
+             timeout_sec: float) -> tuple:
+    """Submit one job and poll it to completion; returns (outcome, job)."""
+    try:
+        response = _call(client, recorder, "POST", submit_path, base + submit_path, json=body)
+        if response.status_code == 429:
+            return "rejected", None
+        if response.status_code >= 400:
+            return f"http_{response.status_code}", None
+        job_id = response.json()["job_id"]
+        deadline = time.monotonic() + timeout_sec
+        while time.monotonic() < deadline:
+            time.sleep(poll_sec)
+            job = _call(client, recorder, "GET", status_path, f"{base}{status_path}/{job_id}").json()
+            if job.get("status") in TERMINAL:
+                return ("ok" if job["status"] == "completed" else job["status"]), job
+    except httpx.HTTPError:
+        return "connection_error", None
+    return "timeout", None
+
+
+def user_session(index: int, scheduled: float, scenario: dict, base: str, recorder: Recorder, client, opts):
+    """One wizard user: image, then maybe a video. Latencies count from `scheduled`."""
+    tag = uuid.uuid4().hex[:8]
+    outcome, job = _run_job(
+        client, recorder, base, "/api/generate", "/api/status",
+        {
+            "person_image": PERSON_IMAGE,
+            "outfit_top": "Blue T-Shirt",
+            "outfit_bottom": "Black Jeans",
+            "background": "Studio",
+            "environment": f"professional lighting, load test {tag}",
+        },
+        opts.poll_sec, opts.timeout_sec,
+    )
+    image_done = time.monotonic()
+    record = {"index": index, "image_outcome": outcome, "image_latency_sec": image_done - scheduled}
+
+    if outcome == "ok" and random.random() < scenario["video_fraction"]:
+        outcome, _ = _run_job(
+            client, recorder, base, "/api/video", "/api/video/status",
+            {
+                "image_file": job.get("image_file") or "https://standin.fal.local/files/person.png",
+                "outfit_top": "Blue T-Shirt",
+                "outfit_bottom": "Black Jeans",
+                "motion_description": f"person turns around smiling {tag}",
+            },
+            opts.poll_sec, opts.timeout_sec,
+        )
+        record.update(video_outcome=outcome, video_latency_sec=time.monotonic() - image_done)
+    record.update(outcome=outcome, e2e_latency_sec=time.monotonic() - scheduled)
+    recorder.session(**record)
+
+
+def run_scenario(scenario: dict, opts) -> dict:
+    schedule = arrivals(scenario)
+    server = None if opts.url else Server(scenario, opts.port)
+    base = opts.url or server.url
+    recorder = Recorder()
+    samples = []
+    stop_sampling = threading.Event()
+
+    def sample_loop():
+        while not stop_sampling.wait(1.0):
+            stats = server and _proc_stats(server.process.pid)
+            if stats:
+                samples.append(stats)
+
+    print(f"\n[{scenario['name']}] {scenario['pattern']} arrivals: {len(schedule)} users over "
+          f"{schedule[-1] if schedule else 0:.0f}s against {base}", flush=True)
+    threading.Thread(target=sample_loop, daemon=True).start()
+    client = httpx.Client(timeout=opts.timeout_sec, limits=httpx.Limits(max_connections=opts.max_connections))
+    threads = []
+    started = time.monotonic()
+    try:
+        for index, offset in enumerate(schedule):
+            delay = started + offset - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            # Open loop: every arrival gets its own thread, regardless of how earlier ones are doing
+            thread = threading.Thread(
+                target=user_session, daemon=True,
+                args=(index, started + offset, scenario, base, recorder, client, opts),
+            )
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join(timeout=max(0.0, started + (schedule[-1] if schedule else 0) + opts.timeout_sec * 2 - time.monotonic()))
+        elapsed = time.monotonic() - started
+    finally:
+        stop_sampling.set()
+        client.close()
+        if server:
+            server.stop()
+
+    return summarize(scenario, recorder, samples, elapsed, len(schedule))
+
+
+def summarize(scenario: dict, recorder: Recorder, samples: list, elapsed: float, offered: int) -> dict:
+    sessions, requests = recorder.sessions, recorder.requests
+    ok = [s for s in sessions if s["outcome"] == "ok"]
+    outcomes = {}
+    for s in sessions:
+        outcomes[s["outcome"]] = outcomes.get(s["outcome"], 0) + 1
+
+    def latency_stats(values):
+        return {f"p{q}": percentile(values, q) for q in (50, 95, 99)}
+
+    endpoints = {}
+    for r in requests:
+        entry = endpoints.setdefault(r["endpoint"], {"latencies": [], "errors": 0, "count": 0})
+        entry["count"] += 1
+        entry["latencies"].append(r["latency_sec"])
+        entry["errors"] += r["status"] == 0 or r["status"] >= 500
+    return {
+        "scenario": scenario,
+        "offered_users": offered,
+        "finished_users": len(sessions),
+        "elapsed_sec": elapsed,
+        "throughput_users_per_sec": len(ok) / elapsed if elapsed else 0.0,
+        "error_rate": 1 - len(ok) / len(sessions) if sessions else None,
+        "outcomes": outcomes,
+        "e2e_latency_sec": latency_stats([s["e2e_latency_sec"] for s in ok]),
+        "image_latency_sec": latency_stats([s["image_latency_sec"] for s in sessions if s["image_outcome"] == "ok"]),
+        "video_latency_sec": latency_stats([s["video_latency_sec"] for s in sessions if s.get("video_outcome") == "ok"]),
+        "endpoints": {
+            name: {"count": e["count"], "error_rate": e["errors"] / e["count"], **latency_stats(e["latencies"])}
+            for name, e in endpoints.items()
+        },
+        "server": {
+            "peak_rss_mb": max((s["rss_mb"] for s in samples), default=None),
+            "final_rss_mb": samples[-1]["rss_mb"] if samples else None,
+            "peak_threads": max((s["threads"] for s in samples), default=None),
+        },
+    }
+
+
+def _fmt(value, unit="s"):
+    return "-" if value is None else f"{value:.2f}{unit}"
+
+
+def print_report(results: list):
+    print(f"\n{'=' * 110}")
+    print(f"{'scenario':18} {'users':>6} {'ok/s':>6} {'errors':>7} {'e2e p50':>9} {'p95':>9} {'p99':>9} "
+          f"{'submit p95':>11} {'rss MB':>8} {'threads':>8}")
+    print("=" * 110)
+    for r in results:
+        submit = r["endpoints"].get("/api/generate", {})
+        print(
+            f"{r['scenario']['name'][:18]:18} {r['finished_users']:>6} {r['throughput_users_per_sec']:>6.2f} "
+            f"{_fmt(r['error_rate'] and r['error_rate'] * 100, '%'):>7} "
+            f"{_fmt(r['e2e_latency_sec']['p50']):>9} {_fmt(r['e2e_latency_sec']['p95']):>9} "
+            f"{_fmt(r['e2e_latency_sec']['p99']):>9} {_fmt(submit.get('p95')):>11} "
+            f"{_fmt(r['server']['peak_rss_mb'], ''):>8} {r['server']['peak_threads'] or '-':>8}"
+        )
+        print(f"{'':18} outcomes: {', '.join(f'{k}={v}' for k, v in sorted(r['outcomes'].items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test against the API with the FAL stand-in.")
+    parser.add_argument("--scenarios", help="JSON file with a list of scenarios")
+    parser.add_argument("--name", default=DEFAULTS["name"])
+    parser.add_argument("--pattern", choices=("poisson", "step", "ramp"), default=DEFAULTS["pattern"])
+    parser.add_argument("--rate", type=float, default=DEFAULTS["rate"], help="Users/sec for poisson")
+    parser.add_argument("--rates", default=DEFAULTS["rates"], help="Comma-separated users/sec for step (each level) or ramp (start,end)")
+    parser.add_argument("--step-sec", type=float, default=DEFAULTS["step_sec"])
+    parser.add_argument("--duration", type=float, default=DEFAULTS["duration"], help="Seconds of arrivals (poisson, ramp)")
+    parser.add_argument("--video-fraction", type=float, default=DEFAULTS["video_fraction"])
+    parser.add_argument("--queue-latency", default=DEFAULTS["queue_latency"])
+    parser.add_argument("--inference-latency", default=DEFAULTS["inference_latency"])
+    parser.add_argument("--failure-rate", type=float, default=DEFAULTS["failure_rate"])
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=5055, help="Port for the spawned server")
+    parser.add_argument("--poll-sec", type=float, default=1.0, help="Status polling interval")
+    parser.add_argument("--timeout-sec", type=float, default=300.0, help="Give up on a job after this long")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--output", default=None, help="Results JSON (default: outputs/loadtest/<timestamp>.json)")
+    opts = parser.parse_args()
+
+    if opts.scenarios:
+        with open(opts.scenarios) as f:
+            scenarios = [{**DEFAULTS, **s} for s in json.load(f)]
+    else:
+        scenarios = [{key: getattr(opts, key) for key in DEFAULTS if key != "env"} | {"env": {}}]
+
+    results = [run_scenario(scenario, opts) for scenario in scenarios]
+    print_report(results)
+
+    output = Path(opts.output or f"outputs/loadtest/{datetime.now():%Y%m%d_%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\n✓ Results saved: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,35 @@
+"""
+Benchmark image + video generation over TEST_CASES x MODELS.
+
+    python -m scripts.quick_benchmark --concurrency 8 --model-concurrency 2
+
+Each test case runs through the try-on DAG (src/services/pipelines/tryon_dag.py),
+so every model's video starts as soon as its test case's image is ready.
+`--concurrency` caps FAL calls in flight overall and `--model-concurrency` per
+model; both default to 1, which runs one call at a time.
+
+Each test case is run --warmup times first (excluded, absorbs cold starts)
+and then --repetitions times. The summary reports percentiles and bootstrap
+confidence intervals over successful runs, failure latency separately, and
+names a fastest model only when the difference is significant.
+
+Every run's time is split into upload, FAL queue, inference, download and
+other phases from its trace spans; the summary and
+outputs/benchmark_phases.html stack them per model and per test case.
+"""
+
+import argparse
 import json
+import statistics
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
 
-from src.services.pipelines.image_pipeline import ImagePipeline
-from src.services.pipelines.video_pipeline import VideoPipeline
+from scripts.benchmark_stats import describe, fastest
+from scripts.benchmark_store import BenchmarkStore
 from src.schemas.person import PersonAttributes
 from src.schemas.environment import EnvironmentAttributes
 
@@ -52,214 +76,422 @@ TEST_CASES = [
 MODELS = ["grok"]  # ["veo3", "kling", "grok", "luma"]
 
 
-def generate_all_images():
-    """Phase 1: Generate all images, return mapping of test_case -> image_path"""
-    print("\n" + "=" * 60)
-    print("PHASE 1: IMAGE GENERATION (ALL TEST CASES)")
-    print("=" * 60 + "\n")
-    
-    image_mapping = {}
-    
-    for test_case in TEST_CASES:
-        test_name = test_case["name"]
-        print(f"[{test_name.upper()}] Generating person image...", end=" ", flush=True)
-        t_start = time.time()
-        
-        img_pipeline = ImagePipeline()
-        try:
-            img_result = img_pipeline.run(
-                person=test_case["person"],
-                env=test_case["environment"],
-                description="Full body portrait",
-                person_reference_image=test_case["person_ref"],
-                outfit_reference_images=test_case["outfit_refs"],
-            )
-            latency = time.time() - t_start
-            img_file = img_result["local_files"][0]
-            
-            print(f"✓ {latency:.2f}s")
-            
-            image_mapping[test_name] = {
-                "latency_sec": latency,
-                "file": img_file,
-                "person": test_case["person"],
-                "environment": test_case["environment"],
-                "motion_description": test_case["motion_description"],
-                "status": "success",
-            }
-        except Exception as e:
-            latency = time.time() - t_start
-            print(f"✗ {str(e)[:40]}")
-            
-            image_mapping[test_name] = {
-                "latency_sec": latency,
-                "file": None,
-                "status": "failed",
-                "error": str(e)[:100],
-            }
-    
-    return image_mapping
+def _progress(total: int):
+    """on_event callback printing one line per finished task, with queue wait shown separately."""
+    lock = threading.Lock()
+    done = [0]
+
+    def on_event(label, node, status, **info):
+        if status not in ("completed", "failed", "skipped") or not node.startswith(("image", "video:")):
+            return
+        with lock:
+            done[0] += 1
+            task = "image" if node == "image" else node.split(":")[1]
+            if status == "completed":
+                outcome = f"✓ {info['elapsed_sec']:7.2f}s  (waited {info['waited_sec']:.1f}s)"
+            else:
+                outcome = f"✗ {str(info.get('error') or info.get('reason'))[:40]}"
+            print(f"[{done[0]:>3}/{total}] {label:32} {task:10} {outcome}", flush=True)
+
+    return on_event
+
+
+PHASES = ("upload", "queue", "inference", "download", "other")
 
 
-def generate_all_videos(image_mapping):
-    """Phase 2: Generate videos for all images × all models"""
+def phase_timings(run, node: str) -> dict:
+    """
+    Split a DAG node's run time into phases from its trace spans.
+
+    upload: encoding/uploading references plus sending the request until FAL
+    enqueued it; queue and inference: FAL's own phases; download: fetching
+    the result after inference plus file downloads; other: the remainder
+    (prompt building, retries, local work).
+
+    `phases_complete` is False when the node ran but its spans are no longer
+    in the trace buffer; its phases are None then rather than partial.
+    """
+    from src.core import tracing
+
+    phases = dict.fromkeys(PHASES, 0.0)
+    missing = {f"{phase}_sec": None for phase in PHASES}
+    if node not in run.spans:
+        return missing
+    trace_id, span_id = run.spans[node]
+    spans = tracing.subtree(trace_id, span_id)
+    if not any(span["span_id"] == span_id for span in spans):
+        print(f"  ⚠ no trace spans for {node} (trace {trace_id}); raise TRACE_BUFFER_TRACES or set TRACE_FILE")
+        return {**missing, "phases_complete": False}
+    sec = lambda start_ns, end_ns: max(0, end_ns - start_ns) / 1e9
+    counted = set()
+    for span in spans:
+        name = span["name"]
+        if span["parent_id"] in counted:
+            # Inside a span already attributed to a phase
+            counted.add(span["span_id"])
+            continue
+        if name in ("fal.upload", "fal.queue", "fal.inference", "download") or name.endswith(("._resolve_ref", "._resolve_refs")):
+            counted.add(span["span_id"])
+        if name == "fal.upload" or name.endswith(("._resolve_ref", "._resolve_refs")):
+            phases["upload"] += sec(span["start_ns"], span["end_ns"])
+        elif name == "fal.queue":
+            phases["queue"] += sec(span["start_ns"], span["end_ns"])
+        elif name == "fal.inference":
+            phases["inference"] += sec(span["start_ns"], span["end_ns"])
+        elif name == "download":
+            phases["download"] += sec(span["start_ns"], span["end_ns"])
+        elif name == "fal.subscribe":
+            children = {c["name"]: c for c in spans if c["parent_id"] == span["span_id"]}
+            if "fal.queue" in children:
+                phases["upload"] += sec(span["start_ns"], children["fal.queue"]["start_ns"])
+            if "fal.inference" in children:
+                phases["download"] += sec(children["fal.inference"]["end_ns"], span["end_ns"])
+    measured = sum(phases.values())
+    phases["other"] = max(0.0, run.durations.get(node, 0.0) - measured)
+    return {**{f"{phase}_sec": round(value, 3) for phase, value in phases.items()}, "phases_complete": True}
+
+
+def run_benchmark(models=MODELS, concurrency: int = 1, model_concurrency: int = 1, repetitions: int = 5,
+                  warmup: int = 1):
+    """
+    Run every test case through the try-on DAG `warmup + repetitions` times:
+    one image, then one video per model, per trial.
+
+    Warmup trials run first, on their own, so cold starts land in them; they
+    are recorded but flagged and left out of the statistics. At most
+    `concurrency` FAL calls run at once overall and `model_concurrency` per
+    model (the image model included). Latencies are measured from when a task
+    gets its slots, so time spent queued locally is not counted.
+    Returns (image_results, video_results), one row per trial.
+    """
+    from src.services.pipelines.tryon_dag import build_tryon_dag
+
     print("\n" + "=" * 60)
-    print("PHASE 2: VIDEO GENERATION (ALL MODELS × ALL IMAGES)")
+    print(f"IMAGES + VIDEOS: {len(TEST_CASES)} test cases x {len(models)} models x "
+          f"{repetitions} trials (+{warmup} warmup), concurrency {concurrency}, {model_concurrency} per model")
     print("=" * 60 + "\n")
-    
-    results = []
-    
-    for test_name, img_info in image_mapping.items():
-        if img_info["status"] == "failed":
-            print(f"[{test_name.upper()}] Skipped (image generation failed)")
-            continue
-        
-        img_file = img_info["file"]
-        env = img_info["environment"]
-        motion_desc = img_info.get("motion_description", "")
-        
-        print(f"\n[{test_name.upper()}]")
-        
-        for model in MODELS:
-            print(f"  {model.upper():10} ", end="", flush=True)
-            t_start = time.time()
-            
-            try:
-                vid_pipeline = VideoPipeline(video_model=model)
-                vid_result = vid_pipeline.run(
-                    reference_image=img_file,
-                    apparel_description=env.apparel_type,
-                    motion_description=motion_desc,
-                    duration_sec=4,
-                )
-                latency = time.time() - t_start
-                vid_file = vid_result["local_files"][0]
-                
-                print(f"✓ {latency:.2f}s")
-                
-                results.append({
-                    "test_case": test_name,
-                    "model": model,
-                    "image_latency_sec": img_info["latency_sec"],
-                    "video_latency_sec": latency,
-                    "total_latency_sec": img_info["latency_sec"] + latency,
-                    "status": "success",
-                    "image_file": img_file,
-                    "video_file": vid_file,
-                })
-            except Exception as e:
-                latency = time.time() - t_start
-                print(f"✗ {str(e)[:30]}")
-                
-                results.append({
-                    "test_case": test_name,
+
+    overall = threading.BoundedSemaphore(concurrency)
+    # Per-model slot first, so a task never holds a global slot while waiting on its model
+    limits = {name: (threading.BoundedSemaphore(model_concurrency), overall) for name in ("image", *models)}
+    on_event = _progress(len(TEST_CASES) * (warmup + repetitions) * (1 + len(models)))
+
+    def run_trial(item):
+        test_case, trial = item
+        label = f"{test_case['name']} #{trial}" + (" (warmup)" if trial < warmup else "")
+        dag = build_tryon_dag(
+            test_case["person_ref"],
+            test_case["outfit_refs"],
+            test_case["environment"],
+            video_models=models,
+            motions=[test_case["motion_description"]],
+            gender=test_case["person"].gender,
+            output_dir="outputs/benchmark_runs",
+            memoize=False,
+            limits=limits,
+            max_workers=len(models) + 1,
+        )
+        run = dag.run(on_event=lambda node, status, **info: on_event(label, node, status, **info))
+        # Read phases now, while the spans are still in the in-memory trace buffer
+        return run, {node: phase_timings(run, node) for node in run.durations if node.startswith(("image", "video:"))}
+
+    warmups = [(tc, trial) for trial in range(warmup) for tc in TEST_CASES]
+    measured = [(tc, trial) for trial in range(warmup, warmup + repetitions) for tc in TEST_CASES]
+    with ThreadPoolExecutor(max_workers=len(TEST_CASES) * max(1, repetitions)) as pool:
+        runs = list(pool.map(run_trial, warmups))
+        runs += list(pool.map(run_trial, measured))
+
+    image_results, video_results = [], []
+    for (test_case, trial), (run, phases) in zip(warmups + measured, runs):
+        common = {"test_case": test_case["name"], "trial": trial, "warmup": trial < warmup}
+        image_latency = run.durations.get("image", 0.0)
+        image_error = run.errors.get("image") or run.errors.get("quality_gate") or run.errors.get("refs")
+        if image_error is not None:
+            image_results.append({
+                **common,
+                "latency_sec": image_latency,
+                **phases.get("image", {}),
+                "file": None,
+                "status": "failed",
+                "error": str(image_error)[:100],
+            })
+            # The videos never ran, but they still count against each model's success rate
+            for model in models:
+                video_results.append({
+                    **common,
                     "model": model,
-                    "image_latency_sec": img_info["latency_sec"],
-                    "video_latency_sec": latency,
-                    "total_latency_sec": -1,
+                    "image_latency_sec": image_latency,
+                    "video_latency_sec": None,
+                    "total_latency_sec": None,
+                    **{f"image_{k}": v for k, v in phases.get("image", {}).items()},
                     "status": "failed",
-                    "image_file": img_file,
-                    "error": str(e)[:100],
+                    "error": f"image failed: {str(image_error)[:85]}",
                 })
-    
-    return results
+            continue
+
+        gate = run.outputs["quality_gate"]
+        img_file = gate["local_file"] or gate["image_url"]
+        image_results.append({
+            **common,
+            "latency_sec": image_latency,
+            "queue_wait_sec": run.waits.get("image", 0.0),
+            **phases.get("image", {}),
+            "file": img_file,
+            "status": "success",
+        })
+        for model in models:
+            node = f"video:{model}:0"
+            row = {
+                **common,
+                "model": model,
+                "image_latency_sec": image_latency,
+                "video_latency_sec": run.durations.get(node, 0.0),
+                "video_queue_wait_sec": run.waits.get(node, 0.0),
+                **{f"image_{k}": v for k, v in phases.get("image", {}).items()},
+                **{f"video_{k}": v for k, v in phases.get(node, {}).items()},
+                "image_file": img_file,
+            }
+            if node in run.errors:
+                # Failures keep their latency but get no total, so they never count as fast
+                row.update(total_latency_sec=None, status="failed", error=str(run.errors[node])[:100])
+            else:
+                vid_files = run.outputs[node].get("local_files") or []
+                row.update(
+                    total_latency_sec=image_latency + row["video_latency_sec"],
+                    status="success",
+                    video_file=vid_files[0] if vid_files else None,
+                )
+            video_results.append(row)
 
+    return image_results, video_results
 
-def compile_report(image_mapping, video_results):
-    """Generate CSV + JSON summary"""
+
+def compile_report(image_results, video_results, config: dict, alpha: float = 0.05):
+    """
+    Generate CSV + JSON summary from measured (non-warmup) trials.
+
+    Latency statistics cover successful runs only; failures are counted in
+    the success rate and their latency is reported separately. A fastest
+    model is only named when it beats the runner-up significantly at `alpha`.
+    """
     df = pd.DataFrame(video_results)
-    
-    image_success = sum(1 for v in image_mapping.values() if v["status"] == "success")
-    image_failed = len(image_mapping) - image_success
-    
+    images = [r for r in image_results if not r["warmup"]]
+    videos = [r for r in video_results if not r["warmup"]]
+    ok_videos = [r for r in videos if r["status"] == "success"]
+    models = list(dict.fromkeys(r["model"] for r in videos))
+
     summary = {
         "generated_at": datetime.now().isoformat(),
+        "config": {**config, "alpha": alpha},
         "images": {
-            "total": len(image_mapping),
-            "successful": image_success,
-            "failed": image_failed,
-            "details": image_mapping,
+            "total": len(images),
+            "successful": sum(1 for r in images if r["status"] == "success"),
+            "failed": sum(1 for r in images if r["status"] == "failed"),
+            "latency_sec": describe([r["latency_sec"] for r in images if r["status"] == "success"]),
+            "phases_sec": phase_medians([r for r in images if r["status"] == "success"]),
+            "failure_latency_sec": describe([r["latency_sec"] for r in images if r["status"] == "failed"]),
         },
         "videos": {
-            "total_runs": len(video_results),
-            "successful_runs": len([r for r in video_results if r["status"] == "success"]),
-            "failed_runs": len([r for r in video_results if r["status"] == "failed"]),
+            "total_runs": len(videos),
+            "successful_runs": len(ok_videos),
+            "failed_runs": len(videos) - len(ok_videos),
+            "warmup_runs_excluded": len(video_results) - len(videos),
         },
+        # Runs whose spans had left the trace buffer; their phases are excluded
+        "phases_incomplete_runs": (
+            sum(1 for r in images if r.get("phases_complete") is False)
+            + sum(1 for r in videos if r.get("video_phases_complete") is False)
+        ),
         "by_model": {},
         "by_test_case": {},
         "raw_results": video_results,
+        "raw_image_results": image_results,
     }
-    
-    if len(df[df["status"] == "success"]) > 0:
-        for model in df[df["status"] == "success"]["model"].unique():
-            model_data = df[df["model"] == model]
-            summary["by_model"][model] = {
-                "avg_latency_sec": float(model_data["total_latency_sec"].mean()),
-                "min_latency_sec": float(model_data["total_latency_sec"].min()),
-                "max_latency_sec": float(model_data["total_latency_sec"].max()),
-                "success_rate": float(model_data["status"].eq("success").mean()),
-                "runs": len(model_data),
-            }
-    
-    if len(df[df["status"] == "success"]) > 0:
-        for tc in df[df["status"] == "success"]["test_case"].unique():
-            tc_data = df[df["test_case"] == tc]
-            fastest_model = tc_data.loc[tc_data["total_latency_sec"].idxmin(), "model"]
-            summary["by_test_case"][tc] = {
-                "avg_latency_sec": float(tc_data["total_latency_sec"].mean()),
-                "fastest_model": fastest_model,
-                "fastest_latency_sec": float(tc_data["total_latency_sec"].min()),
-            }
-    
+
+    for model in models:
+        runs = [r for r in videos if r["model"] == model]
+        ok = [r for r in runs if r["status"] == "success"]
+        summary["by_model"][model] = {
+            "runs": len(runs),
+            "success_rate": len(ok) / len(runs),
+            "video_latency_sec": describe([r["video_latency_sec"] for r in ok]),
+            "total_latency_sec": describe([r["total_latency_sec"] for r in ok]),
+            "failure_latency_sec": describe(
+                [r["video_latency_sec"] for r in runs if r["status"] == "failed" and r["video_latency_sec"] is not None]
+            ),
+            "phases_sec": phase_medians(ok, "video_"),
+        }
+    overall = fastest({m: [r["video_latency_sec"] for r in ok_videos if r["model"] == m] for m in models}, alpha)
+    summary["fastest_model"] = overall["fastest"]
+    summary["fastest_candidates"] = overall["candidates"]
+    summary["fastest_p_value"] = overall["p_value"]
+
+    for tc in dict.fromkeys(r["test_case"] for r in videos):
+        samples = {m: [r["total_latency_sec"] for r in ok_videos if r["test_case"] == tc and r["model"] == m] for m in models}
+        verdict = fastest(samples, alpha)
+        summary["by_test_case"][tc] = {
+            "total_latency_sec": {m: describe(values) for m, values in samples.items()},
+            "fastest_model": verdict["fastest"],
+            "fastest_candidates": verdict["candidates"],
+            "p_value": verdict["p_value"],
+            "phases_sec": {
+                m: _combined_phases([r for r in ok_videos if r["test_case"] == tc and r["model"] == m])
+                for m in models
+            },
+        }
+
     return summary, df
 
 
+def phase_medians(rows: list, prefix: str = "") -> dict:
+    """Median seconds per phase over `rows` (keys `<prefix><phase>_sec`)."""
+    medians = {}
+    for phase in PHASES:
+        values = [r[f"{prefix}{phase}_sec"] for r in rows if r.get(f"{prefix}{phase}_sec") is not None]
+        medians[phase] = statistics.median(values) if values else None
+    return medians
+
+
+def _combined_phases(rows: list) -> dict:
+    """Image plus video phase medians, so the bars stack to the end-to-end latency."""
+    image, video = phase_medians(rows, "image_"), phase_medians(rows, "video_")
+    return {
+        phase: None if image[phase] is None or video[phase] is None else image[phase] + video[phase]
+        for phase in PHASES
+    }
+
+
+def write_phase_chart(summary: dict, path: Path) -> bool:
+    """Stacked phase bars per model and per test case x model as an HTML page; False without plotly."""
+    try:
+        import plotly.graph_objects as go
+    except ImportError:
+        return False
+
+    def figure(title, bars):
+        labels = list(bars)
+        fig = go.Figure([
+            go.Bar(name=phase, x=labels, y=[bars[label][phase] or 0 for label in labels])
+            for phase in PHASES
+        ])
+        fig.update_layout(barmode="stack", title=title, yaxis_title="median seconds")
+        return fig
+
+    by_model = {"image": summary["images"]["phases_sec"]}
+    by_model.update({model: stats["phases_sec"] for model, stats in summary["by_model"].items()})
+    by_case = {
+        f"{tc} / {model}": phases
+        for tc, stats in summary["by_test_case"].items()
+        for model, phases in stats["phases_sec"].items()
+    }
+    html = "".join(
+        fig.to_html(full_html=False, include_plotlyjs="cdn" if i == 0 else False)
+        for i, fig in enumerate([
+            figure("Phase breakdown by model (video models: video generation only)", by_model),
+            figure("Phase breakdown by test case and model (image + video)", by_case),
+        ])
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"<html><head><meta charset='utf-8'></head><body>{html}</body></html>")
+    return True
+
+
+def _fmt_phases(phases: dict) -> str:
+    return " | ".join(f"{phase} {phases[phase]:6.2f}s" if phases[phase] is not None else f"{phase} -" for phase in PHASES)
+
+
+def _fmt_stats(stats: dict) -> str:
+    if not stats.get("n"):
+        return "no successful runs"
+    low, high = stats["median_ci95"]
+    return (f"median {stats['median']:7.2f}s [95% CI {low:.2f}-{high:.2f}] | p95 {stats['p95']:7.2f}s | "
+            f"mean {stats['mean']:7.2f}s | n={stats['n']}")
+
+
 if __name__ == "__main__":
-    print("\n🚀 QUICK BENCHMARK: Phase 1 (Images) → Phase 2 (Videos)\n")
-    
-    image_mapping = generate_all_images()
-    
-    image_summary = {
-        "total": len(image_mapping),
-        "successful": sum(1 for v in image_mapping.values() if v["status"] == "success"),
-        "failed": sum(1 for v in image_mapping.values() if v["status"] == "failed"),
+    parser = argparse.ArgumentParser(description="Benchmark image and video models.")
+    parser.add_argument("--models", nargs="+", default=MODELS, help="Video models to benchmark")
+    parser.add_argument("--concurrency", type=int, default=1, help="FAL calls in flight overall")
+    parser.add_argument("--model-concurrency", type=int, default=1, help="FAL calls in flight per model")
+    parser.add_argument("--repetitions", type=int, default=5, help="Measured trials per test case")
+    parser.add_argument("--warmup", type=int, default=1, help="Trials per test case run first and excluded (cold starts)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level for naming a fastest model")
+    args = parser.parse_args()
+
+    print("\n🚀 QUICK BENCHMARK: Images → Videos\n")
+
+    config = {
+        "models": args.models,
+        "test_cases": [tc["name"] for tc in TEST_CASES],
+        "concurrency": args.concurrency,
+        "model_concurrency": args.model_concurrency,
+        "repetitions": args.repetitions,
+        "warmup": args.warmup,
     }
-    print(f"\n✓ Image Generation Summary: {image_summary['successful']}/{image_summary['total']} success")
-    
-    video_results = generate_all_videos(image_mapping)
-    
-    summary, df = compile_report(image_mapping, video_results)
-    
+    started_at = time.time()
+    image_results, video_results = run_benchmark(
+        args.models, args.concurrency, args.model_concurrency, args.repetitions, args.warmup,
+    )
+
+    summary, df = compile_report(image_results, video_results, config, args.alpha)
+    print(f"\n✓ Image Generation Summary: {summary['images']['successful']}/{summary['images']['total']} success")
+
     csv_path = Path("outputs/benchmark_results.csv")
     csv_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(csv_path, index=False)
     print(f"\n✓ CSV saved: {csv_path}")
-    
+
     json_path = Path("outputs/benchmark_summary.json")
     with open(json_path, "w") as f:
         json.dump(summary, f, indent=2, default=str)
     print(f"✓ JSON saved: {json_path}")
-    
+
+    store = BenchmarkStore()
+    run_id = store.record(config, image_results, video_results, started_at)
+    print(f"✓ Run stored: {run_id} in {store.path} (compare with: python -m scripts.benchmark_store compare)")
+
     print(f"\n{'='*60}")
     print("BENCHMARK SUMMARY")
     print(f"{'='*60}")
-    
-    print(f"\nIMAGES:")
-    print(f"  Total: {image_summary['total']}")
-    print(f"  Successful: {image_summary['successful']}")
-    print(f"  Failed: {image_summary['failed']}")
-    
+
+    print(f"\nIMAGES ({args.warmup} warmup trial(s) per test case excluded):")
+    print(f"  Successful: {summary['images']['successful']}/{summary['images']['total']}")
+    print(f"  Latency:    {_fmt_stats(summary['images']['latency_sec'])}")
+
     print(f"\nVIDEOS:")
     print(f"  Total runs: {summary['videos']['total_runs']}")
     print(f"  Successful: {summary['videos']['successful_runs']}")
     print(f"  Failed: {summary['videos']['failed_runs']}")
-    
+
     if summary["by_model"]:
-        print(f"\nBy Model:")
+        print(f"\nBy Model (video latency, successful runs):")
         for model, stats in summary["by_model"].items():
-            print(f"  {model:10} {stats['avg_latency_sec']:7.2f}s avg | {stats['success_rate']*100:5.0f}% success | {stats['runs']} runs")
-    
+            print(f"  {model:10} {_fmt_stats(stats['video_latency_sec'])} | {stats['success_rate']*100:3.0f}% success")
+            if stats["failure_latency_sec"]["n"]:
+                print(f"  {'':10} failures: median {stats['failure_latency_sec']['median']:.2f}s, n={stats['failure_latency_sec']['n']}")
+        if summary["fastest_model"]:
+            print(f"  Fastest: {summary['fastest_model']} (p={summary['fastest_p_value']:.3f})")
+        else:
+            print(f"  Fastest: no significant difference among {', '.join(summary['fastest_candidates']) or '-'}")
+
     if summary["by_test_case"]:
         print(f"\nBy Test Case:")
         for tc, stats in summary["by_test_case"].items():
-            print(f"  {tc:25} fastest={stats['fastest_model']:6} ({stats['fastest_latency_sec']:7.2f}s)")
\ No newline at end of file
+            verdict = stats["fastest_model"] or f"not significant ({', '.join(stats['fastest_candidates']) or '-'})"
+            print(f"  {tc:25} fastest={verdict}")
+
+    print(f"\nPhases (median seconds):")
+    if summary["phases_incomplete_runs"]:
+        print(f"  ⚠ {summary['phases_incomplete_runs']} run(s) lost their trace spans and are left out of the phases")
+    print(f"  {'image':10} {_fmt_phases(summary['images']['phases_sec'])}")
+    for model, stats in summary["by_model"].items():
+        print(f"  {model:10} {_fmt_phases(stats['phases_sec'])}")
+    for tc, stats in summary["by_test_case"].items():
+        for model, phases in stats["phases_sec"].items():
+            print(f"  {tc + ' / ' + model:35} {_fmt_phases(phases)}")
+
+    chart_path = Path("outputs/benchmark_phases.html")
+    if write_phase_chart(summary, chart_path):
+        print(f"\n✓ Phase chart saved: {chart_path}")
+    else:
+        print("\n(plotly not installed; skipped the phase chart - pip install -r requirements-bm.txt)")
@@ -0,0 +1,292 @@
+"""
+Bulk try-on generation for whole product lines.
+
+Reads a manifest (CSV or JSONL) and runs every cell through the image
+pipeline and, when the cell names a video model, the video pipeline. A row
+expands to the cross product of its list fields, so one row can cover
+persons x SKUs x backgrounds x models:
+
+    {"person": ["assets/a.png", "assets/b.png"], "gender": "male",
+     "top": ["top-blue-tshirt", "top-white-polo"], "bottom": "bottom-black-jeans",
+     "background": ["Urban Cafe", "Studio"], "model": ["", "grok"]}
+
+In CSV, list fields are "|"-separated. Fields: person (path or URL,
+required), gender, top, bottom (catalog SKU or name, or an image path/URL),
+background, environment, model (video model; empty for image only),
+motion, duration_sec.
+
+Progress is checkpointed per cell in a SQLite file (--db). Re-running the
+same command skips finished cells, retries cells a crash left running (their
+FAL requests are polled again rather than resubmitted) and, with
+--retry-failed, failed ones.
+
+    python scripts/run_catalog_batch.py manifest.jsonl --concurrency 8 --video-concurrency 2
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+from app.backend.api.catalog import get_catalog, resolved_image
+
+CELL_FIELDS = ("person", "gender", "top", "bottom", "background", "environment", "model", "motion", "duration_sec")
+LIST_FIELDS = ("person", "top", "bottom", "background", "model")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cells (
+    key TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    fal_requests TEXT NOT NULL DEFAULT '{}',
+    image_url TEXT,
+    video_url TEXT,
+    latency_sec REAL,
+    error TEXT,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS cells_status ON cells (status);
+"""
+
+
+def read_manifest(path: str):
+    """Yield manifest rows as dicts."""
+    with open(path, newline="") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(f):
+                yield {
+                    k: (v.split("|") if k in LIST_FIELDS and v and "|" in v else v)
+                    for k, v in row.items()
+                }
+
+
+def expand(row: dict):
+    """Cross product of a row's list fields, one dict per cell."""
+    row = {k: v for k, v in row.items() if k in CELL_FIELDS}
+    lists = {k: v if isinstance(v, list) else [v] for k, v in row.items()}
+    keys = list(lists)
+    for values in itertools.product(*(lists[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def cell_key(cell: dict) -> str:
+    normalized = {k: cell.get(k) or "" for k in CELL_FIELDS}
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class Checkpoint:
+    """Per-cell progress in SQLite, written from many threads."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def load(self, cells) -> int:
+        """Register manifest cells; existing ones keep their progress. Returns cells added."""
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO cells (key, params) VALUES (?, ?)",
+                ((cell_key(cell), json.dumps(cell)) for cell in cells),
+            )
+            self._conn.execute("COMMIT")
+            return self._conn.total_changes - before
+
+    def pending(self, retry_failed: bool) -> list:
+        """(key, params, fal_requests) of cells still to run; cells left running by a crash are included."""
+        statuses = ("pending", "running", "failed") if retry_failed else ("pending", "running")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, params, fal_requests FROM cells WHERE status IN ({','.join('?' * len(statuses))})",
+                statuses,
+            ).fetchall()
+        return [(key, json.loads(params), json.loads(fal)) for key, params, fal in rows]
+
+    def counts(self) -> dict:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM cells GROUP BY status").fetchall())
+
+    def update(self, key: str, **fields):
+        if "fal_requests" in fields:
+            fields["fal_requests"] = json.dumps(fields["fal_requests"])
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE cells SET {columns} WHERE key = ?", (*fields.values(), key))
+
+    def start(self, key: str):
+        with self._lock:
+            self._conn.execute("UPDATE cells SET status = 'running', attempts = attempts + 1 WHERE key = ?", (key,))
+
+
+def _outfit(value: str) -> tuple:
+    """(display name, image) for a catalog SKU/name; anything else is used as a path or URL."""
+    if not value:
+        return None, None
+    item = get_catalog().get(value)
+    if item is None:
+        return os.path.splitext(os.path.basename(value))[0].replace("_", " "), value
+    return item["name"], resolved_image(item)
+
+
+def _background(value: str) -> str:
+    item = get_catalog().get(value) if value else None
+    return (item and item.get("description")) or value or "studio"
+
+
+def run_cell(cell: dict, fal_requests: dict, checkpoint: Checkpoint, key: str, limits: dict, download: bool) -> dict:
+    """Generate one cell; returns the fields to store on success, raises on failure."""
+    from src.clients.fal_client import queue_listener, resume_requests
+    from src.schemas.environment import EnvironmentAttributes
+    from src.schemas.person import PersonAttributes
+    from src.services.pipelines.image_pipeline import ImagePipeline
+    from src.services.pipelines.video_pipeline import VideoPipeline
+
+    handles = dict(fal_requests)
+
+    def on_update(update: dict):
+        # Persist request ids as soon as FAL accepts them, so a crash can resume them
+        if update.get("event") == "enqueued":
+            handles[update["model"]] = update["request_id"]
+            checkpoint.update(key, fal_requests=handles)
+
+    gender = cell.get("gender") or "male"
+    (top, top_ref), (bottom, bottom_ref) = _outfit(cell.get("top")), _outfit(cell.get("bottom"))
+    apparel = " with ".join(name for name in (top, bottom) if name) or "casual outfit"
+    outfit_refs = [ref for ref in (top_ref, bottom_ref) if ref]
+    start = time.monotonic()
+
+    with queue_listener(on_update), resume_requests(fal_requests):
+        with limits["image"]:
+            image = ImagePipeline().run(
+                person=PersonAttributes(height_cm=175, weight_kg=85, gender=gender, age=26),
+                env=EnvironmentAttributes(
+                    apparel_type=apparel,
+                    inferred_setting=_background(cell.get("background")),
+                    visual_cues=cell.get("environment") or "professional lighting",
+                ),
+                description=f"Full body portrait of a {gender} wearing {apparel}",
+                person_reference_image=cell["person"],
+                outfit_reference_images=outfit_refs,
+                no_download=not download,
+            )
+        if image.get("error"):
+            raise RuntimeError(image["error"])
+        image_url = ((image.get("raw_response") or {}).get("images") or [{}])[0].get("url")
+        if not image_url:
+            raise RuntimeError("Image response had no URL")
+        result = {"image_url": image_url}
+
+        if cell.get("model"):
+            with limits["video"]:
+                video = VideoPipeline(video_model=cell["model"]).run(
+                    reference_image=image_url,
+                    apparel_description=apparel,
+                    motion_description=cell.get("motion") or "person turns around slowly to show the outfit",
+                    duration_sec=int(cell.get("duration_sec") or 4),
+                    gender=gender,
+                    no_download=not download,
+                )
+            result["video_url"] = ((video.get("raw_response") or {}).get("video") or {}).get("url")
+            if not result["video_url"]:
+                raise RuntimeError("Video response had no URL")
+
+    result["latency_sec"] = round(time.monotonic() - start, 2)
+    return result
+
+
+def _report(checkpoint: Checkpoint, started: float, done_before: int, total: int):
+    counts = checkpoint.counts()
+    done = counts.get("done", 0)
+    elapsed = time.monotonic() - started
+    rate = (done - done_before) / elapsed * 60 if elapsed > 0 else 0.0
+    remaining = total - done - counts.get("failed", 0)
+    eta = f"{remaining / rate:.0f} min" if rate > 0 else "-"
+    print(
+        f"[{elapsed:7.0f}s] done {done}/{total}  failed {counts.get('failed', 0)}  "
+        f"running {counts.get('running', 0)}  {rate:.1f} cells/min  ETA {eta}",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate try-on images/videos for a catalog manifest.")
+    parser.add_argument("manifest", help="CSV or JSONL manifest")
+    parser.add_argument("--db", default=None, help="Checkpoint database (default: <manifest>.progress.db)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Cells in flight")
+    parser.add_argument("--image-concurrency", type=int, default=None, help="Image calls in flight (default: --concurrency)")
+    parser.add_argument("--video-concurrency", type=int, default=2, help="Video calls in flight")
+    parser.add_argument("--retry-failed", action="store_true", help="Run failed cells again")
+    parser.add_argument("--download", action="store_true", help="Also download outputs locally")
+    parser.add_argument("--report-every", type=float, default=30.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+
+    checkpoint = Checkpoint(args.db or f"{args.manifest}.progress.db")
+    added = checkpoint.load(cell for row in read_manifest(args.manifest) for cell in expand(row))
+    work = checkpoint.pending(args.retry_failed)
+    counts = checkpoint.counts()
+    total = sum(counts.values())
+    print(f"{total} cells ({added} new), {counts.get('done', 0)} already done, {len(work)} to run")
+    if not work:
+        return
+
+    limits = {
+        "image": threading.BoundedSemaphore(args.image_concurrency or args.concurrency),
+        "video": threading.BoundedSemaphore(args.video_concurrency),
+    }
+    started = time.monotonic()
+    done_before = counts.get("done", 0)
+
+    def process(item):
+        key, cell, fal_requests = item
+        checkpoint.start(key)
+        try:
+            result = run_cell(cell, fal_requests, checkpoint, key, limits, args.download)
+        except Exception as e:
+            checkpoint.update(key, status="failed", error=str(e)[:500], finished_at=time.time())
+            print(f"  ! {key} failed: {e}", flush=True)
+            return
+        checkpoint.update(key, status="done", error=None, finished_at=time.time(), **result)
+
+    stop_reporting = threading.Event()
+
+    def report_loop():
+        while not stop_reporting.wait(args.report_every):
+            _report(checkpoint, started, done_before, total)
+
+    threading.Thread(target=report_loop, daemon=True).start()
+    pool = ThreadPoolExecutor(max_workers=args.concurrency)
+    try:
+        list(pool.map(process, work))
+    except KeyboardInterrupt:
+        # Cells in flight stay "running" and resume on the next run
+        pool.shutdown(wait=False, cancel_futures=True)
+        print("\nInterrupted; run the same command again to resume.")
+        raise
+    finally:
+        stop_reporting.set()
+        _report(checkpoint, started, done_before, total)
+    pool.shutdown()
+
+    if checkpoint.counts().get("failed"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
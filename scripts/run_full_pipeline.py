@@ -2,10 +2,29 @@ from src.schemas.person import PersonAttributes
 from src.schemas.environment import EnvironmentAttributes
 from src.services.pipelines.image_pipeline import ImagePipeline
 from src.services.pipelines.video_pipeline import VideoPipeline
+from src.services.pipelines.run_manifest import RunManifest
+
+PERSON_REFERENCE = "assets/pranay.png"
+OUTFIT_REFERENCES = ["assets/top.png", "assets/bottom.png"]
+VIDEO_MODEL = "grok"
+APPAREL_DESCRIPTION = "blue t-shirt and khaki shorts"
+MOTION_DESCRIPTION = "person turns around slowly to show the outfit"
+DURATION_SEC = 5
 
 
 def main():
 
+    # Completed stages are reused when this script is rerun with the same inputs
+    manifest = RunManifest.for_inputs("full_pipeline", {
+        "person": PERSON_REFERENCE,
+        "outfits": OUTFIT_REFERENCES,
+        "video_model": VIDEO_MODEL,
+        "apparel": APPAREL_DESCRIPTION,
+        "motion": MOTION_DESCRIPTION,
+        "duration_sec": DURATION_SEC,
+    })
+    print(f"Run manifest: {manifest.path}")
+
     # ============================================================
     # IMAGE GENERATION
     # ============================================================
@@ -29,12 +48,9 @@ def main():
         person=person,
         env=env,
         description="Full body frontal view based on given reference face and full body image.",
-        person_reference_image="assets/pranay.png",
-        face_reference_image="",
-        outfit_reference_images=[
-            "assets/top.png",
-            "assets/bottom.png",
-        ]
+        person_reference_image=PERSON_REFERENCE,
+        outfit_reference_images=OUTFIT_REFERENCES,
+        checkpoint=manifest,
     )
 
     print("Image Stage:", image_result.get("stage"))
@@ -51,13 +67,15 @@ def main():
     # ============================================================
     # VIDEO GENERATION
     # ============================================================
-    video_pipeline = VideoPipeline(video_model="grok")
+    video_pipeline = VideoPipeline(video_model=VIDEO_MODEL)
 
     print("\n===== VIDEO GENERATION STAGE =====")
     video_result = video_pipeline.run(
         reference_image=generated_image,
-        apparel_description="blue t-shirt and khaki shorts",
-        duration_sec=5,
+        apparel_description=APPAREL_DESCRIPTION,
+        motion_description=MOTION_DESCRIPTION,
+        duration_sec=DURATION_SEC,
+        checkpoint=manifest,
     )
 
     print("Video Stage:", video_result.get("stage"))
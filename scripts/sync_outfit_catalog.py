@@ -0,0 +1,133 @@
+"""
+Mirror the outfit catalog into FAL storage.
+
+For every catalog garment with an image URL:
+
+1. download the source image into OUTFIT_MIRROR_DIR (a garment whose source
+   link has died keeps using the last mirrored copy),
+2. preprocess it (EXIF orientation, long side capped at --max-side, PNG
+   without metadata),
+3. upload it to FAL storage when its content hash changed or the last
+   upload is older than --refresh-days,
+
+and record the FAL URL and hash on the catalog row, where
+`get_outfit_image` picks it up.
+
+    python scripts/sync_outfit_catalog.py
+    python scripts/sync_outfit_catalog.py --force --only top-blue-tshirt
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../'))
+
+from app.backend.api.catalog import OUTFIT_MIRROR_MAX_AGE_DAYS, get_catalog
+
+OUTFIT_MIRROR_DIR = Path(os.getenv("OUTFIT_MIRROR_DIR", "outputs/outfits"))
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fetch_source(sku: str, url: str) -> Path:
+    """Download the source image; fall back to the previous copy if the link fails."""
+    from src.utils.file_utils import download_file
+
+    path = OUTFIT_MIRROR_DIR / "source" / f"{_slug(sku)}{Path(url.split('?')[0]).suffix or '.img'}"
+    partial = path.with_name(path.name + ".part")
+    try:
+        download_file(url, partial, timeout=60.0)
+        os.replace(partial, path)
+    except Exception as e:
+        partial.unlink(missing_ok=True)
+        if not path.exists():
+            raise
+        print(f"  ! {sku}: source download failed ({e}); using mirrored copy")
+    return path
+
+
+def preprocess(source: Path, sku: str, max_side: int) -> Path:
+    """Normalised PNG of the garment image, at most `max_side` pixels on its long side."""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        path = OUTFIT_MIRROR_DIR / f"{_slug(sku)}.png"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        img.save(path, format="PNG", optimize=True)
+    return path
+
+
+def sync_one(client, catalog, item: dict, args) -> str:
+    """Mirror one garment; returns uploaded, unchanged or failed."""
+    sku = item["sku"]
+    try:
+        image = preprocess(fetch_source(sku, item["image_url"]), sku, args.max_side)
+        sha256 = _sha256(image)
+        fresh = time.time() - (item["mirrored_at"] or 0) < args.refresh_days * 86400
+        if item["mirror_sha256"] == sha256 and fresh and not args.force:
+            return "unchanged"
+
+        catalog.set_mirror(sku, client.upload_file(str(image)), sha256, time.time())
+        return "uploaded"
+    except Exception as e:
+        print(f"  ! {sku}: {e}")
+        return "failed"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mirror outfit images into FAL storage.")
+    parser.add_argument("--only", action="append", help="SKU to sync (repeatable)")
+    parser.add_argument("--force", action="store_true", help="Re-upload even if unchanged")
+    parser.add_argument("--max-side", type=int, default=int(os.getenv("OUTFIT_MAX_SIDE", "1024")))
+    parser.add_argument(
+        "--refresh-days", type=float, default=OUTFIT_MIRROR_MAX_AGE_DAYS / 2,
+        help="Re-upload entries older than this so URLs never reach OUTFIT_MIRROR_MAX_AGE_DAYS",
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from src.clients.fal_client import FalClient
+
+    catalog = get_catalog()
+    client = FalClient()
+    start = time.time()
+    counts = {"uploaded": 0, "unchanged": 0, "failed": 0}
+
+    def run(item):
+        action = sync_one(client, catalog, item, args)
+        print(f"  {action:<9} {item['sku']}")
+        return action
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for action in pool.map(run, catalog.garments(args.only)):
+            counts[action] += 1
+
+    print(
+        f"\n{counts['uploaded']} uploaded, {counts['unchanged']} unchanged, {counts['failed']} failed "
+        f"in {time.time() - start:.1f}s -> {catalog.path}"
+    )
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,349 @@
-from dotenv import load_dotenv
-load_dotenv()
-
-import fal_client
-from loguru import logger
 from tenacity import retry, stop_after_attempt, wait_exponential
-import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import os
+import time
+
+from src.core import metrics, tracing
+from src.core.log import get_logger, redact
+from src.core.cancellation import JobCancelled, current_token, raise_if_cancelled
+
+
+FAL_REQUESTS = metrics.Counter(
+    "felix_fal_requests_total", "FAL requests by model endpoint and outcome", ("model", "outcome")
+)
+FAL_RETRIES = metrics.Counter("felix_fal_retries_total", "FAL calls retried after an error", ("model",))
+FAL_IN_FLIGHT = metrics.Gauge("felix_fal_requests_in_flight", "FAL requests currently being waited on", ("model",))
+FAL_DURATION = metrics.Histogram(
+    "felix_fal_request_duration_seconds", "Submit to result, per FAL request", ("model",)
+)
+FAL_QUEUE_WAIT = metrics.Histogram(
+    "felix_fal_queue_wait_seconds", "Time a FAL request spent queued before inference started", ("model",)
+)
+FAL_INFERENCE = metrics.Histogram(
+    "felix_fal_inference_seconds", "Time from inference start to result", ("model",)
+)
+
+
+log = get_logger("fal")
+
+
+def _count_retry(retry_state):
+    model = retry_state.args[1] if len(retry_state.args) > 1 else retry_state.kwargs.get("model", "")
+    FAL_RETRIES.inc(model=model)
+
+
+# Callbacks interested in queue progress of FAL calls made in the current context.
+_queue_listeners: ContextVar[tuple] = ContextVar("fal_queue_listeners", default=())
+
+
+@contextmanager
+def queue_listener(callback):
+    """
+    Forward queue events of every FAL call made inside the block to `callback`.
+
+    The callback receives a dict such as
+    {"model": ..., "event": "enqueued" | "queued" | "in_progress" | "completed", ...}.
+    """
+    token = _queue_listeners.set(_queue_listeners.get() + (callback,))
+    try:
+        yield
+    finally:
+        _queue_listeners.reset(token)
+
+
+# Model endpoint -> id of a request the current job submitted before a restart
+_resume_handles: ContextVar[dict] = ContextVar("fal_resume_handles", default={})
+
+# Seconds between status polls of a resumed request
+RESUME_POLL_SEC = float(os.getenv("FAL_RESUME_POLL_SEC", "2"))
+
+
+@contextmanager
+def resume_requests(handles: dict):
+    """
+    Attach `subscribe` calls made inside the block to earlier requests.
+
+    `handles` maps model endpoints to FAL request ids (a job's
+    `fal_requests`). The first call for one of those models polls the
+    existing request instead of submitting a new one, so a job picked up
+    again after a restart does not pay for its generations twice.
+    """
+    token = _resume_handles.set(dict(handles or {}))
+    try:
+        yield
+    finally:
+        _resume_handles.reset(token)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_env():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+@functools.lru_cache(maxsize=None)
+def _fal_sdk():
+    """The FAL SDK, imported on first client use so importing this module stays cheap."""
+    import fal_client
+    return fal_client
 
 
 class FalClient:
     def __init__(self):
-        logger.info("FalClient initialized")
+        _load_env()
+        if os.getenv("FAL_STANDIN"):
+            # FAL_STANDIN=1 swaps the real API for the local simulator
+            from src.clients import fal_standin
+            self._fal = fal_standin
+        else:
+            self._fal = _fal_sdk()
 
     @retry(
         stop=stop_after_attempt(5),  # Increase retries from 3 to 5
         wait=wait_exponential(min=2, max=30),  # Increase wait time
+        before_sleep=_count_retry,
     )
+    @tracing.traced("fal.subscribe")
     def subscribe(
         self,
         model: str,
         arguments: dict,
         with_logs: bool = True,
     ):
-        logger.info(f"Calling FAL model: {model}")
-        # logger.debug(f"Arguments: {self._sanitize_arguments(arguments)}")
+        raise_if_cancelled()
+        tracing.current_span().set(model=model)
+        log.info("fal.call", model=model)
+        log.debug("fal.arguments", model=model, arguments=arguments)
+        phases = {"start": time.monotonic()}
+
+        def on_enqueue(request_id):
+            phases["enqueued"] = time.monotonic()
+            self._notify(model, "enqueued", request_id=request_id)
+            self._cancel_with_job(model, request_id)
 
         def on_queue_update(update):
-            try:
-                if isinstance(update, fal_client.InProgress):
-                    for log in update.logs:
-                        logger.debug(log["message"])
-            except Exception:
-                pass
+            # Stop waiting as soon as the job is cancelled
+            raise_if_cancelled()
+            self._mark_phase(phases, update)
+            self._handle_queue_update(model, update)
 
+        FAL_IN_FLIGHT.inc(model=model)
         try:
-            try:
-                result = fal_client.subscribe(
-                    model,
-                    arguments=arguments,
-                    with_logs=with_logs,
-                    on_queue_update=on_queue_update,
-                    # timeout=600,  # 10 minute timeout for long operations
-                )
-            except TypeError as e:
-                # Older fal_client versions don't accept `timeout`
-                if "timeout" not in str(e):
-                    raise
-                logger.warning("fal_client.subscribe does not support `timeout`; retrying without it.")
-                result = fal_client.subscribe(
-                    model,
-                    arguments=arguments,
-                    with_logs=with_logs,
-                    on_queue_update=on_queue_update,
-                )
-
-            logger.info("FAL call complete")
-            # logger.debug(f"Response keys: {result.keys() if isinstance(result, dict) else type(result)}")
-            # logger.debug(f"Full response: {result}")
-            
+            result = None
+            # Taken once: if the resumed request failed, the retry submits afresh
+            resume_id = _resume_handles.get().pop(model, None)
+            if resume_id:
+                result = self._resume(model, resume_id, with_logs, on_enqueue, on_queue_update)
+            if result is None:
+                result = self._subscribe_new(model, arguments, with_logs, on_enqueue, on_queue_update)
+
+            log.info("fal.complete", model=model, elapsed_sec=round(time.monotonic() - phases["start"], 2))
+            log.debug("fal.response", model=model, response=result)
+            self._record_phases(model, phases)
+
+            return result
+
+        except JobCancelled:
+            FAL_REQUESTS.inc(model=model, outcome="cancelled")
+            raise
+
+        except Exception:
+            FAL_REQUESTS.inc(model=model, outcome="error")
+            log.exception("fal.failed", model=model)
+            raise
+
+        finally:
+            FAL_IN_FLIGHT.dec(model=model)
+
+    def _subscribe_new(self, model, arguments, with_logs, on_enqueue, on_queue_update):
+        try:
+            return self._fal.subscribe(
+                model,
+                arguments=arguments,
+                with_logs=with_logs,
+                on_enqueue=on_enqueue,
+                on_queue_update=on_queue_update,
+                # timeout=600,  # 10 minute timeout for long operations
+            )
+        except TypeError as e:
+            # Older fal_client versions don't accept `timeout`
+            if "timeout" not in str(e):
+                raise
+            log.warning("fal.timeout_unsupported", model=model)
+            return self._fal.subscribe(
+                model,
+                arguments=arguments,
+                with_logs=with_logs,
+                on_enqueue=on_enqueue,
+                on_queue_update=on_queue_update,
+            )
+
+    def _resume(self, model, request_id, with_logs, on_enqueue, on_queue_update):
+        """
+        Wait for a request submitted before a restart and return its result.
+
+        Returns None if FAL no longer knows the request, so the caller
+        submits it again.
+        """
+        try:
+            update = self._fal.status(model, request_id, with_logs=with_logs)
+        except Exception as e:
+            log.warning("fal.resume_failed", model=model, request_id=request_id, error=e)
+            return None
+
+        log.info("fal.resume", model=model, request_id=request_id)
+        on_enqueue(request_id)
+        while True:
+            on_queue_update(update)
+            if isinstance(update, self._fal.Completed):
+                break
+            time.sleep(RESUME_POLL_SEC)
+            update = self._fal.status(model, request_id, with_logs=with_logs)
+        return self._fal.result(model, request_id)
+
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(min=2, max=30),
+        before_sleep=_count_retry,
+    )
+    @tracing.traced("fal.subscribe")
+    async def subscribe_async(
+        self,
+        model: str,
+        arguments: dict,
+        with_logs: bool = True,
+    ):
+        """Async counterpart of `subscribe`: waits on the FAL queue without holding a thread."""
+        raise_if_cancelled()
+        tracing.current_span().set(model=model)
+        log.info("fal.call", model=model, mode="async")
+        phases = {"start": time.monotonic()}
+
+        FAL_IN_FLIGHT.inc(model=model)
+        try:
+            handle = await self._fal.submit_async(model, arguments=arguments)
+            phases["enqueued"] = time.monotonic()
+            self._notify(model, "enqueued", request_id=handle.request_id)
+            self._cancel_with_job(model, handle.request_id)
+
+            async for update in handle.iter_events(with_logs=with_logs):
+                raise_if_cancelled()
+                self._mark_phase(phases, update)
+                self._handle_queue_update(model, update)
+
+            result = await handle.get()
+            log.info("fal.complete", model=model, elapsed_sec=round(time.monotonic() - phases["start"], 2))
+            self._record_phases(model, phases)
             return result
-            
+
+        except JobCancelled:
+            FAL_REQUESTS.inc(model=model, outcome="cancelled")
+            raise
+
         except Exception as e:
-            message = str(e)
-            if len(message) > 1200:
-                message = message[:1200] + "... <truncated>"
-            logger.error(f"FAL API call failed: {type(e).__name__}: {message}")
-            tb = traceback.format_exc()
-            if len(tb) > 4000:
-                tb = tb[:4000] + "... <truncated>"
-            logger.error(f"Traceback:\n{tb}")
+            FAL_REQUESTS.inc(model=model, outcome="error")
+            log.error("fal.failed", model=model, error=e)
             raise
 
+        finally:
+            FAL_IN_FLIGHT.dec(model=model)
+
+    @tracing.traced("fal.submit")
+    def submit(
+        self,
+        model: str,
+        arguments: dict,
+        webhook_url: str | None = None,
+    ) -> str:
+        """
+        Enqueue a FAL request without waiting for it and return its request id.
+
+        With `webhook_url` set, FAL POSTs the result there once the request
+        finishes, so no thread has to stay blocked on it.
+        """
+        raise_if_cancelled()
+        tracing.current_span().set(model=model)
+        log.info("fal.submit", model=model, webhook=bool(webhook_url))
+        handle = self._fal.submit(model, arguments=arguments, webhook_url=webhook_url)
+        self._notify(model, "enqueued", request_id=handle.request_id)
+        self._cancel_with_job(model, handle.request_id)
+        return handle.request_id
+
+    def cancel(self, model: str, request_id: str) -> bool:
+        """Cancel a queued or running FAL request; returns False if FAL refused."""
+        log.info("fal.cancel", model=model, request_id=request_id)
+        try:
+            self._fal.cancel(model, request_id)
+            return True
+        except Exception as e:
+            log.warning("fal.cancel_failed", model=model, request_id=request_id, error=e)
+            return False
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=30))
+    @tracing.traced("fal.upload")
+    def upload_file(self, path) -> str:
+        """Upload a local file to FAL storage and return its URL."""
+        log.info("fal.upload", path=str(path))
+        return self._fal.upload_file(path)
+
+    def _cancel_with_job(self, model: str, request_id: str):
+        """Cancel `request_id` on FAL when the current job's cancel token fires."""
+        current = tracing.current_span()
+        if current is not None:
+            current.set(request_id=request_id)
+        token = current_token()
+        if token is not None:
+            token.on_cancel(lambda: self.cancel(model, request_id))
+
+    def _mark_phase(self, phases: dict, update):
+        """Record when a request was first seen running and when it completed."""
+        now = time.monotonic()
+        if isinstance(update, self._fal.InProgress):
+            phases.setdefault("in_progress", now)
+        elif isinstance(update, self._fal.Completed):
+            phases.setdefault("in_progress", now)
+            phases.setdefault("completed", now)
+
+    def _record_phases(self, model: str, phases: dict):
+        end = time.monotonic()
+        enqueued = phases.get("enqueued", phases["start"])
+        running = phases.get("in_progress", enqueued)
+        FAL_REQUESTS.inc(model=model, outcome="ok")
+        FAL_DURATION.observe(end - phases["start"], model=model)
+        FAL_QUEUE_WAIT.observe(running - enqueued, model=model)
+        FAL_INFERENCE.observe(phases.get("completed", end) - running, model=model)
+
+        # Queue and inference as child spans of the fal.subscribe span
+        to_wall = time.time() - end
+        tracing.record_span("fal.queue", enqueued + to_wall, running + to_wall, model=model)
+        tracing.record_span("fal.inference", running + to_wall, phases.get("completed", end) + to_wall, model=model)
+        # Label the downloads that follow with this model
+        metrics.set_model_label(model)
+
+    def _handle_queue_update(self, model: str, update):
+        try:
+            if isinstance(update, self._fal.Queued):
+                self._notify(model, "queued", position=update.position)
+            elif isinstance(update, self._fal.InProgress):
+                messages = [entry["message"] for entry in (update.logs or [])]
+                if messages:
+                    log.debug("fal.queue_update", model=model, logs=messages)
+                self._notify(model, "in_progress", logs=messages)
+            elif isinstance(update, self._fal.Completed):
+                self._notify(model, "completed")
+        except Exception:
+            pass
+
+    def _notify(self, model: str, event: str, **fields):
+        """Deliver a queue event to the listeners registered via `queue_listener`."""
+        for callback in _queue_listeners.get():
+            try:
+                callback({"model": model, "event": event, **fields})
+            except Exception as e:
+                log.warning("fal.listener_failed", model=model, error=e)
+
     def _sanitize_arguments(self, arguments: dict) -> dict:
-        """Avoid logging huge/base64 image payloads."""
-        if not isinstance(arguments, dict):
-            return arguments
-
-        def _redact_value(value):
-            if isinstance(value, str) and value.startswith("data:"):
-                return "<data-uri redacted>"
-            return value
-
-        sanitized = {}
-        for key, value in arguments.items():
-            if key in {"image_urls", "image_url"}:
-                if isinstance(value, list):
-                    sanitized[key] = [_redact_value(v) for v in value]
-                else:
-                    sanitized[key] = _redact_value(value)
-            else:
-                sanitized[key] = _redact_value(value)
-        return sanitized
+        """Avoid logging huge/base64 image payloads (see src.core.log.redact)."""
+        return redact(arguments)
@@ -0,0 +1,278 @@
+"""
+Local stand-in for the `fal_client` module.
+
+Implements the subset of the fal_client API used by FalClient (subscribe,
+submit, submit_async, status, result, cancel, upload_file and the queue
+status classes) without calling FAL, so the backend can be exercised end to
+end offline.
+Enable it with FAL_STANDIN=1.
+
+Timing is configurable through environment variables holding a distribution
+spec: "fixed:<sec>", "uniform:<low>,<high>", "exp:<mean>" or
+"lognormal:<median>,<sigma>".
+
+    FAL_STANDIN_QUEUE_LATENCY      time spent queued      (default fixed:0.5)
+    FAL_STANDIN_INFERENCE_LATENCY  time spent in progress (default fixed:2)
+    FAL_STANDIN_FAILURE_RATE       fraction of requests that fail (default 0)
+    FAL_STANDIN_RETENTION_SEC      how long finished or cancelled requests stay
+                                   queryable (default 300)
+
+Requests submitted with a `webhook_url` get a FAL-style completion POSTed to
+that URL once they finish.
+"""
+
+import asyncio
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import httpx
+
+
+@dataclass
+class Queued:
+    position: int
+
+
+@dataclass
+class InProgress:
+    logs: list | None = None
+
+
+@dataclass
+class Completed:
+    logs: list | None = None
+    metrics: dict = field(default_factory=dict)
+
+
+def sample_latency(spec: str) -> float:
+    """Draw one latency in seconds from a distribution spec such as "lognormal:3,0.5"."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return random.uniform(values[0], values[1])
+    if kind == "exp":
+        return random.expovariate(1.0 / values[0])
+    if kind == "lognormal":
+        return random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+@dataclass
+class _Request:
+    request_id: str
+    application: str
+    queue_sec: float
+    inference_sec: float
+    fails: bool
+    webhook_url: str | None = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    cancelled_at: float | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancelled_at is not None
+
+    @property
+    def started_at(self) -> float:
+        return self.submitted_at + self.queue_sec
+
+    @property
+    def finished_at(self) -> float:
+        return self.started_at + self.inference_sec
+
+
+_REQUESTS: dict[str, _Request] = {}
+_LOCK = threading.Lock()
+_next_eviction = 0.0
+
+
+def _evict_expired(now: float):
+    """Forget requests finished or cancelled more than the retention period ago; call with _LOCK held."""
+    global _next_eviction
+    if now < _next_eviction:
+        return
+    retention = float(os.getenv("FAL_STANDIN_RETENTION_SEC", "300"))
+    _next_eviction = now + min(retention, 10.0)
+    expired = [
+        request_id for request_id, req in _REQUESTS.items()
+        if min(req.finished_at, req.cancelled_at or math.inf) + retention < now
+    ]
+    for request_id in expired:
+        del _REQUESTS[request_id]
+
+
+def _get(request_id: str) -> _Request:
+    with _LOCK:
+        if request_id not in _REQUESTS:
+            raise KeyError(f"Unknown request id: {request_id}")
+        return _REQUESTS[request_id]
+
+
+def _fake_response(req: _Request) -> dict:
+    base = f"https://standin.fal.local/files/{req.request_id}"
+    if "video" in req.application:
+        return {"video": {"url": f"{base}.mp4", "content_type": "video/mp4"}}
+    return {
+        "images": [{"url": f"{base}.png", "content_type": "image/png"}],
+        "seed": random.randint(0, 2**31 - 1),
+    }
+
+
+def _queue_position(req: _Request, now: float) -> int:
+    with _LOCK:
+        return sum(
+            1
+            for other in _REQUESTS.values()
+            if other.application == req.application
+            and not other.cancelled
+            and other.submitted_at < req.submitted_at
+            and other.started_at > now
+        )
+
+
+def _deliver_webhook(req: _Request):
+    if req.cancelled:
+        return
+    if req.fails:
+        body = {"request_id": req.request_id, "status": "ERROR", "error": "Simulated failure", "payload": None}
+    else:
+        body = {"request_id": req.request_id, "status": "OK", "error": None, "payload": _fake_response(req)}
+    try:
+        httpx.post(req.webhook_url, json=body, timeout=10.0)
+    except httpx.HTTPError:
+        pass
+
+
+class SyncRequestHandle:
+    def __init__(self, application: str, request_id: str):
+        self.application = application
+        self.request_id = request_id
+
+    def status(self, with_logs: bool = False):
+        return status(self.application, self.request_id, with_logs=with_logs)
+
+    def iter_events(self, with_logs: bool = False, interval: float = 0.1):
+        while True:
+            event = self.status(with_logs=with_logs)
+            yield event
+            if isinstance(event, Completed):
+                return
+            time.sleep(interval)
+
+    def get(self) -> dict:
+        for _ in self.iter_events():
+            pass
+        return result(self.application, self.request_id)
+
+    def cancel(self):
+        cancel(self.application, self.request_id)
+
+
+class AsyncRequestHandle:
+    def __init__(self, application: str, request_id: str):
+        self.application = application
+        self.request_id = request_id
+
+    async def status(self, with_logs: bool = False):
+        return status(self.application, self.request_id, with_logs=with_logs)
+
+    async def iter_events(self, with_logs: bool = False, interval: float = 0.1):
+        while True:
+            event = await self.status(with_logs=with_logs)
+            yield event
+            if isinstance(event, Completed):
+                return
+            await asyncio.sleep(interval)
+
+    async def get(self) -> dict:
+        async for _ in self.iter_events():
+            pass
+        return result(self.application, self.request_id)
+
+    async def cancel(self):
+        cancel(self.application, self.request_id)
+
+
+def submit(application: str, arguments: dict, *, webhook_url: str | None = None, **kwargs) -> SyncRequestHandle:
+    req = _Request(
+        request_id=str(uuid.uuid4()),
+        application=application,
+        queue_sec=sample_latency(os.getenv("FAL_STANDIN_QUEUE_LATENCY", "fixed:0.5")),
+        inference_sec=sample_latency(os.getenv("FAL_STANDIN_INFERENCE_LATENCY", "fixed:2")),
+        fails=random.random() < float(os.getenv("FAL_STANDIN_FAILURE_RATE", "0")),
+        webhook_url=webhook_url,
+    )
+    with _LOCK:
+        _evict_expired(req.submitted_at)
+        _REQUESTS[req.request_id] = req
+
+    if webhook_url:
+        timer = threading.Timer(req.queue_sec + req.inference_sec, _deliver_webhook, args=(req,))
+        timer.daemon = True
+        timer.start()
+
+    return SyncRequestHandle(application, req.request_id)
+
+
+async def submit_async(application: str, arguments: dict, *, webhook_url: str | None = None, **kwargs) -> AsyncRequestHandle:
+    handle = submit(application, arguments, webhook_url=webhook_url)
+    return AsyncRequestHandle(application, handle.request_id)
+
+
+def status(application: str, request_id: str, with_logs: bool = False):
+    req = _get(request_id)
+    now = time.monotonic()
+    if req.cancelled or now >= req.finished_at:
+        return Completed(logs=[] if with_logs else None, metrics={"inference_time": req.inference_sec})
+    if now < req.started_at:
+        return Queued(position=_queue_position(req, now))
+    done = (now - req.started_at) / req.inference_sec if req.inference_sec else 1.0
+    logs = [{"message": f"Simulated inference {done:.0%}"}] if with_logs else None
+    return InProgress(logs=logs)
+
+
+def result(application: str, request_id: str) -> dict:
+    req = _get(request_id)
+    remaining = req.finished_at - time.monotonic()
+    if remaining > 0 and not req.cancelled:
+        time.sleep(remaining)
+    if req.cancelled:
+        raise RuntimeError(f"Request {request_id} was cancelled")
+    if req.fails:
+        raise RuntimeError("Simulated failure")
+    return _fake_response(req)
+
+
+def cancel(application: str, request_id: str):
+    req = _get(request_id)
+    if req.cancelled_at is None:
+        req.cancelled_at = time.monotonic()
+
+
+def upload_file(path) -> str:
+    return f"https://standin.fal.local/files/uploads/{uuid.uuid4().hex}/{os.path.basename(str(path))}"
+
+
+def subscribe(
+    application: str,
+    arguments: dict,
+    *,
+    with_logs: bool = False,
+    on_enqueue=None,
+    on_queue_update=None,
+    **kwargs,
+) -> dict:
+    handle = submit(application, arguments)
+    if on_enqueue is not None:
+        on_enqueue(handle.request_id)
+    for event in handle.iter_events(with_logs=with_logs):
+        if on_queue_update is not None:
+            on_queue_update(event)
+    return handle.get()
@@ -0,0 +1,81 @@
+"""Cooperative cancellation of generation work.
+
+A job runs inside `cancellation(token)`. Code that waits on FAL or
+downloads results calls `raise_if_cancelled()` at safe points, and FAL
+requests started in the block register themselves on the token so
+`token.cancel()` can cancel them on FAL as well.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.core.log import get_logger
+
+log = get_logger("cancel")
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a cancelled job.
+
+    Derives from BaseException (like asyncio.CancelledError) so generic
+    `except Exception` handlers and retry decorators let it through.
+    """
+
+
+class CancelToken:
+    """Cancellation flag for one job, plus callbacks to run when it is set."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def on_cancel(self, callback):
+        """Run `callback()` on cancellation (immediately if already cancelled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log.warning("cancel.callback_failed", error=e)
+
+
+_current_token: ContextVar = ContextVar("cancel_token", default=None)
+
+
+@contextmanager
+def cancellation(token: CancelToken):
+    """Make `token` the cancellation token for work done inside the block."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def current_token() -> CancelToken | None:
+    return _current_token.get()
+
+
+def raise_if_cancelled():
+    """Raise JobCancelled if the current job has been cancelled."""
+    token = _current_token.get()
+    if token is not None and token.cancelled:
+        raise JobCancelled()
@@ -0,0 +1,248 @@
+"""Structured event logging.
+
+Code emits named events with fields instead of formatted strings:
+
+    log = get_logger("fal")
+    log.info("fal.call", model=model, arguments=arguments)
+
+`emit` only checks the level and the event's sample rate, takes a bounded,
+redacted copy of the fields (so callers may keep mutating what they passed)
+and puts a tuple on a bounded queue; a background thread does the JSON
+formatting and writing. When the queue is full events are dropped (and
+counted) rather than blocking the caller.
+
+Every event is written as one JSON line (LOG_FORMAT=text for a console
+format) to stderr or LOG_FILE, with the current trace id attached. Field
+values are redacted and bounded on the way out: data URIs and secrets are
+replaced, long strings truncated, large dicts/lists cut down, so a FAL
+response or argument dict costs a few hundred bytes instead of megabytes.
+
+Settings (env):
+    LOG_LEVEL        debug | info | warning | error (default info)
+    LOG_FORMAT       json | text (default json)
+    LOG_FILE         append here instead of stderr
+    LOG_SAMPLE       per-event sample rates, e.g. "fal.queue_update=0.05";
+                     warnings and errors are never sampled
+    LOG_MAX_FIELD_CHARS, LOG_MAX_ITEMS, LOG_QUEUE_SIZE
+"""
+
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from src.core import metrics, tracing
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+LOG_LEVEL = LEVELS.get(os.getenv("LOG_LEVEL", "info").lower(), 20)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_FILE = os.getenv("LOG_FILE", "")
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "300"))
+LOG_MAX_ITEMS = int(os.getenv("LOG_MAX_ITEMS", "20"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Field names whose values are never written
+REDACTED_KEYS = {
+    "person_image", "api_key", "fal_key", "authorization", "token", "secret", "password",
+}
+# Fields kept at a larger bound
+LONG_FIELDS = {"traceback": 2000}
+_MAX_DEPTH = 4
+_STOP = object()
+
+LOG_DROPPED = metrics.Counter("felix_log_events_dropped_total", "Log events dropped because the log queue was full")
+
+
+def _parse_sample_rates(value: str) -> dict:
+    rates = {}
+    for pair in value.split(","):
+        event, _, rate = pair.partition("=")
+        if event.strip() and rate.strip():
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+SAMPLE_RATES = _parse_sample_rates(os.getenv("LOG_SAMPLE", ""))
+
+_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def redact(value, depth: int = 0):
+    """Bounded, secret-free copy of `value` for logging."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if value.startswith("data:"):
+            return f"<data-uri {len(value)} chars>"
+        if len(value) > LOG_MAX_FIELD_CHARS:
+            return value[:LOG_MAX_FIELD_CHARS] + f"...<+{len(value) - LOG_MAX_FIELD_CHARS} chars>"
+        return value
+    if isinstance(value, BaseException):
+        return redact(f"{type(value).__name__}: {value}")
+    if depth >= _MAX_DEPTH:
+        return f"<{type(value).__name__}>"
+    if isinstance(value, dict):
+        items = list(value.items())
+        bounded = {str(k): _redact_field(str(k), v, depth + 1) for k, v in items[:LOG_MAX_ITEMS]}
+        if len(items) > LOG_MAX_ITEMS:
+            bounded["..."] = f"<+{len(items) - LOG_MAX_ITEMS} keys>"
+        return bounded
+    if isinstance(value, (list, tuple, set)):
+        items = list(value)
+        bounded = [redact(v, depth + 1) for v in items[:LOG_MAX_ITEMS]]
+        if len(items) > LOG_MAX_ITEMS:
+            bounded.append(f"<+{len(items) - LOG_MAX_ITEMS} items>")
+        return bounded
+    return redact(str(value))
+
+
+def _redact_field(key: str, value, depth: int):
+    if key.lower() in REDACTED_KEYS:
+        return "<redacted>"
+    if key in LONG_FIELDS and isinstance(value, str):
+        return value[-LONG_FIELDS[key]:]
+    return redact(value, depth)
+
+
+def emit(level: str, component: str, event: str, fields: dict):
+    """Queue one event; cheap when the level is disabled or the event is sampled out."""
+    severity = LEVELS[level]
+    if severity < LOG_LEVEL:
+        return
+    rate = SAMPLE_RATES.get(event)
+    if rate is not None and severity < LEVELS["warning"]:
+        if random.random() >= rate:
+            return
+        fields["sample_rate"] = rate
+
+    current = tracing.current_span()
+    # Snapshot now: dicts and exceptions passed in may change before the writer runs
+    record = (
+        time.time(), level, component, event,
+        current.trace_id if current else None, redact(fields, depth=-1),
+    )
+    _ensure_writer()
+    try:
+        _queue.put_nowait(record)
+    except queue.Full:
+        LOG_DROPPED.inc()
+
+
+def _format(record) -> str:
+    ts, level, component, event, trace_id, fields = record
+    if LOG_FORMAT == "text":
+        stamp = datetime.fromtimestamp(ts).strftime("%H:%M:%S.%f")[:-3]
+        pairs = " ".join(f"{k}={v}" for k, v in fields.items())
+        return f"{stamp} {level.upper():<7} [{component}] {event} {pairs}".rstrip()
+    line = {
+        "ts": datetime.fromtimestamp(ts).isoformat(timespec="milliseconds"),
+        "level": level,
+        "component": component,
+        "event": event,
+        **({"trace_id": trace_id} if trace_id else {}),
+        **fields,
+    }
+    return json.dumps(line, default=str)
+
+
+def _write_loop():
+    stream = open(LOG_FILE, "a", buffering=1) if LOG_FILE else sys.stderr
+    while True:
+        record = _queue.get()
+        batch = [record]
+        # Drain whatever else is waiting so one write covers a burst
+        while len(batch) < 512:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        lines = []
+        stop = False
+        for item in batch:
+            if item is _STOP:
+                stop = True
+                continue
+            try:
+                lines.append(_format(item))
+            except Exception as e:
+                lines.append(json.dumps({"level": "error", "event": "log.format_failed", "error": str(e)}))
+        if lines:
+            try:
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+        if stop:
+            return
+
+
+def _ensure_writer():
+    global _queue, _writer, _writer_pid
+    if _writer_pid == os.getpid():
+        return
+    with _writer_lock:
+        if _writer_pid == os.getpid():
+            return
+        # First event in this process; a forked worker gets a fresh queue
+        # rather than the parent's pending events
+        if _writer_pid is not None:
+            _queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _writer = threading.Thread(target=_write_loop, name="log-writer", daemon=True)
+        _writer.start()
+        _writer_pid = os.getpid()
+
+
+def flush(timeout: float = 2.0):
+    """Write out queued events and stop the writer (called at exit)."""
+    if _writer is None or _writer_pid != os.getpid():
+        return
+    try:
+        _queue.put(_STOP, timeout=timeout)
+    except queue.Full:
+        return
+    _writer.join(timeout)
+
+
+atexit.register(flush)
+
+
+class EventLogger:
+    """Emits events tagged with one component name."""
+
+    def __init__(self, component: str):
+        self.component = component
+
+    def debug(self, event: str, **fields):
+        emit("debug", self.component, event, fields)
+
+    def info(self, event: str, **fields):
+        emit("info", self.component, event, fields)
+
+    def warning(self, event: str, **fields):
+        emit("warning", self.component, event, fields)
+
+    def error(self, event: str, **fields):
+        emit("error", self.component, event, fields)
+
+    def exception(self, event: str, **fields):
+        """Error event with the active exception and a bounded traceback."""
+        exc = sys.exc_info()[1]
+        if exc is not None:
+            fields.setdefault("error", exc)
+            fields["traceback"] = traceback.format_exc()
+        emit("error", self.component, event, fields)
+
+
+def get_logger(component: str) -> EventLogger:
+    return EventLogger(component)
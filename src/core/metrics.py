@@ -0,0 +1,194 @@
+"""Low-overhead Prometheus-style metrics.
+
+Counters, gauges and histograms write into a per-thread shard (a plain dict
+owned by the recording thread), so recording never takes a lock. `render()`
+merges all shards into the Prometheus text exposition format at scrape time.
+Shards of threads that have exited are folded into one retired shard whenever
+a new thread registers or a scrape happens, so thread-per-request servers
+keep one shard per live thread even if nobody scrapes.
+
+    REQUESTS = Counter("felix_fal_requests_total", "FAL requests", ("model", "outcome"))
+    REQUESTS.inc(model="fal-ai/flux-2-pro/edit", outcome="ok")
+"""
+
+import bisect
+import threading
+from contextvars import ContextVar
+
+# Seconds; spans fast image edits to multi-minute video renders
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 180, 300, 600)
+
+_METRICS = {}
+_shards = []  # (thread, shard)
+_retired = {}
+_shards_lock = threading.Lock()
+_local = threading.local()
+
+# Model endpoint of the FAL call the current context last made, for work
+# that follows it (e.g. downloading its outputs)
+_model_label: ContextVar[str] = ContextVar("metrics_model_label", default="")
+
+
+def set_model_label(model: str):
+    _model_label.set(model)
+
+
+def model_label() -> str:
+    return _model_label.get()
+
+
+def _shard() -> dict:
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = _local.shard = {}
+        with _shards_lock:
+            _retire_dead()
+            _shards.append((threading.current_thread(), shard))
+    return shard
+
+
+def _retire_dead():
+    """Fold shards of exited threads into the retired shard; call with _shards_lock held."""
+    live = []
+    for thread, shard in _shards:
+        if thread.is_alive():
+            live.append((thread, shard))
+        else:
+            _merge_into(_retired, shard)
+    _shards[:] = live
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        _METRICS[name] = self
+
+    def _key(self, labels: dict):
+        return (self.name, tuple(str(labels.get(label, "")) for label in self.labelnames))
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        shard = _shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+
+class Gauge(Counter):
+    """Up/down gauge; increments and decrements may come from different threads."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class CallbackGauge(_Metric):
+    """Gauge computed at scrape time by `fn() -> {label values tuple: value}`."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels, fn):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        shard = _shard()
+        key = self._key(labels)
+        # [count per bucket..., +Inf bucket, sum]
+        cells = shard.get(key)
+        if cells is None:
+            cells = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        cells[bisect.bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+
+def _merge_into(target: dict, shard: dict):
+    # Recording threads may add keys while we copy; retry until the copy is clean
+    while True:
+        try:
+            items = list(shard.items())
+            break
+        except RuntimeError:
+            continue
+    for key, value in items:
+        if isinstance(value, list):
+            cells = target.setdefault(key, [0] * (len(value) - 1) + [0.0])
+            for i, cell in enumerate(list(value)):
+                cells[i] += cell
+        else:
+            target[key] = target.get(key, 0.0) + value
+
+
+def _collect() -> dict:
+    with _shards_lock:
+        _retire_dead()
+        live = list(_shards)
+        merged = {}
+        _merge_into(merged, _retired)
+    for _, shard in live:
+        _merge_into(merged, shard)
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) and value != int(value) else str(int(value))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    merged = _collect()
+    by_metric = {}
+    for (name, values), value in merged.items():
+        by_metric.setdefault(name, []).append((values, value))
+
+    lines = []
+    for name, metric in sorted(_METRICS.items()):
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+
+        if isinstance(metric, CallbackGauge):
+            try:
+                samples = metric.fn().items()
+            except Exception:
+                samples = ()
+            for values, value in sorted(samples):
+                lines.append(f"{name}{_labels(metric.labelnames, values)} {_number(value)}")
+            continue
+
+        for values, value in sorted(by_metric.get(name, ())):
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, count in zip(metric.buckets + ("+Inf",), value[:-1]):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{name}_bucket{_labels(metric.labelnames, values, (le,))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(metric.labelnames, values)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(metric.labelnames, values)} {cumulative}")
+            else:
+                lines.append(f"{name}{_labels(metric.labelnames, values)} {_number(value)}")
+
+    return "\n".join(lines) + "\n"
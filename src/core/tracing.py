@@ -0,0 +1,399 @@
+"""Lightweight tracing of generation work.
+
+A span times one step (HTTP handler, job, pipeline, prompt build, FAL call,
+download). Spans opened inside another span become its children and share
+its trace id; across threads and processes the context travels as a W3C
+`traceparent` string (see `current_traceparent` / `resume`).
+
+Finished spans are kept in memory for the TRACE_BUFFER_TRACES most recently
+active traces and, when TRACE_FILE is set, appended to it as OTLP JSON (one
+ExportTraceServiceRequest per line, loadable by OpenTelemetry collectors
+and trace viewers). Lookups in the file go through an index of line offsets
+by trace id that is extended with the lines appended since the last lookup.
+`timeline(trace_id)` rebuilds one trace for display.
+
+    with tracing.span("prompt.build", model=model):
+        ...
+"""
+
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_BUFFER_TRACES = int(os.getenv("TRACE_BUFFER_TRACES", "500"))
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "felix-ce")
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current_span: ContextVar = ContextVar("trace_span", default=None)
+# (trace_id, parent span id) continued from another thread or process
+_remote_parent: ContextVar = ContextVar("trace_remote_parent", default=None)
+
+_buffer = OrderedDict()  # trace_id -> [span dict], least recently active first
+_lock = threading.Lock()
+_file = None
+
+_file_index = {}  # trace_id -> offsets of TRACE_FILE lines holding its spans
+_indexed_bytes = 0
+_index_lock = threading.Lock()
+_TRACE_ID_FIELD = re.compile(rb'"traceId": "([0-9a-f]{32})"')
+
+
+class Span:
+    """One timed operation; use via `span()` rather than directly."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, status: str, error: str = ""):
+        self.status = status
+        self.error = error[:500]
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            _export(self)
+
+
+def _new_span(name: str, attributes: dict) -> Span:
+    parent = _current_span.get()
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, attributes)
+    remote = _remote_parent.get()
+    if remote is not None:
+        return Span(name, remote[0], remote[1], attributes)
+    return Span(name, os.urandom(16).hex(), None, attributes)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the block as a child of the current span (or as a new trace)."""
+    current = _new_span(name, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.fail("error", f"{type(e).__name__}: {e}")
+        raise
+    except BaseException as e:
+        # JobCancelled, CancelledError, shutdown
+        current.fail("cancelled", type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def traced(name: str | None = None):
+    """Decorator form of `span`; the span is named after the function by default."""
+
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def start_span(name: str, traceparent: str | None = None, **attributes) -> tuple:
+    """
+    Open a span that is ended later by `finish_span` (for request hooks).
+
+    Continues the trace in `traceparent` if it is valid. Returns
+    (span, token).
+    """
+    context = _parse(traceparent)
+    if context is not None and _current_span.get() is None:
+        current = Span(name, context[0], context[1], attributes)
+    else:
+        current = _new_span(name, attributes)
+    return current, _current_span.set(current)
+
+
+def finish_span(current: Span, token):
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # Ended from another context (e.g. after a streamed response)
+        pass
+    current.end()
+
+
+def record_span(name: str, start: float, end: float, **attributes):
+    """Record an already finished child span from epoch-second timestamps."""
+    recorded = _new_span(name, attributes)
+    recorded.start_ns = int(start * 1e9)
+    recorded.end_ns = int(max(end, start) * 1e9)
+    _export(recorded)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def current_trace_id() -> str | None:
+    current = _current_span.get()
+    if current is not None:
+        return current.trace_id
+    remote = _remote_parent.get()
+    return remote[0] if remote else None
+
+
+def current_traceparent() -> str | None:
+    """W3C traceparent of the current span, for handing work to another thread or process."""
+    current = _current_span.get()
+    if current is None:
+        return None
+    return f"00-{current.trace_id}-{current.span_id}-01"
+
+
+def _parse(traceparent) -> tuple | None:
+    match = _TRACEPARENT.match(traceparent or "")
+    return match.groups() if match else None
+
+
+@contextmanager
+def resume(traceparent: str | None):
+    """Make spans opened in the block children of `traceparent` (no-op if it is missing)."""
+    context = _parse(traceparent)
+    if context is None:
+        yield
+        return
+    span_token = _current_span.set(None)
+    remote_token = _remote_parent.set(context)
+    try:
+        yield
+    finally:
+        _remote_parent.reset(remote_token)
+        _current_span.reset(span_token)
+
+
+def _to_dict(finished: Span) -> dict:
+    return {
+        "trace_id": finished.trace_id,
+        "span_id": finished.span_id,
+        "parent_id": finished.parent_id,
+        "name": finished.name,
+        "start_ns": finished.start_ns,
+        "end_ns": finished.end_ns,
+        "attributes": finished.attributes,
+        "status": finished.status,
+        "error": finished.error,
+    }
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_line(finished: dict) -> str:
+    otlp_span = {
+        "traceId": finished["trace_id"],
+        "spanId": finished["span_id"],
+        "name": finished["name"],
+        "kind": 1,
+        "startTimeUnixNano": str(finished["start_ns"]),
+        "endTimeUnixNano": str(finished["end_ns"]),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in finished["attributes"].items() if v is not None],
+        # 1 = OK, 2 = ERROR
+        "status": {"code": 1} if finished["status"] == "ok" else {"code": 2, "message": finished["error"] or finished["status"]},
+    }
+    if finished["parent_id"]:
+        otlp_span["parentSpanId"] = finished["parent_id"]
+    return json.dumps({
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "felix.tracing"}, "spans": [otlp_span]}],
+        }]
+    })
+
+
+def _export(finished: Span):
+    record = _to_dict(finished)
+    with _lock:
+        spans = _buffer.get(record["trace_id"])
+        if spans is None:
+            spans = _buffer[record["trace_id"]] = []
+            while len(_buffer) > TRACE_BUFFER_TRACES:
+                _buffer.popitem(last=False)
+        else:
+            # Long-running jobs keep their trace while they are still adding spans
+            _buffer.move_to_end(record["trace_id"])
+        spans.append(record)
+
+        if TRACE_FILE:
+            global _file
+            try:
+                if _file is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(TRACE_FILE)), exist_ok=True)
+                    _file = open(TRACE_FILE, "a", buffering=1)
+                _file.write(_otlp_line(record) + "\n")
+            except OSError as e:
+                from src.core.log import get_logger
+                get_logger("tracing").warning("trace.write_failed", path=TRACE_FILE, error=e)
+
+
+def _from_otlp(otlp_span: dict) -> dict:
+    status = otlp_span.get("status", {})
+    return {
+        "trace_id": otlp_span["traceId"],
+        "span_id": otlp_span["spanId"],
+        "parent_id": otlp_span.get("parentSpanId"),
+        "name": otlp_span["name"],
+        "start_ns": int(otlp_span["startTimeUnixNano"]),
+        "end_ns": int(otlp_span["endTimeUnixNano"]),
+        "attributes": {a["key"]: next(iter(a["value"].values())) for a in otlp_span.get("attributes", [])},
+        "status": "ok" if status.get("code", 1) == 1 else "error",
+        "error": status.get("message"),
+    }
+
+
+def trace_spans(trace_id: str) -> list:
+    """
+    Finished spans of a trace.
+
+    With TRACE_FILE set the file is read as well, so spans recorded by
+    other processes (queue workers) sharing it are included.
+    """
+    with _lock:
+        spans = {s["span_id"]: s for s in _buffer.get(trace_id, ())}
+
+    if TRACE_FILE and os.path.exists(TRACE_FILE):
+        with open(TRACE_FILE, "rb") as f:
+            for offset in _file_offsets(f, trace_id):
+                f.seek(offset)
+                try:
+                    request = json.loads(f.readline())
+                except ValueError:
+                    continue
+                for resource in request.get("resourceSpans", ()):
+                    for scope in resource.get("scopeSpans", ()):
+                        for otlp_span in scope.get("spans", ()):
+                            if otlp_span.get("traceId") == trace_id:
+                                spans.setdefault(otlp_span["spanId"], _from_otlp(otlp_span))
+
+    return sorted(spans.values(), key=lambda s: s["start_ns"])
+
+
+def _file_offsets(f, trace_id: str) -> list:
+    """Offsets of the lines of TRACE_FILE (open as `f`) with spans of `trace_id`, indexing new lines first."""
+    global _indexed_bytes
+    with _index_lock:
+        if os.fstat(f.fileno()).st_size < _indexed_bytes:
+            # Truncated or rotated: start over
+            _file_index.clear()
+            _indexed_bytes = 0
+        f.seek(_indexed_bytes)
+        offset = _indexed_bytes
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # another process is still writing it
+            for found in set(_TRACE_ID_FIELD.findall(line)):
+                _file_index.setdefault(found.decode(), []).append(offset)
+            offset += len(line)
+        _indexed_bytes = offset
+        return list(_file_index.get(trace_id, ()))
+
+
+def subtree(trace_id: str, span_id: str) -> list:
+    """Finished spans of a trace at or below `span_id`, in start order."""
+    spans = trace_spans(trace_id)
+    children = {}
+    for s in spans:
+        children.setdefault(s["parent_id"], []).append(s)
+    found, stack = [], [s for s in spans if s["span_id"] == span_id]
+    while stack:
+        s = stack.pop()
+        found.append(s)
+        stack.extend(children.get(s["span_id"], ()))
+    return sorted(found, key=lambda s: s["start_ns"])
+
+
+def timeline(trace_id: str) -> dict:
+    """One trace as a waterfall: spans in start order with offsets and nesting depth."""
+    spans = trace_spans(trace_id)
+    if not spans:
+        return {"trace_id": trace_id, "duration_ms": 0, "spans": []}
+
+    start = spans[0]["start_ns"]
+    end = max(s["end_ns"] for s in spans)
+    by_id = {s["span_id"]: s for s in spans}
+
+    def depth(s):
+        level = 0
+        while s["parent_id"] in by_id and level < 64:
+            s = by_id[s["parent_id"]]
+            level += 1
+        return level
+
+    return {
+        "trace_id": trace_id,
+        "duration_ms": round((end - start) / 1e6, 1),
+        "spans": [
+            {
+                "name": s["name"],
+                "span_id": s["span_id"],
+                "parent_id": s["parent_id"],
+                "depth": depth(s),
+                "offset_ms": round((s["start_ns"] - start) / 1e6, 1),
+                "duration_ms": round((s["end_ns"] - s["start_ns"]) / 1e6, 1),
+                "status": s["status"],
+                "error": s["error"],
+                "attributes": s["attributes"],
+            }
+            for s in spans
+        ],
+    }
+
+
+def format_timeline(view: dict, width: int = 60) -> str:
+    """Plain-text waterfall of a `timeline()` result."""
+    total = view["duration_ms"] or 1
+    lines = [f"trace {view['trace_id']}  {total / 1000:.2f}s"]
+    for s in view["spans"]:
+        left = int(s["offset_ms"] / total * width)
+        bar = "#" * max(1, int(s["duration_ms"] / total * width))
+        label = "  " * s["depth"] + s["name"]
+        flag = "" if s["status"] == "ok" else f"  [{s['status']}]"
+        lines.append(f"{label:<40} {' ' * left}{bar:<{width - left}} {s['duration_ms'] / 1000:8.2f}s{flag}")
+    return "\n".join(lines) + "\n"
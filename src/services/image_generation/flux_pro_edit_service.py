@@ -7,6 +7,11 @@ import json
 
 from src.utils.file_utils import download_file
 from src.utils.image_encoding import local_image_to_data_uri
+from src.core.log import get_logger
+from src.core.tracing import traced
+
+
+log = get_logger("image_service")
 
 
 class FluxProEditService:
@@ -26,6 +31,7 @@ class FluxProEditService:
     def __init__(self):
         self.client = FalClient()
 
+    @traced()
     def _resolve_refs(self, refs):
         """Convert local paths to data URIs if needed."""
         resolved = []
@@ -81,13 +87,12 @@ class FluxProEditService:
                 return "portrait_4_3"
         return "auto"
 
-    def generate_image(self, req: ImageGenerationRequest, no_download: bool = False):
-        start_time = time.time()
-
+    def build_arguments(self, req: ImageGenerationRequest) -> dict:
+        """Build the FAL arguments for a request."""
         # Resolve reference images
         image_urls = self._resolve_refs(req.reference_images or [])
 
-        arguments = {
+        return {
             "prompt": req.prompt,
             "image_urls": image_urls,
             "image_size": self._map_image_size(req),
@@ -96,9 +101,13 @@ class FluxProEditService:
             "output_format": "png",
         }
 
-        print(f"[FluxProEditService] Calling {self.MODEL_NAME}")
-        print(f"  Prompt: {req.prompt[:80]}...")
-        print(f"  Images: {len(image_urls)}")
+    @traced()
+    def generate_image(self, req: ImageGenerationRequest, no_download: bool = False):
+        start_time = time.time()
+
+        arguments = self.build_arguments(req)
+
+        log.info("image.call", model=self.MODEL_NAME, prompt=req.prompt[:80], images=len(arguments['image_urls']))
 
         result = self.client.subscribe(
             model=self.MODEL_NAME,
@@ -110,11 +119,10 @@ class FluxProEditService:
         # On Vercel, we can't write to disk - just use FAL CDN URLs
         saved_files = []
         
-        # Extract FAL image URL from response
-        image_url = None
-        if result.get("image", {}).get("url"):
-            image_url = result["image"]["url"]
-            print(f"[FluxProEditService] Got FAL image URL: {image_url}")
+        # Extract FAL image URL from response (flux returns `images`; some edit models `image`)
+        image_url = (result.get("images") or [{}])[0].get("url") or (result.get("image") or {}).get("url")
+        if image_url:
+            log.info("image.result", model=self.MODEL_NAME, url=image_url)
         
         if image_url:
             saved_files = [image_url]  # Use FAL URL as the "file"
@@ -4,10 +4,14 @@ from pathlib import Path
 from datetime import datetime
 import time
 import json
-from loguru import logger
 
 from src.utils.file_utils import download_file
 from src.utils.image_encoding import local_image_to_data_uri
+from src.core.log import get_logger
+from src.core.tracing import traced
+
+
+log = get_logger("image_service")
 
 
 class GptImageService:
@@ -18,6 +22,7 @@ class GptImageService:
     def __init__(self):
         self.client = FalClient()
 
+    @traced()
     def _resolve_refs(self, refs):
         """Convert local paths to data URIs if needed."""
         resolved = []
@@ -28,6 +33,7 @@ class GptImageService:
                 resolved.append(local_image_to_data_uri(r))
         return resolved
 
+    @traced()
     def generate_image(self, req: ImageGenerationRequest):
         start_time = time.time()
 
@@ -39,9 +45,7 @@ class GptImageService:
             "image_urls": image_urls,
         }
 
-        logger.info(f"[GptImageService] Calling {self.MODEL_NAME}")
-        logger.info(f"  Prompt: {req.prompt[:80]}...")
-        logger.info(f"  Images: {len(image_urls)}")
+        log.info("image.call", model=self.MODEL_NAME, prompt=req.prompt[:80], images=len(image_urls))
 
         try:
             result = self.client.subscribe(
@@ -49,7 +53,7 @@ class GptImageService:
                 arguments=arguments
             )
         except Exception as e:
-            logger.error(f"[GptImageService] API call failed: {e}")
+            log.error("image.call_failed", model=self.MODEL_NAME, error=e)
             raise
 
         latency = time.time() - start_time
@@ -64,8 +68,7 @@ class GptImageService:
         base_dir = Path(f"outputs/images/{today}/gpt_image")
         base_dir.mkdir(parents=True, exist_ok=True)
 
-        logger.debug(f"[GptImageService] Response type: {type(result)}")
-        logger.debug(f"[GptImageService] Response keys: {result.keys() if isinstance(result, dict) else 'N/A'}")
+        log.debug("image.response", model=self.MODEL_NAME, response=result)
 
         # GPT-Image returns result["image"]["url"] (singular)
         image_obj = result.get("image")
@@ -73,20 +76,20 @@ class GptImageService:
             url = image_obj.get("url")
             if url:
                 save_path = base_dir / f"img_{ts}.png"
-                logger.info(f"[GptImageService] Downloading image to {save_path}...")
+                log.info("image.download", model=self.MODEL_NAME, path=save_path)
                 try:
                     download_file(url, save_path)
                     saved_files.append(str(save_path))
                 except Exception as e:
-                    logger.error(f"[GptImageService] Download failed: {e}")
+                    log.error("image.download_failed", model=self.MODEL_NAME, error=e)
                     raise
             else:
-                logger.warning(f"[GptImageService] No URL in image object: {image_obj}")
+                log.warning("image.missing_url", model=self.MODEL_NAME, image=image_obj)
         else:
-            logger.error(f"[GptImageService] No 'image' key in response. Full response: {result}")
+            log.error("image.unexpected_response", model=self.MODEL_NAME, response=result)
 
         if not saved_files:
-            logger.error(f"[GptImageService] No images were saved")
+            log.error("image.nothing_saved", model=self.MODEL_NAME)
 
         # -----------------------
         # Save metadata JSON
@@ -104,7 +107,7 @@ class GptImageService:
         with open(meta_path, "w") as f:
             json.dump(metadata, f, indent=2, default=str)
 
-        logger.info(f"[GptImageService] Saved metadata to {meta_path}")
+        log.info("image.metadata_saved", model=self.MODEL_NAME, path=meta_path)
 
         return {
             "raw": result,
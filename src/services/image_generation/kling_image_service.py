@@ -4,10 +4,14 @@ from pathlib import Path
 from datetime import datetime
 import time
 import json
-from loguru import logger
 
 from src.utils.file_utils import download_file
 from src.utils.image_encoding import local_image_to_data_uri
+from src.core.log import get_logger
+from src.core.tracing import traced
+
+
+log = get_logger("image_service")
 
 
 class KlingImageService:
@@ -18,6 +22,7 @@ class KlingImageService:
     def __init__(self):
         self.client = FalClient()
 
+    @traced()
     def _resolve_refs(self, refs):
         """Convert local paths to data URIs if needed."""
         resolved = []
@@ -28,6 +33,7 @@ class KlingImageService:
                 resolved.append(local_image_to_data_uri(r))
         return resolved
 
+    @traced()
     def generate_image(self, req: ImageGenerationRequest):
         start_time = time.time()
 
@@ -44,9 +50,7 @@ class KlingImageService:
             "output_format": "png",
         }
 
-        logger.info(f"[KlingImageService] Calling {self.MODEL_NAME}")
-        logger.info(f"  Prompt: {req.prompt[:80]}...")
-        logger.info(f"  Images: {len(image_urls)}")
+        log.info("image.call", model=self.MODEL_NAME, prompt=req.prompt[:80], images=len(image_urls))
 
         try:
             result = self.client.subscribe(
@@ -54,7 +58,7 @@ class KlingImageService:
                 arguments=arguments
             )
         except Exception as e:
-            logger.error(f"[KlingImageService] API call failed: {e}")
+            log.error("image.call_failed", model=self.MODEL_NAME, error=e)
             raise
 
         latency = time.time() - start_time
@@ -69,8 +73,7 @@ class KlingImageService:
         base_dir = Path(f"outputs/images/{today}/kling_image")
         base_dir.mkdir(parents=True, exist_ok=True)
 
-        logger.debug(f"[KlingImageService] Response type: {type(result)}")
-        logger.debug(f"[KlingImageService] Response keys: {result.keys() if isinstance(result, dict) else 'N/A'}")
+        log.debug("image.response", model=self.MODEL_NAME, response=result)
 
         # Kling returns result["images"][0]["url"] (array)
         images = result.get("images", [])
@@ -79,18 +82,18 @@ class KlingImageService:
                 url = img.get("url") if isinstance(img, dict) else img
                 if url:
                     save_path = base_dir / f"img_{ts}_{idx}.png"
-                    logger.info(f"[KlingImageService] Downloading image to {save_path}...")
+                    log.info("image.download", model=self.MODEL_NAME, path=save_path)
                     try:
                         download_file(url, save_path)
                         saved_files.append(str(save_path))
                     except Exception as e:
-                        logger.error(f"[KlingImageService] Download failed: {e}")
+                        log.error("image.download_failed", model=self.MODEL_NAME, error=e)
                         raise
         else:
-            logger.error(f"[KlingImageService] No images in response. Full response: {result}")
+            log.error("image.unexpected_response", model=self.MODEL_NAME, response=result)
 
         if not saved_files:
-            logger.error(f"[KlingImageService] No images were saved")
+            log.error("image.nothing_saved", model=self.MODEL_NAME)
 
         # -----------------------
         # Save metadata JSON
@@ -108,7 +111,7 @@ class KlingImageService:
         with open(meta_path, "w") as f:
             json.dump(metadata, f, indent=2, default=str)
 
-        logger.info(f"[KlingImageService] Saved metadata to {meta_path}")
+        log.info("image.metadata_saved", model=self.MODEL_NAME, path=meta_path)
 
         return {
             "raw": result,
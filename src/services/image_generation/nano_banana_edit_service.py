@@ -7,6 +7,7 @@ import json
 
 from src.utils.file_utils import download_file
 from src.utils.image_encoding import local_image_to_data_uri
+from src.core.tracing import traced
 
 
 class NanoBananaEditService:
@@ -16,6 +17,7 @@ class NanoBananaEditService:
     def __init__(self):
         self.client = FalClient()
 
+    @traced()
     def _resolve_refs(self, refs):
         """Convert local paths to data URIs if needed."""
         resolved = []
@@ -26,6 +28,7 @@ class NanoBananaEditService:
                 resolved.append(local_image_to_data_uri(r))
         return resolved
 
+    @traced()
     def generate_image(self, req: ImageGenerationRequest):
         start_time = time.time()
 
@@ -7,6 +7,7 @@ import json
 
 from src.utils.file_utils import download_file
 from src.utils.image_encoding import local_image_to_data_uri
+from src.core.tracing import traced
 
 
 class NanoBananaService:
@@ -16,6 +17,7 @@ class NanoBananaService:
     def __init__(self):
         self.client = FalClient()
 
+    @traced()
     def generate_image(self, req: ImageGenerationRequest):
 
         start_time = time.time()
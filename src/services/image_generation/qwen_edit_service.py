@@ -4,10 +4,14 @@ from pathlib import Path
 from datetime import datetime
 import time
 import json
-from loguru import logger
 
 from src.utils.file_utils import download_file
 from src.utils.image_encoding import local_image_to_data_uri
+from src.core.log import get_logger
+from src.core.tracing import traced
+
+
+log = get_logger("image_service")
 
 
 class QwenEditService:
@@ -18,6 +22,7 @@ class QwenEditService:
     def __init__(self):
         self.client = FalClient()
 
+    @traced()
     def _resolve_refs(self, refs):
         """Convert local paths to data URIs if needed."""
         resolved = []
@@ -28,6 +33,7 @@ class QwenEditService:
                 resolved.append(local_image_to_data_uri(r))
         return resolved
 
+    @traced()
     def generate_image(self, req: ImageGenerationRequest):
         start_time = time.time()
 
@@ -44,9 +50,7 @@ class QwenEditService:
             "output_format": "png",
         }
 
-        logger.info(f"[QwenEditService] Calling {self.MODEL_NAME}")
-        logger.info(f"  Prompt: {req.prompt[:80]}...")
-        logger.info(f"  Images: {len(image_urls)}")
+        log.info("image.call", model=self.MODEL_NAME, prompt=req.prompt[:80], images=len(image_urls))
 
         try:
             result = self.client.subscribe(
@@ -54,7 +58,7 @@ class QwenEditService:
                 arguments=arguments
             )
         except Exception as e:
-            logger.error(f"[QwenEditService] API call failed: {e}")
+            log.error("image.call_failed", model=self.MODEL_NAME, error=e)
             raise
 
         latency = time.time() - start_time
@@ -69,8 +73,7 @@ class QwenEditService:
         base_dir = Path(f"outputs/images/{today}/qwen_edit")
         base_dir.mkdir(parents=True, exist_ok=True)
 
-        logger.debug(f"[QwenEditService] Response type: {type(result)}")
-        logger.debug(f"[QwenEditService] Response keys: {result.keys() if isinstance(result, dict) else 'N/A'}")
+        log.debug("image.response", model=self.MODEL_NAME, response=result)
 
         # Qwen returns result["image"]["url"] (singular)
         image_obj = result.get("image")
@@ -78,32 +81,31 @@ class QwenEditService:
             url = image_obj.get("url")
             if url:
                 save_path = base_dir / f"img_{ts}.png"
-                logger.info(f"[QwenEditService] Downloading image to {save_path}...")
+                log.info("image.download", model=self.MODEL_NAME, path=save_path)
                 try:
                     download_file(url, save_path)
                     saved_files.append(str(save_path))
                 except Exception as e:
-                    logger.error(f"[QwenEditService] Download failed: {e}")
+                    log.error("image.download_failed", model=self.MODEL_NAME, error=e)
                     raise
             else:
-                logger.warning(f"[QwenEditService] No URL in image object: {image_obj}")
+                log.warning("image.missing_url", model=self.MODEL_NAME, image=image_obj)
         else:
             # Fallback: check for images array
-            logger.debug(f"[QwenEditService] 'image' not found, checking 'images' array")
             for idx, img in enumerate(result.get("images", [])):
                 url = img.get("url")
                 if not url:
-                    logger.warning(f"[QwenEditService] Image {idx} has no URL")
+                    log.warning("image.missing_url", model=self.MODEL_NAME, index=idx)
                     continue
                 save_path = base_dir / f"img_{ts}_{idx}.png"
                 try:
                     download_file(url, save_path)
                     saved_files.append(str(save_path))
                 except Exception as e:
-                    logger.error(f"[QwenEditService] Download {idx} failed: {e}")
+                    log.error("image.download_failed", model=self.MODEL_NAME, index=idx, error=e)
 
         if not saved_files:
-            logger.error(f"[QwenEditService] No images were saved. Full response: {result}")
+            log.error("image.nothing_saved", model=self.MODEL_NAME, response=result)
 
         # -----------------------
         # Save metadata JSON
@@ -121,7 +123,7 @@ class QwenEditService:
         with open(meta_path, "w") as f:
             json.dump(metadata, f, indent=2, default=str)
 
-        logger.info(f"[QwenEditService] Saved metadata to {meta_path}")
+        log.info("image.metadata_saved", model=self.MODEL_NAME, path=meta_path)
 
         return {
             "raw": result,
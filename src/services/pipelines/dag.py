@@ -0,0 +1,283 @@
+"""
+Small DAG executor with memoized artifacts.
+
+Nodes are plain functions called with their dependencies' outputs
+(positionally, in `deps` order) plus keyword params. `Dag.run` starts every
+node as soon as its dependencies have finished, on a thread pool, so
+independent branches (one image fanning out to several video models) run in
+parallel. Each node gets an artifact key: a hash of its function, params and
+its dependencies' keys. Outputs are memoized under that key in memory
+(`cache="memory"`) or also on disk (`cache="disk"`, JSON-serialisable outputs
+only), so a rerun with the same inputs reuses expensive results.
+
+    dag = Dag(cache=ArtifactCache())
+    dag.add("prompt", build_prompt, text="...")
+    dag.add("image", generate_image, deps=("prompt",), cache="disk")
+    outputs = dag.run()
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from src.core import tracing
+from src.core.log import get_logger
+
+log = get_logger("dag")
+
+ARTIFACT_DIR = Path(os.getenv("PIPELINE_ARTIFACT_DIR", "outputs/artifacts"))
+
+
+class NodeSkipped(Exception):
+    """Raised for nodes whose dependencies failed."""
+
+
+@dataclass
+class Node:
+    name: str
+    fn: object
+    deps: tuple = ()
+    params: dict = field(default_factory=dict)
+    cache: str | None = None  # None | "memory" | "disk"
+    version: str = "1"
+    # Run even if some dependencies failed; their outputs are passed as None
+    allow_failed_deps: bool = False
+    # Cached outputs for which this returns False are recomputed (e.g. deleted downloads)
+    reusable: object = None
+    # Semaphores held while `fn` runs, acquired in order; not part of the artifact key
+    slots: tuple = ()
+
+
+@dataclass
+class DagResult:
+    outputs: dict
+    errors: dict
+    cached: set
+    durations: dict  # node run time, excluding time spent waiting for slots
+    waits: dict  # time spent waiting for slots
+    spans: dict = field(default_factory=dict)  # node -> (trace_id, span_id) of its run, for tracing.subtree
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class ArtifactCache:
+    """Node outputs by artifact key, in memory and optionally in ARTIFACT_DIR."""
+
+    def __init__(self, root=ARTIFACT_DIR):
+        self.root = Path(root)
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str, disk: bool):
+        with self._lock:
+            if key in self._memory:
+                return True, self._memory[key]
+        if disk:
+            try:
+                with open(self._path(key)) as f:
+                    value = json.load(f)["output"]
+            except (OSError, ValueError, KeyError):
+                return False, None
+            with self._lock:
+                self._memory[key] = value
+            return True, value
+        return False, None
+
+    def put(self, key: str, value, node: str, disk: bool):
+        with self._lock:
+            self._memory[key] = value
+        if disk:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump({"node": node, "created_at": time.time(), "output": value}, f, default=str)
+            os.replace(tmp, path)
+
+
+def _fn_id(fn) -> str:
+    return f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}"
+
+
+class Dag:
+    """A graph of nodes run in dependency order with parallel branches."""
+
+    def __init__(self, cache: ArtifactCache | None = None, max_workers: int = 8):
+        self.nodes = {}
+        self.cache = cache or ArtifactCache()
+        self.max_workers = max_workers
+
+    def add(self, name: str, fn, deps=(), cache: str | None = None, version: str = "1",
+            allow_failed_deps: bool = False, reusable=None, slots=(), **params) -> str:
+        """
+        Add node `name` computing `fn(*dep_outputs, **params)`; returns `name`.
+
+        `slots` are semaphores (e.g. shared global and per-model limits)
+        acquired in order before `fn` runs, so timings exclude queueing.
+        Give the narrowest limit first so a task never holds a wide slot
+        while waiting for a narrow one.
+        """
+        if name in self.nodes:
+            raise ValueError(f"Duplicate node: {name}")
+        missing = [dep for dep in deps if dep not in self.nodes]
+        if missing:
+            raise ValueError(f"Node {name} depends on unknown nodes: {', '.join(missing)}")
+        self.nodes[name] = Node(name, fn, tuple(deps), params, cache, version, allow_failed_deps, reusable, tuple(slots))
+        return name
+
+    def artifact_keys(self) -> dict:
+        """Artifact key per node, derived from its function, params and dependency keys."""
+        keys = {}
+        for name in self.nodes:  # insertion order is topological: deps must exist when added
+            node = self.nodes[name]
+            material = {
+                "fn": _fn_id(node.fn),
+                "version": node.version,
+                "params": node.params,
+                "deps": [keys[dep] for dep in node.deps],
+            }
+            keys[name] = hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode()).hexdigest()
+        return keys
+
+    def _needed(self, targets) -> list:
+        if not targets:
+            return list(self.nodes)
+        needed, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.nodes[name].deps)
+        return [name for name in self.nodes if name in needed]
+
+    def run(self, targets=None, on_event=None) -> DagResult:
+        """
+        Run `targets` (default: every node) and their dependencies.
+
+        `on_event(node, status, **info)` is called with status started,
+        cached, completed, failed or skipped. Failures do not stop other
+        branches; they are reported in `DagResult.errors`. A BaseException
+        from a node (JobCancelled, KeyboardInterrupt) is recorded the same
+        way, but stops further nodes from starting and is re-raised here once
+        the nodes already running have returned.
+        """
+        order = self._needed(targets)
+        keys = self.artifact_keys()
+        result = DagResult(outputs={}, errors={}, cached=set(), durations={}, waits={})
+        remaining = {name: set(self.nodes[name].deps) for name in order}
+        children = {name: [] for name in order}
+        for name in order:
+            for dep in self.nodes[name].deps:
+                children[dep].append(name)
+
+        lock = threading.Lock()
+        all_done = threading.Event()
+        pending = [len(order)]
+        aborted = []
+
+        def emit(name, status, **info):
+            (log.error if status == "failed" else log.info)("dag.node", node=name, status=status, **info)
+            if on_event is not None:
+                on_event(name, status, **info)
+
+        def execute(name):
+            node = self.nodes[name]
+            start = time.monotonic()
+            try:
+                failed = [dep for dep in node.deps if dep in result.errors]
+                if failed and not node.allow_failed_deps:
+                    raise NodeSkipped(f"dependency failed: {', '.join(failed)}")
+
+                hit, output = (False, None)
+                if node.cache:
+                    hit, output = self.cache.get(keys[name], disk=node.cache == "disk")
+                    if hit and node.reusable is not None and not node.reusable(output):
+                        hit, output = False, None
+                if hit:
+                    with lock:
+                        result.cached.add(name)
+                    emit(name, "cached", key=keys[name][:12])
+                else:
+                    args = [result.outputs.get(dep) for dep in node.deps]
+                    with ExitStack() as held:
+                        for slot in node.slots:
+                            held.enter_context(slot)
+                        acquired = time.monotonic()
+                        with lock:
+                            result.waits[name] = acquired - start
+                        start = acquired
+                        emit(name, "started")
+                        with tracing.span(f"dag.{name}", node=name) as node_span:
+                            with lock:
+                                result.spans[name] = (node_span.trace_id, node_span.span_id)
+                            output = node.fn(*args, **node.params)
+                    if node.cache:
+                        self.cache.put(keys[name], output, name, disk=node.cache == "disk")
+                    emit(
+                        name, "completed", elapsed_sec=round(time.monotonic() - start, 2),
+                        waited_sec=round(result.waits.get(name, 0.0), 2),
+                    )
+                with lock:
+                    result.outputs[name] = output
+            except NodeSkipped as e:
+                with lock:
+                    result.errors[name] = e
+                emit(name, "skipped", reason=str(e))
+            except Exception as e:
+                with lock:
+                    result.errors[name] = e
+                emit(name, "failed", error=e)
+            except BaseException as e:
+                with lock:
+                    result.errors[name] = e
+                    aborted.append(e)
+                emit(name, "failed", error=e)
+                all_done.set()
+            finally:
+                with lock:
+                    result.durations[name] = time.monotonic() - start
+                    ready = []
+                    for child in children[name]:
+                        remaining[child].discard(name)
+                        if not remaining[child]:
+                            ready.append(child)
+                    pending[0] -= 1
+                    if pending[0] == 0:
+                        all_done.set()
+                    if aborted:
+                        ready = []
+                for child in ready:
+                    submit(child)
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dag")
+
+        def submit(name):
+            # Carry trace/cancellation context into the worker thread
+            try:
+                pool.submit(contextvars.copy_context().run, execute, name)
+            except RuntimeError:
+                pass  # aborted: the pool is already shutting down
+
+        try:
+            if not order:
+                return result
+            for name in [name for name in order if not remaining[name]]:
+                submit(name)
+            all_done.wait()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if aborted:
+            raise aborted[0]
+        return result
@@ -7,6 +7,11 @@ from src.schemas.person import PersonAttributes
 from src.schemas.environment import EnvironmentAttributes
 from src.schemas.generation import ImageGenerationRequest
 from src.services.image_generation.flux_pro_edit_service import FluxProEditService
+from src.services.pipelines.run_manifest import RunManifest, refs_fingerprint
+from src.core.log import get_logger
+from src.core.tracing import traced
+
+log = get_logger("pipeline")
 
 
 class ImagePipeline:
@@ -14,24 +19,16 @@ class ImagePipeline:
     def __init__(self):
         self.edit_service = FluxProEditService()
 
-    def run(
+    @traced()
+    def build_request(
         self,
-        person: PersonAttributes,
         env: EnvironmentAttributes,
-        description: str,
         person_reference_image: str,
         outfit_reference_images: List[str],
-        no_download: bool = False,
-    ) -> dict:
-        """
-        Run the unified image generation pipeline.
-        """
-        print(f"\n{'='*60}")
-        print(f"[ImagePipeline] Starting unified pipeline")
-        print(f"{'='*60}\n")
-
+    ) -> ImageGenerationRequest:
+        """Build the edit request (prompt + ordered reference images) for one generation."""
         identity_ref = person_reference_image
-        
+
         # Ultra-aggressive face-locking prompt
         unified_prompt = (
             "Photorealistic full-body portrait. CRITICAL CONSTRAINTS:\n\n"
@@ -103,17 +100,50 @@ class ImagePipeline:
         if outfit_reference_images:
             all_refs.extend(outfit_reference_images)
 
-        stage_req = ImageGenerationRequest(
+        return ImageGenerationRequest(
             prompt=unified_prompt,
             resolution="9:16",
             num_images=1,
             reference_images=all_refs,
         )
 
-        print(f"\n[UNIFIED STAGE] Generating photorealistic person image...")
-        print(f"  - Face: ULTRA-LOCKED (zero alterations)")
-        print(f"  - Outfit: {len(all_refs)-1} reference pieces")
-        print(f"  - Background: COMPLETE REPLACEMENT")
+    @traced()
+    def run(
+        self,
+        person: PersonAttributes,
+        env: EnvironmentAttributes,
+        description: str,
+        person_reference_image: str,
+        outfit_reference_images: List[str],
+        no_download: bool = False,
+        checkpoint: Optional[RunManifest] = None,
+    ) -> dict:
+        """
+        Run the unified image generation pipeline.
+
+        With a `checkpoint` manifest, a result stored for the same prompt and
+        references is returned without calling FAL.
+        """
+        stage_req = self.build_request(env, person_reference_image, outfit_reference_images)
+        if checkpoint is None:
+            return self._generate(stage_req, no_download)
+
+        return checkpoint.run_stage(
+            "image",
+            {
+                "model": self.edit_service.MODEL_NAME,
+                "prompt": stage_req.prompt,
+                "refs_fingerprint": refs_fingerprint(stage_req.reference_images),
+                "no_download": no_download,
+            },
+            lambda: self._generate(stage_req, no_download),
+            succeeded=lambda result: result.get("stage") != "generation_failed",
+        )
+
+    def _generate(self, stage_req: ImageGenerationRequest, no_download: bool) -> dict:
+        all_refs = stage_req.reference_images
+
+        log.info("pipeline.image.start", outfit_refs=len(all_refs) - 1)
         start_time = time.time()
         
         try:
@@ -123,13 +153,13 @@ class ImagePipeline:
             files = result.get("local_files", [])
             if not files and no_download:
                 # If no_download is True, we don't expect local files
-                print(f"✓ Complete in {latency:.2f}s (no_download=True)")
+                log.info("pipeline.image.complete", latency_sec=round(latency, 2), no_download=True)
             elif not files:
-                print(f"✗ Generation failed")
+                log.error("pipeline.image.no_output", latency_sec=round(latency, 2))
                 return {"stage": "generation_failed", **result}
             else:
                 image = files[0]
-                print(f"✓ Complete in {latency:.2f}s: {image}")
+                log.info("pipeline.image.complete", latency_sec=round(latency, 2), image=image)
             
             return {
                 "stage": "unified_single_stage_complete",
@@ -140,7 +170,7 @@ class ImagePipeline:
             }
             
         except Exception as e:
-            print(f"✗ Error: {e}")
+            log.error("pipeline.image.failed", error=e)
             return {
                 "stage": "generation_failed",
                 "error": str(e),
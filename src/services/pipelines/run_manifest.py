@@ -0,0 +1,154 @@
+"""
+Stage checkpoints for pipeline runs.
+
+A run manifest is a JSON file (outputs/runs/<name>_<fingerprint>.json) keyed
+by a fingerprint of the run's inputs. Each pipeline stage records what it
+ran (prompt, reference fingerprint, FAL request ids) and what it produced
+(result URL, local files, the pipeline result). Rerunning with the same
+inputs and manifest skips stages that already completed with the same stage
+inputs. A stage interrupted after FAL accepted its request polls that
+request again instead of resubmitting it.
+
+    manifest = RunManifest.for_inputs("full_pipeline", {...inputs...})
+    image = ImagePipeline().run(..., checkpoint=manifest)
+    video = VideoPipeline("grok").run(..., checkpoint=manifest)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from src.core.log import get_logger
+
+log = get_logger("pipeline")
+
+RUNS_DIR = Path(os.getenv("PIPELINE_RUNS_DIR", "outputs/runs"))
+
+
+def fingerprint(value) -> str:
+    """Stable SHA-256 of a JSON-serialisable value."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def refs_fingerprint(refs) -> str:
+    """Fingerprint of reference images; local files are hashed by content, so edits invalidate."""
+    digest = hashlib.sha256()
+    for ref in refs or []:
+        path = Path(ref) if ref and not ref.startswith(("http://", "https://", "data:")) else None
+        if path is not None and path.is_file():
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        else:
+            digest.update(str(ref).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def local_files_exist(paths) -> bool:
+    """Whether every local path in `paths` exists; URLs (FAL CDN, data:) are not checked."""
+    return all(
+        os.path.exists(path) for path in paths or []
+        if not str(path).startswith(("http://", "https://", "data:"))
+    )
+
+
+def result_url(result: dict) -> str | None:
+    """First image or video URL in a pipeline result's FAL response."""
+    response = result.get("raw_response") or {}
+    if (response.get("video") or {}).get("url"):
+        return response["video"]["url"]
+    if response.get("image"):
+        return response["image"].get("url")
+    images = response.get("images") or [{}]
+    return images[0].get("url")
+
+
+class RunManifest:
+    """Per-stage progress of one pipeline run, persisted after every change."""
+
+    def __init__(self, path, inputs_fingerprint: str | None = None):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {"fingerprint": inputs_fingerprint, "created_at": time.time(), "stages": {}}
+
+    @classmethod
+    def for_inputs(cls, name: str, inputs: dict, root=RUNS_DIR) -> "RunManifest":
+        """The manifest for `inputs`, resumed if a run with the same inputs exists."""
+        key = fingerprint(inputs)
+        return cls(Path(root) / f"{name}_{key[:16]}.json", key)
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.data, f, indent=2, default=str)
+        os.replace(tmp, self.path)
+
+    def stage(self, name: str) -> dict:
+        return self.data["stages"].get(name) or {}
+
+    def completed(self, name: str, stage_fingerprint: str) -> dict | None:
+        """The stored result of `name` if it completed with the same stage inputs."""
+        entry = self.stage(name)
+        if entry.get("status") != "completed" or entry.get("fingerprint") != stage_fingerprint:
+            return None
+        # Downloads deleted since then are regenerated
+        if not local_files_exist(entry.get("local_files")):
+            return None
+        return entry["result"]
+
+    def update_stage(self, name: str, **fields):
+        with self._lock:
+            self.data["stages"][name] = {**self.stage(name), **fields, "updated_at": time.time()}
+            self._save()
+
+    def run_stage(self, name: str, stage_inputs: dict, fn, succeeded=lambda result: True):
+        """
+        Return the stored result of stage `name`, or run `fn()` and store it.
+
+        `stage_inputs` (model, prompt, reference fingerprint, ...) decides
+        whether a stored result still applies. FAL requests made by `fn` are
+        recorded as they are accepted and resumed if the stage is rerun.
+        """
+        from src.clients.fal_client import queue_listener, resume_requests
+
+        stage_fingerprint = fingerprint(stage_inputs)
+        stored = self.completed(name, stage_fingerprint)
+        if stored is not None:
+            log.info("pipeline.stage.skipped", stage=name, manifest=str(self.path))
+            return stored
+
+        entry = self.stage(name)
+        # Requests from an earlier attempt only apply to the same stage inputs
+        handles = dict(entry.get("fal_requests") or {}) if entry.get("fingerprint") == stage_fingerprint else {}
+        self.update_stage(name, status="running", fingerprint=stage_fingerprint, fal_requests=handles, **stage_inputs)
+
+        def on_update(update: dict):
+            if update.get("event") == "enqueued":
+                handles[update["model"]] = update["request_id"]
+                self.update_stage(name, fal_requests=dict(handles), fal_request_id=update["request_id"])
+
+        try:
+            with queue_listener(on_update), resume_requests(handles):
+                result = fn()
+        except Exception as e:
+            # A request that failed on FAL's side is not worth polling again
+            self.update_stage(name, status="failed", error=str(e), fal_requests={})
+            raise
+
+        if succeeded(result):
+            self.update_stage(
+                name, status="completed", result=result, result_url=result_url(result),
+                local_files=result.get("local_files", []), finished_at=time.time(),
+            )
+        else:
+            self.update_stage(name, status="failed", error=result.get("error"), fal_requests={})
+        return result
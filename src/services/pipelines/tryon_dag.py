@@ -0,0 +1,184 @@
+"""
+The try-on flow as a DAG:
+
+    refs -> prompt -> image -> quality_gate -> video:<model>:<n> (one per model x motion) -> persist
+
+Video nodes only depend on the gated image, so they run in parallel. The
+image and video nodes are cached on disk by artifact key (reference content,
+prompt, model, motion, ...), so rerunning with one more video model only
+generates that model's video.
+
+    dag = build_tryon_dag("assets/me.png", ["top.png"], env, video_models=["grok", "kling"])
+    result = dag.run()
+    result.outputs["persist"]  # summary, also written to outputs/tryon/
+"""
+
+import os
+import time
+from pathlib import Path
+
+from src.core.log import get_logger
+from src.services.pipelines.dag import ArtifactCache, Dag
+from src.services.pipelines.run_manifest import local_files_exist, refs_fingerprint, result_url
+from src.utils.json_utils import save_json
+
+log = get_logger("pipeline")
+
+TRYON_OUTPUT_DIR = Path(os.getenv("TRYON_OUTPUT_DIR", "outputs/tryon"))
+DEFAULT_MOTION = "person turns around slowly to show the outfit"
+
+
+class QualityGateFailed(Exception):
+    """The generated image is not fit to animate."""
+
+
+def _files_exist(output: dict) -> bool:
+    return local_files_exist((output or {}).get("local_files"))
+
+
+def prep_refs(person: str, outfits: list, refs_digest: str) -> list:
+    """Person reference first, then outfit references; local files must exist."""
+    refs = [person, *[ref for ref in outfits if ref]]
+    for ref in refs:
+        if not ref.startswith(("http://", "https://", "data:")) and not os.path.isfile(ref):
+            raise FileNotFoundError(f"Reference image not found: {ref}")
+    return refs
+
+
+def build_prompt(refs: list, env: dict) -> dict:
+    from src.schemas.environment import EnvironmentAttributes
+    from src.services.pipelines.image_pipeline import ImagePipeline
+
+    req = ImagePipeline().build_request(EnvironmentAttributes(**env), refs[0], refs[1:])
+    return req.model_dump()
+
+
+def generate_image(prompt: dict, no_download: bool) -> dict:
+    from src.schemas.generation import ImageGenerationRequest
+    from src.services.pipelines.image_pipeline import ImagePipeline
+
+    result = ImagePipeline()._generate(ImageGenerationRequest(**prompt), no_download)
+    if result.get("stage") == "generation_failed":
+        raise RuntimeError(result.get("error") or "Image generation produced no output")
+    return result
+
+
+def quality_gate(image: dict, min_side: int) -> dict:
+    """Reject images without a URL, flagged as NSFW, or smaller than `min_side` pixels."""
+    response = image.get("raw_response") or {}
+    url = result_url(image)
+    if not url:
+        raise QualityGateFailed("Image response had no URL")
+    if any(response.get("has_nsfw_concepts") or []):
+        raise QualityGateFailed("Image was flagged by the safety checker")
+    first = (response.get("images") or [{}])[0]
+    width, height = first.get("width"), first.get("height")
+    if width and height and min(width, height) < min_side:
+        raise QualityGateFailed(f"Image is {width}x{height}, below {min_side}px")
+    local_files = image.get("local_files") or []
+    return {"image_url": url, "width": width, "height": height, "local_file": local_files[0] if local_files else None}
+
+
+def generate_video(gate: dict, model: str, apparel: str, motion: str, duration_sec: int, gender: str,
+                   no_download: bool) -> dict:
+    from src.services.pipelines.video_pipeline import VideoPipeline
+
+    result = VideoPipeline(video_model=model).run(
+        reference_image=gate["image_url"],
+        apparel_description=apparel,
+        motion_description=motion,
+        duration_sec=duration_sec,
+        gender=gender,
+        no_download=no_download,
+    )
+    if not result_url(result):
+        raise RuntimeError(f"{model} response had no video URL")
+    return result
+
+
+def persist(gate, *videos, names: list, inputs: dict, output_dir: str) -> dict:
+    """Write a summary of the run; failed videos are recorded as null."""
+    summary = {
+        "inputs": inputs,
+        "image": gate,
+        "videos": {
+            name: video and {
+                "video_url": result_url(video),
+                "local_files": video.get("local_files", []),
+                "latency_sec": video.get("latency_sec"),
+            }
+            for name, video in zip(names, videos)
+        },
+        "created_at": time.time(),
+    }
+    path = Path(output_dir) / f"tryon_{int(time.time() * 1000)}.json"
+    save_json(summary, path)
+    log.info("pipeline.tryon.persisted", path=str(path), videos=sum(1 for v in videos if v))
+    return {**summary, "path": str(path)}
+
+
+def build_tryon_dag(
+    person_reference_image: str,
+    outfit_reference_images: list,
+    env,
+    video_models=(),
+    motions=(DEFAULT_MOTION,),
+    gender: str = "male",
+    duration_sec: int = 4,
+    no_download: bool = False,
+    min_side: int = 512,
+    output_dir=TRYON_OUTPUT_DIR,
+    cache: ArtifactCache | None = None,
+    memoize: bool = True,
+    limits: dict | None = None,
+    max_workers: int = 8,
+) -> Dag:
+    """
+    Build the try-on DAG for one person and outfit.
+
+    `env` is an EnvironmentAttributes (or its dict). Every model in
+    `video_models` animates every motion in `motions`; with no models the
+    graph stops after the quality gate and persist. `memoize=False` always
+    calls FAL (benchmarks). `limits` maps "image" or a video model name to
+    semaphores held while that node runs, to share limits across graphs.
+    """
+    env = env if isinstance(env, dict) else env.model_dump()
+    limits = limits or {}
+    stored = "disk" if memoize else None
+    dag = Dag(cache=cache, max_workers=max_workers)
+    dag.add(
+        "refs", prep_refs, cache="memory",
+        person=person_reference_image, outfits=list(outfit_reference_images or []),
+        refs_digest=refs_fingerprint([person_reference_image, *(outfit_reference_images or [])]),
+    )
+    dag.add("prompt", build_prompt, deps=("refs",), cache="memory", env=env)
+    dag.add(
+        "image", generate_image, deps=("prompt",), cache=stored, reusable=_files_exist,
+        slots=limits.get("image", ()), no_download=no_download,
+    )
+    dag.add("quality_gate", quality_gate, deps=("image",), min_side=min_side)
+
+    videos = []
+    for model in video_models:
+        for i, motion in enumerate(motions):
+            videos.append(dag.add(
+                f"video:{model}:{i}", generate_video, deps=("quality_gate",), cache=stored, reusable=_files_exist,
+                slots=limits.get(model, ()),
+                model=model, apparel=env["apparel_type"], motion=motion, duration_sec=duration_sec,
+                gender=gender, no_download=no_download,
+            ))
+
+    dag.add(
+        "persist", persist, deps=("quality_gate", *videos), allow_failed_deps=True,
+        names=videos, output_dir=str(output_dir),
+        inputs={
+            "person": person_reference_image,
+            "outfits": list(outfit_reference_images or []),
+            "env": env,
+            "video_models": list(video_models),
+            "motions": list(motions),
+            "gender": gender,
+            "duration_sec": duration_sec,
+        },
+    )
+    return dag
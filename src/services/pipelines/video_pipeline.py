@@ -1,14 +1,33 @@
+import importlib
 from typing import Optional
 
 from src.schemas.generation import VideoGenerationRequest
-from src.services.video_generation.veo3_service import Veo3VideoService
-from src.services.video_generation.ltx_service import LtxVideoService
-from src.services.video_generation.kling_service import KlingVideoService
-from src.services.video_generation.grok_service import GrokVideoService
-from src.services.video_generation.luma_service import LumaVideoService
-from src.services.video_generation.pika_service import PikaVideoService
-from src.services.video_generation.seedance_service import SeedanceVideoService
-from src.services.video_generation.hunyuan_service import HunyuanVideoService
+from src.services.pipelines.run_manifest import RunManifest, refs_fingerprint
+from src.core.log import get_logger
+from src.core.tracing import traced
+
+log = get_logger("pipeline")
+
+# Model name -> "module:class"; a service module is imported when its model is first used
+VIDEO_SERVICES = {
+    "veo3": "src.services.video_generation.veo3_service:Veo3VideoService",
+    "ltx": "src.services.video_generation.ltx_service:LtxVideoService",
+    "kling": "src.services.video_generation.kling_service:KlingVideoService",
+    "grok": "src.services.video_generation.grok_service:GrokVideoService",
+    "luma": "src.services.video_generation.luma_service:LumaVideoService",
+    "pika": "src.services.video_generation.pika_service:PikaVideoService",
+    "seedance": "src.services.video_generation.seedance_service:SeedanceVideoService",
+    "hunyuan": "src.services.video_generation.hunyuan_service:HunyuanVideoService",
+}
+
+
+def video_service_class(model_name: str):
+    """Import and return the service class registered for `model_name`."""
+    try:
+        module_name, class_name = VIDEO_SERVICES[model_name].split(":")
+    except KeyError:
+        raise ValueError(f"Unknown video model: {model_name}") from None
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 class VideoPipeline:
@@ -24,25 +43,9 @@ class VideoPipeline:
 
     def _init_video_service(self, model_name: str):
         """Factory to instantiate the appropriate video service."""
-        if model_name == "veo3":
-            return Veo3VideoService()
-        elif model_name == "ltx":
-            return LtxVideoService()
-        elif model_name == "kling":
-            return KlingVideoService()
-        elif model_name == "grok":
-            return GrokVideoService()
-        elif model_name == "luma":
-            return LumaVideoService()
-        elif model_name == "pika":
-            return PikaVideoService()
-        elif model_name == "seedance":
-            return SeedanceVideoService()
-        elif model_name == "hunyuan":
-            return HunyuanVideoService()
-        else:
-            raise ValueError(f"Unknown video model: {model_name}")
+        return video_service_class(model_name)()
 
+    @traced()
     def run(
         self,
         reference_image: str,
@@ -51,6 +54,7 @@ class VideoPipeline:
         duration_sec: int,
         gender: str = "male",
         no_download: bool = False,
+        checkpoint: Optional[RunManifest] = None,
     ) -> dict:
         """
         Generate a video of the person in the reference image.
@@ -62,10 +66,49 @@ class VideoPipeline:
             duration_sec: Video duration in seconds (default: 4).
             gender: Gender for personalized prompts ('male' or 'female').
             no_download: Whether to skip local file downloads.
+            checkpoint: Run manifest; a video stored for the same model, prompt
+                and reference image is returned without calling FAL.
 
         Returns:
             dict with keys: raw_response, local_files, metadata_file, latency_sec
         """
+        req = self.build_request(
+            reference_image=reference_image,
+            apparel_description=apparel_description,
+            motion_description=motion_description,
+            duration_sec=duration_sec,
+            gender=gender,
+        )
+
+        def generate():
+            log.info("pipeline.video.start", model=self.video_model, gender=gender, motion=motion_description[:60])
+            result = self.video_service.generate_video(req, no_download=no_download)
+            return {"stage": "video", "video_model": self.video_model, **result}
+
+        if checkpoint is None:
+            return generate()
+        return checkpoint.run_stage(
+            f"video:{self.video_model}",
+            {
+                "model": self.video_service.MODEL_NAME,
+                "prompt": req.prompt,
+                "refs_fingerprint": refs_fingerprint([reference_image]),
+                "duration_sec": duration_sec,
+                "no_download": no_download,
+            },
+            generate,
+        )
+
+    @traced()
+    def build_request(
+        self,
+        reference_image: str,
+        apparel_description: str,
+        motion_description: str,
+        duration_sec: int,
+        gender: str = "male",
+    ) -> VideoGenerationRequest:
+        """Build the video request (prompt + reference image) for one generation."""
 
         # Build comprehensive prompt with motion description
         prompt = (
@@ -78,15 +121,9 @@ class VideoPipeline:
             f"Simply turning around to display the outfit."
         )
 
-        req = VideoGenerationRequest(
+        return VideoGenerationRequest(
             prompt=prompt,
             reference_image=reference_image,
             duration_sec=duration_sec,
             num_videos=1,
         )
-
-        print(f"[VideoPipeline] Generating video using {self.video_model}...")
-        print(f"  Gender: {gender}")
-        print(f"  Motion: {motion_description[:60]}...")
-        result = self.video_service.generate_video(req, no_download=no_download)
-        return {"stage": "video", "video_model": self.video_model, **result}
\ No newline at end of file
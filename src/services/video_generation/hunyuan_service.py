@@ -7,6 +7,11 @@ import json
 
 from src.utils.file_utils import download_file
 from src.utils.image_encoding import local_image_to_data_uri
+from src.core.log import get_logger
+from src.core.tracing import traced
+
+
+log = get_logger("video_service")
 
 
 class HunyuanVideoService:
@@ -17,6 +22,7 @@ class HunyuanVideoService:
     def __init__(self):
         self.client = FalClient()
 
+    @traced()
     def _resolve_ref(self, ref: str) -> str:
         """Convert local path to data URI if needed."""
         if ref.startswith("http://") or ref.startswith("https://") or ref.startswith("data:"):
@@ -24,20 +30,25 @@ class HunyuanVideoService:
         else:
             return local_image_to_data_uri(ref)
 
-    def generate_video(self, req: VideoGenerationRequest) -> dict:
-        start_time = time.time()
-
+    def build_arguments(self, req: VideoGenerationRequest) -> dict:
+        """Build the FAL arguments for a request."""
         # Resolve reference image
         image_url = self._resolve_ref(req.reference_image)
 
-        arguments = {
+        return {
             "prompt": req.prompt,
             "image_url": image_url,
             "num_videos": req.num_videos,
             "aspect_ratio": "9:16",
         }
 
-        print(f"[HunyuanService] Calling {self.MODEL_NAME} with prompt: {req.prompt[:60]}...")
+    @traced()
+    def generate_video(self, req: VideoGenerationRequest) -> dict:
+        start_time = time.time()
+
+        arguments = self.build_arguments(req)
+
+        log.info("video.call", model=self.MODEL_NAME, prompt=req.prompt[:60])
         result = self.client.subscribe(
             model=self.MODEL_NAME,
             arguments=arguments
@@ -62,7 +73,7 @@ class HunyuanVideoService:
             if not url:
                 raise ValueError("No URL in video response")
             save_path = base_dir / f"video_{ts}.mp4"
-            print(f"[HunyuanService] Downloading video to {save_path}...")
+            log.info("video.download", model=self.MODEL_NAME, path=save_path)
             download_file(url, save_path)
             saved_files.append(str(save_path))
         else:
@@ -1,16 +1,37 @@
 import httpx
+import time
 from pathlib import Path
 
+from src.core import metrics, tracing
+from src.core.cancellation import raise_if_cancelled
+
+DOWNLOAD_DURATION = metrics.Histogram(
+    "felix_download_duration_seconds", "Time to download a generated file", ("model",)
+)
+DOWNLOAD_BYTES = metrics.Counter("felix_download_bytes_total", "Bytes downloaded from FAL outputs", ("model",))
+
 
 def download_file(url: str, save_path: Path, timeout: float = 120.0):
 
+    # Cancelled jobs skip (or abort) their downloads
+    raise_if_cancelled()
     save_path.parent.mkdir(parents=True, exist_ok=True)
+    start_time = time.monotonic()
+    size = 0
+
+    with tracing.span("download", url=url.split("?")[0], model=metrics.model_label()) as download_span:
+        with httpx.stream("GET", url, timeout=timeout) as r:
+            r.raise_for_status()
 
-    with httpx.stream("GET", url, timeout=timeout) as r:
-        r.raise_for_status()
+            with open(save_path, "wb") as f:
+                for chunk in r.iter_bytes():
+                    raise_if_cancelled()
+                    f.write(chunk)
+                    size += len(chunk)
+        download_span.set(bytes=size)
 
-        with open(save_path, "wb") as f:
-            for chunk in r.iter_bytes():
-                f.write(chunk)
+    model = metrics.model_label()
+    DOWNLOAD_DURATION.observe(time.monotonic() - start_time, model=model)
+    DOWNLOAD_BYTES.inc(size, model=model)
 
     return save_path
@@ -0,0 +1,28 @@
+from app.backend.api.admission import AdmissionController, unknown_video_model
+
+
+def _queue_mode(depth, service_sec):
+    return AdmissionController(
+        max_queue_depth=10, default_limit=4, model_limits={}, latency_target_sec=300, latency_targets={},
+        default_service_sec=60, depth_fn=lambda: depth, workers=2, service_time_fn=lambda: service_sec,
+    )
+
+
+def test_queue_mode_retry_after_uses_observed_service_time():
+    # 11 jobs over the limit, 2 workers at 4s each -> 0.5 jobs/s
+    assert _queue_mode(20, 4.0).try_admit(["image"]) == (None, 22)
+
+
+def test_queue_mode_falls_back_to_default_service_time():
+    assert _queue_mode(20, None).try_admit(["image"]) == (None, 330)
+
+
+def test_queue_mode_admits_below_the_depth_limit():
+    assert _queue_mode(3, 4.0).try_admit(["image"]) == (None, 0)
+
+
+def test_unknown_video_models_are_rejected():
+    assert unknown_video_model({}) is None
+    assert unknown_video_model({"model": "kling"}) is None
+    assert unknown_video_model({"model": "made-up"}) == "Unknown video model: made-up"
+    assert unknown_video_model({"model": ["grok"]})
@@ -0,0 +1,71 @@
+import pytest
+
+from app.backend.api import generate
+from app.backend.api.admission import AdmissionController
+from app.backend.api.jobs import ACTIVE_STATUSES, JOB_TRANSITIONS, JobStore, cancel_job
+from src.core import metrics
+
+
+def _transitions(kind, status):
+    return metrics._collect().get(JOB_TRANSITIONS._key({"kind": kind, "status": status}), 0)
+
+
+@pytest.fixture
+def store(monkeypatch, request):
+    store = JobStore(request.node.name)
+    store.create("job")
+    monkeypatch.setattr(generate, "JOB_STORE", store)
+    return store
+
+
+def test_cancelled_job_is_counted_once(store):
+    assert cancel_job(store, "job")[1] == 200
+    # The runner's own JobCancelled handler comes second
+    assert store.update("job", if_status=ACTIVE_STATUSES, status="cancelled") is None
+
+    assert _transitions(store.kind, "cancelled") == 1
+
+
+def test_finished_job_is_not_cancelled(store):
+    store.update("job", status="completed")
+
+    job, status_code = cancel_job(store, "job")
+
+    assert status_code == 409
+    assert job["status"] == "completed"
+    assert cancel_job(store, "missing") == (None, 404)
+
+
+def test_runner_does_not_restart_a_cancelled_job(store, monkeypatch):
+    monkeypatch.setattr(generate, "_generate_image", lambda data: pytest.fail("cancelled job ran"))
+    cancel_job(store, "job")
+
+    generate._run_generate_job("job", {})
+
+    assert store.get("job")["status"] == "cancelled"
+
+
+def test_failure_after_cancel_stays_cancelled(store, monkeypatch):
+    def cancelled_then_failed(data):
+        cancel_job(store, "job")
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(generate, "_generate_image", cancelled_then_failed)
+
+    generate._run_generate_job("job", {})
+
+    job = store.get("job")
+    assert job["status"] == "cancelled"
+    assert "error" not in job
+    assert _transitions(store.kind, "failed") == 0
+
+
+def test_closed_ticket_gives_each_slot_back_once():
+    controller = AdmissionController(10, 2, {}, 60.0, {}, 1.0)
+    ticket, _ = controller.try_admit(["image", "grok"])
+
+    ticket.close()
+    ticket.close()
+
+    assert not ticket.take("image")
+    assert all(entry["outstanding"] == 0 for entry in controller.snapshot().values())
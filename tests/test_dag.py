@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from src.core.cancellation import JobCancelled
+from src.services.pipelines.dag import ArtifactCache, Dag, NodeSkipped
+
+
+def _value(value):
+    return value
+
+
+def _add(a, b):
+    return a + b
+
+
+def _fail():
+    raise ValueError("boom")
+
+
+def test_outputs_follow_dependencies():
+    dag = Dag()
+    dag.add("a", _value, value=2)
+    dag.add("b", _value, value=3)
+    dag.add("sum", _add, deps=("a", "b"))
+
+    result = dag.run()
+
+    assert result.ok
+    assert result.outputs["sum"] == 5
+
+
+def test_independent_branches_run_in_parallel():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(_):
+        barrier.wait()
+        return True
+
+    dag = Dag()
+    dag.add("root", _value, value=1)
+    dag.add("left", meet, deps=("root",))
+    dag.add("right", meet, deps=("root",))
+
+    # Would time out on the barrier if the branches ran one after the other
+    assert dag.run().ok
+
+
+def test_targets_run_only_their_dependencies():
+    calls = []
+    dag = Dag()
+    dag.add("a", lambda: calls.append("a"))
+    dag.add("b", lambda: calls.append("b"))
+
+    dag.run(targets=["a"])
+
+    assert calls == ["a"]
+
+
+def test_failure_skips_dependents_but_not_other_branches():
+    dag = Dag()
+    dag.add("bad", _fail)
+    dag.add("child", _value, deps=("bad",))
+    dag.add("other", _value, value=1)
+    dag.add("summary", lambda bad, other: (bad, other), deps=("bad", "other"), allow_failed_deps=True)
+
+    result = dag.run()
+
+    assert isinstance(result.errors["bad"], ValueError)
+    assert isinstance(result.errors["child"], NodeSkipped)
+    assert result.outputs["other"] == 1
+    assert result.outputs["summary"] == (None, 1)
+
+
+def test_cached_outputs_are_reused_until_params_change(tmp_path):
+    calls = []
+
+    def count(value):
+        calls.append(value)
+        return value
+
+    def build(value):
+        dag = Dag(cache=ArtifactCache(tmp_path))
+        dag.add("n", count, cache="disk", value=value)
+        return dag
+
+    assert build(1).run().outputs["n"] == 1
+    again = build(1).run()
+    assert again.cached == {"n"} and again.outputs["n"] == 1
+    assert build(2).run().outputs["n"] == 2
+    assert calls == [1, 2]
+
+
+def test_unreusable_cached_output_is_recomputed(tmp_path):
+    calls = []
+    dag = Dag(cache=ArtifactCache(tmp_path))
+    dag.add("n", lambda: calls.append(1) or len(calls), cache="memory", reusable=lambda output: output > 1)
+
+    dag.run()
+    dag.run()
+    result = dag.run()
+
+    assert calls == [1, 1]
+    assert result.cached == {"n"}
+
+
+def test_slots_limit_concurrency():
+    slot = threading.BoundedSemaphore(1)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    dag = Dag()
+    for i in range(4):
+        dag.add(f"n{i}", work, slots=(slot,))
+
+    result = dag.run()
+
+    assert result.ok
+    assert peak[0] == 1
+
+
+def test_cancellation_stops_dependents_and_is_raised():
+    calls = []
+
+    def cancelled():
+        raise JobCancelled()
+
+    dag = Dag()
+    dag.add("cancelled", cancelled)
+    dag.add("child", lambda _: calls.append("child"), deps=("cancelled",), allow_failed_deps=True)
+
+    with pytest.raises(JobCancelled):
+        dag.run()
+    assert calls == []
@@ -0,0 +1,86 @@
+import pytest
+
+from app.backend.api import idempotency
+from app.backend.api.idempotency import IdempotencyConflict, IdempotencyIndex, find_or_register
+from app.backend.api.job_queue import SqliteIdempotencyIndex
+from app.backend.api.jobs import JobStore
+
+REQUEST = {"person_image": "aGVsbG8=", "gender": "female", "outfit_top": "Blue T-Shirt", "background": "Cafe"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def index(request, tmp_path, monkeypatch):
+    index = IdempotencyIndex(600) if request.param == "memory" else SqliteIdempotencyIndex(str(tmp_path / "jobs.db"), 600)
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY", index)
+    return index
+
+
+@pytest.fixture
+def store():
+    return JobStore("image")
+
+
+def _submit(store, job_id, data=REQUEST, key=None):
+    """Register a submission like the routes do; returns the id of the job that serves it."""
+    headers = {"Idempotency-Key": key} if key else {}
+    existing_id = find_or_register("image", store, headers, data, job_id)
+    if existing_id:
+        return existing_id
+    store.create(job_id)
+    return job_id
+
+
+def test_identical_request_reuses_the_running_job(index, store):
+    assert _submit(store, "first") == "first"
+    assert _submit(store, "second") == "first"
+
+
+def test_different_inputs_start_a_new_job(index, store):
+    _submit(store, "first")
+    assert _submit(store, "second", {**REQUEST, "background": "Beach"}) == "second"
+
+
+@pytest.mark.parametrize("status", ["failed", "cancelled"])
+def test_failed_or_cancelled_jobs_are_not_reused(index, store, status):
+    _submit(store, "first")
+    store.update("first", status=status)
+
+    assert _submit(store, "second") == "second"
+    # The retry is now the job identical requests attach to
+    assert _submit(store, "third") == "second"
+
+
+def test_completed_job_is_reused(index, store):
+    _submit(store, "first")
+    store.update("first", status="completed")
+
+    assert _submit(store, "second") == "first"
+
+
+def test_idempotency_key_reuses_its_job(index, store):
+    _submit(store, "first", key="k1")
+    store.update("first", status="failed")
+
+    # The key names the job even after it failed
+    assert _submit(store, "second", key="k1") == "first"
+
+
+def test_idempotency_key_with_a_different_request_conflicts(index, store):
+    _submit(store, "first", key="k1")
+
+    with pytest.raises(IdempotencyConflict):
+        _submit(store, "second", {**REQUEST, "outfit_top": "Red Dress"}, key="k1")
+
+
+def test_discarded_job_is_not_reused(index, store):
+    find_or_register("image", store, {}, REQUEST, "rejected")
+    index.discard("image", "rejected")
+
+    assert _submit(store, "second") == "second"
+
+
+def test_zero_window_disables_reuse(store, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY", IdempotencyIndex(0))
+    _submit(store, "first")
+
+    assert _submit(store, "second") == "second"
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+from app.backend.api import job_queue
+from app.backend.api.jobs import ACTIVE_STATUSES
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+@pytest.fixture
+def queue(db_path):
+    return job_queue.SqliteJobQueue(db_path)
+
+
+def test_unacked_job_is_redelivered_after_its_lease_expires(queue):
+    queue.enqueue("image", "job", {"n": 1})
+
+    first = queue.claim("w1", visibility_timeout=0.05)
+    assert first["payload"] == {"n": 1} and first["attempts"] == 1
+    assert queue.claim("w2") is None
+
+    time.sleep(0.1)
+    second = queue.claim("w2")
+
+    assert second["job_id"] == "job" and second["attempts"] == 2
+    # The first worker's lease is gone
+    assert not queue.heartbeat("job", "w1")
+
+
+def test_heartbeat_keeps_the_lease(queue):
+    queue.enqueue("image", "job", {})
+    queue.claim("w1", visibility_timeout=0.2)
+
+    time.sleep(0.1)
+    assert queue.heartbeat("job", "w1", visibility_timeout=1.0)
+    time.sleep(0.15)
+
+    assert queue.claim("w2") is None
+
+
+def test_acked_job_is_not_delivered_again(queue):
+    queue.enqueue("image", "job", {})
+    queue.claim("w1", visibility_timeout=0.05)
+    queue.ack("job", "w1")
+
+    time.sleep(0.1)
+
+    assert queue.claim("w2") is None
+    assert queue.depth() == 0
+
+
+def test_hand_back_redelivers_without_counting_the_attempt(queue):
+    queue.enqueue("image", "job", {})
+    queue.claim("w1")
+
+    queue.hand_back("job", "w1")
+    claim = queue.claim("w2")
+
+    assert claim["attempts"] == 1
+
+
+def test_hand_back_by_a_worker_that_lost_the_lease_is_ignored(queue):
+    queue.enqueue("image", "job", {})
+    queue.claim("w1", visibility_timeout=0.01)
+    time.sleep(0.05)
+    queue.claim("w2")
+
+    queue.hand_back("job", "w1")
+
+    assert queue.claim("w3") is None
+
+
+def test_higher_priority_is_claimed_first(queue):
+    queue.enqueue("video", "batch-job", {}, priority="batch")
+    queue.enqueue("image", "interactive-job", {}, priority="interactive")
+
+    assert queue.claim("w1")["job_id"] == "interactive-job"
+
+
+def test_store_update_is_compare_and_set(db_path):
+    store = job_queue.SqliteJobStore(db_path, "image")
+    store.create("job")
+    store.update("job", status="cancelled")
+
+    assert store.update("job", if_status=ACTIVE_STATUSES, status="failed") is None
+    assert store.get("job")["status"] == "cancelled"
+
+
+def test_reset_connections_opens_a_fresh_connection(db_path):
+    db = job_queue._database(db_path)
+    inherited = db.connect()
+
+    job_queue.reset_connections()
+
+    assert db.connect() is not inherited
+
+
+def test_service_time_is_measured_from_acked_jobs(queue):
+    assert queue.service_time() is None
+    queue.enqueue("image", "job", {})
+    queue.claim("w1")
+    time.sleep(0.05)
+    queue.ack("job", "w1")
+
+    assert queue.service_time() >= 0.05
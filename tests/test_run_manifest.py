@@ -0,0 +1,26 @@
+from src.services.pipelines.run_manifest import RunManifest
+
+
+def _completed(tmp_path, local_files):
+    manifest = RunManifest(tmp_path / "run.json")
+    manifest.update_stage("image", status="completed", fingerprint="f", local_files=local_files, result={"ok": 1})
+    return RunManifest(tmp_path / "run.json")
+
+
+def test_completed_stage_with_cdn_urls_is_reused(tmp_path):
+    manifest = _completed(tmp_path, ["https://v3.fal.media/files/out.png"])
+    assert manifest.completed("image", "f") == {"ok": 1}
+
+
+def test_deleted_download_is_regenerated(tmp_path):
+    path = tmp_path / "out.png"
+    path.write_bytes(b"png")
+    manifest = _completed(tmp_path, [str(path), "https://v3.fal.media/files/out.png"])
+    assert manifest.completed("image", "f") == {"ok": 1}
+
+    path.unlink()
+    assert manifest.completed("image", "f") is None
+
+
+def test_changed_stage_inputs_are_not_reused(tmp_path):
+    assert _completed(tmp_path, []).completed("image", "other") is None
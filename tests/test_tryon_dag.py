@@ -0,0 +1,59 @@
+import pytest
+
+from src.services.pipelines.tryon_dag import build_tryon_dag
+
+ENV = {"apparel_type": "Blue T-Shirt", "inferred_setting": "studio", "visual_cues": "soft light"}
+
+
+@pytest.fixture(autouse=True)
+def standin(monkeypatch, tmp_path):
+    monkeypatch.setenv("FAL_STANDIN", "1")
+    monkeypatch.setenv("FAL_STANDIN_QUEUE_LATENCY", "fixed:0")
+    monkeypatch.setenv("FAL_STANDIN_INFERENCE_LATENCY", "fixed:0.05")
+    monkeypatch.setenv("FAL_STANDIN_FAILURE_RATE", "0")
+
+
+def _dag(tmp_path, **kwargs):
+    return build_tryon_dag(
+        "https://example.com/person.png",
+        ["https://example.com/top.png"],
+        ENV,
+        output_dir=tmp_path / "tryon",
+        **{"memoize": False, **kwargs},
+    )
+
+
+def test_runs_end_to_end_against_standin(tmp_path):
+    result = _dag(tmp_path, video_models=["grok"], motions=["turns around", "walks forward"]).run()
+
+    assert result.ok, result.errors
+    assert result.outputs["quality_gate"]["image_url"].startswith("https://standin.fal.local/")
+    videos = result.outputs["persist"]["videos"]
+    assert set(videos) == {"video:grok:0", "video:grok:1"}
+    assert all(video["video_url"].endswith(".mp4") for video in videos.values())
+    assert list((tmp_path / "tryon").glob("tryon_*.json"))
+
+
+def test_failed_video_is_recorded_as_null(tmp_path, monkeypatch):
+    from src.services.pipelines import tryon_dag
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(tryon_dag, "generate_video", broken)
+    result = _dag(tmp_path, video_models=["grok"]).run()
+
+    assert set(result.errors) == {"video:grok:0"}
+    assert result.outputs["persist"]["videos"] == {"video:grok:0": None}
+
+
+def test_memoized_rerun_reuses_results_with_url_outputs(tmp_path):
+    from src.services.pipelines.dag import ArtifactCache
+
+    cache = ArtifactCache(tmp_path / "artifacts")
+    first = _dag(tmp_path, video_models=["grok"], cache=cache, memoize=True).run()
+    again = _dag(tmp_path, video_models=["grok"], cache=ArtifactCache(tmp_path / "artifacts"), memoize=True).run()
+
+    assert first.ok and again.ok
+    assert {"image", "video:grok:0"} <= again.cached
+    assert again.outputs["video:grok:0"] == first.outputs["video:grok:0"]